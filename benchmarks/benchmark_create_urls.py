@@ -0,0 +1,122 @@
+"""
+benchmark of create_urls() on a large query GeoDataFrame (buoy-like colocation:
+one point and one short time window per row), compared to the former row by row
+builder, whose URLs must be identical.
+
+python benchmarks/benchmark_create_urls.py --nb-rows 500000
+"""
+
+import time
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+import cdsodatacli.query as qr
+
+
+def create_urls_per_row(gdf, top=1000):
+    """
+    former implementation of create_urls(): one gdf.iloc[] per row
+
+    Returns:
+        urls (list): (id_original_query, url)
+    """
+    urlapi = "https://catalogue.dataspace.copernicus.eu/odata/v1/Products?$filter="
+    urls = []
+    for row in range(len(gdf)):
+        gdf_row = gdf.iloc[row]
+        enter_index = gdf["id_original_query"].iloc[row]
+        params = {}
+        if "geometry" in gdf_row and not pd.isna(gdf_row["geometry"]):
+            value = str(gdf_row.geometry)
+            geo_type = gdf_row.geometry.geom_type
+            coordinates_part = value[value.find("(") + 1 : value.find(")")]
+            if geo_type == "Point":
+                coordinates_part = coordinates_part.replace(" ", "%20")
+                params["OData.CSC.Intersects"] = (
+                    f"(area=geography'SRID=4326;POINT({coordinates_part})')"
+                )
+            elif geo_type == "Polygon":
+                params["OData.CSC.Intersects"] = (
+                    f"(area=geography'SRID=4326;POLYGON({coordinates_part}))')"
+                )
+        if "collection" in gdf_row and not pd.isna(gdf_row["collection"]):
+            params["Collection/Name eq"] = f" '{gdf_row['collection']}'"
+        if "producttype" in gdf_row and not pd.isna(gdf_row["producttype"]):
+            params[
+                "Attributes/OData.CSC.StringAttribute/any(att:att/Name eq 'productType' and att/OData.CSC.StringAttribute/Value eq"
+            ] = f" '{gdf_row['producttype']}')"
+        if "start_datetime" in gdf_row and not pd.isna(gdf_row["start_datetime"]):
+            start_dt = gdf_row["start_datetime"].strftime("%Y-%m-%dT%H:%M:%S.000Z")
+            params["ContentDate/Start gt"] = f" {start_dt}"
+        if "end_datetime" in gdf_row and not pd.isna(gdf_row["end_datetime"]):
+            end_dt = gdf_row["end_datetime"].strftime("%Y-%m-%dT%H:%M:%S.000Z")
+            params["ContentDate/Start lt"] = f" {end_dt}"
+        str_query = " and ".join([f"{key}{val}" for key, val in params.items()])
+        urls.append((enter_index, f"{urlapi}{str_query}&$top={top}&$expand=Attributes"))
+    return urls
+
+
+def buoy_like_gdf(nb_rows, seed=0):
+    """
+    Arguments:
+        nb_rows (int): number of point/time rows
+
+    Returns:
+        (gpd.GeoDataFrame): normalised query GeoDataFrame
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2020-01-01", tz="UTC") + pd.to_timedelta(
+        rng.integers(0, 5 * 365 * 86400, nb_rows), unit="s"
+    )
+    return gpd.GeoDataFrame(
+        {
+            "start_datetime": start,
+            "end_datetime": start + pd.Timedelta(hours=3),
+            "geometry": shapely.points(
+                rng.uniform(-180, 180, nb_rows).round(4),
+                rng.uniform(-80, 80, nb_rows).round(4),
+            ),
+            "collection": "SENTINEL-1",
+            "producttype": np.where(rng.random(nb_rows) < 0.5, "GRD", None),
+            "id_original_query": [f"buoy{i % 1000}" for i in range(nb_rows)],
+        },
+        crs="EPSG:4326",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark of create_urls()")
+    parser.add_argument("--nb-rows", type=int, default=500000)
+    parser.add_argument(
+        "--reference-rows",
+        type=int,
+        default=None,
+        help="rows given to the former row by row builder [default: all]",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    gdf = buoy_like_gdf(args.nb_rows)
+    t0 = time.time()
+    urls = qr.create_urls(gdf)["urls"]
+    elapsed = time.time() - t0
+    print(f"create_urls (column-wise): {args.nb_rows} rows in {elapsed:.2f} s")
+
+    nb_reference = args.nb_rows if args.reference_rows is None else args.reference_rows
+    t0 = time.time()
+    reference = create_urls_per_row(gdf.iloc[:nb_reference])
+    elapsed_reference = time.time() - t0
+    print(
+        f"former row by row builder: {nb_reference} rows in {elapsed_reference:.2f} s"
+    )
+    assert urls[:nb_reference] == reference, "URLs differ from the former builder"
+    print(
+        f"identical URLs, speed-up: "
+        f"{elapsed_reference / nb_reference / (elapsed / args.nb_rows):.0f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+benchmark of fetch_data() on a global sweep returning millions of products: wall time
+and peak memory of the result accumulation, the OData answers being replayed from
+memory instead of being requested to CDSE (no network, no rate limiting).
+
+python benchmarks/benchmark_fetch_data_sweep.py --nb-products 2000000 --querymode multi
+"""
+
+import re
+import time
+import logging
+import argparse
+import resource
+import datetime
+from unittest.mock import patch, MagicMock
+import geopandas as gpd
+import cdsodatacli.query as qr
+from cdsodatacli.cache import url_time_window
+
+
+class ReplayedAnswers:
+    """
+    OData answers of a sweep: `nb_per_window` products per time window, served page by page
+    like CDSE does for $top/$skip.
+
+    Arguments:
+        nb_per_window (int): number of products of each time window of the sweep
+    """
+
+    def __init__(self, nb_per_window):
+        self.nb_per_window = nb_per_window
+        self.nb_pages = 0
+
+    def __call__(self, url, headers=None, timeout=None, cpt=None):
+        start, _ = url_time_window(url)
+        top = int(re.search(r"\$top=(\d+)", url).group(1))
+        match_skip = re.search(r"\$skip=(\d+)", url)
+        skip = int(match_skip.group(1)) if match_skip else 0
+        self.nb_pages += 1
+        day = datetime.datetime.fromtimestamp(start, datetime.UTC)
+        return {
+            "value": [
+                self.product(day, iprod)
+                for iprod in range(skip, min(skip + top, self.nb_per_window))
+            ]
+        }
+
+    @staticmethod
+    def product(day, iprod):
+        date = day + datetime.timedelta(seconds=iprod * 86400 // 6000)
+        stamp = date.strftime("%Y%m%dT%H%M%S")
+        lon = iprod % 360 - 180
+        lat = iprod % 160 - 80
+        return {
+            "Id": f"{stamp}-{iprod:06d}",
+            "Name": f"S1A_IW_GRDH_1SDV_{stamp}_{stamp}_043042_0523E6_{iprod:04X}.SAFE",
+            "ContentLength": 1687542356,
+            "ModificationDate": date.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "S3Path": f"/eodata/Sentinel-1/SAR/IW_GRDH_1S/{date:%Y/%m/%d}/{stamp}.SAFE",
+            "ContentDate": {"Start": date.strftime("%Y-%m-%dT%H:%M:%S.000Z")},
+            "Footprint": f"geography'SRID=4326;POLYGON (({lon} {lat}, {lon + 1} {lat}, "
+            f"{lon + 1} {lat + 1}, {lon} {lat + 1}, {lon} {lat}))'",
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark of a fetch_data() sweep")
+    parser.add_argument("--nb-products", type=int, default=2000000)
+    parser.add_argument("--nb-days", type=int, default=365)
+    parser.add_argument("--querymode", choices=["seq", "multi"], default="multi")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    replay = ReplayedAnswers(args.nb_products // args.nb_days)
+    start = datetime.datetime(2023, 1, 1)
+    gdf = gpd.GeoDataFrame(
+        {
+            "start_datetime": [start],
+            "end_datetime": [start + datetime.timedelta(days=args.nb_days)],
+            "geometry": [None],
+            "collection": ["SENTINEL-1"],
+            "name": [None],
+            "sensormode": [None],
+            "producttype": [None],
+            "Attributes": [None],
+            "id_query": ["sweep"],
+        }
+    )
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.time()
+    with (
+        patch("cdsodatacli.query._fetch_with_retry", side_effect=replay),
+        patch("cdsodatacli.query._GLOBAL_RATE_LIMITER", MagicMock()),
+    ):
+        result = qr.fetch_data(
+            gdf,
+            timedelta_slice=datetime.timedelta(days=1),
+            querymode=args.querymode,
+            paginate=True,
+        )
+    elapsed = time.time() - t0
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(
+        f"querymode={args.querymode}: {len(result)} products, {replay.nb_pages} pages, "
+        f"{elapsed:.1f} s ({len(result) / elapsed:.0f} products/s), "
+        f"peak RSS {rss_peak / 1024:.0f} Mo (+{(rss_peak - rss_before) / 1024:.0f} Mo)"
+    )
+
+
+if __name__ == "__main__":
+    main()
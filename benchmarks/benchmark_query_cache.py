@@ -0,0 +1,144 @@
+"""
+benchmark of the cache of OData answers: time to store (cold cache) and to read back
+and convert to DataFrame (warm cache) N synthetic answers, for each compression
+and for the former one-JSON-file-per-URL cache.
+
+python benchmarks/benchmark_query_cache.py --nb-answers 10000
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from collections import defaultdict
+import cdsodatacli.query as qr
+from cdsodatacli.cache import get_query_cache, zstandard, orjson
+
+
+def synthetic_answer(iurl, nb_products):
+    """
+    Arguments:
+        iurl (int): index of the answer
+        nb_products (int): number of products in the answer
+
+    Returns:
+        (dict): OData answer looking like a $expand=Attributes one
+    """
+    products = []
+    for iprod in range(nb_products):
+        name = f"S1A_IW_GRDH_1SDV_20220503T{iurl % 24:02d}{iprod % 60:02d}00_20220503T000025_043042_0523E6_{iprod:04X}.SAFE"
+        products.append(
+            {
+                "@odata.mediaContentType": "application/octet-stream",
+                "Id": f"{iurl:08d}-0000-4000-8000-{iprod:012d}",
+                "Name": name,
+                "ContentType": "application/octet-stream",
+                "ContentLength": 1687542356,
+                "OriginDate": "2022-05-03T01:17:26.000Z",
+                "PublicationDate": "2022-05-03T01:39:09.354Z",
+                "ModificationDate": "2022-05-03T01:39:27.079Z",
+                "Online": True,
+                "S3Path": f"/eodata/Sentinel-1/SAR/IW_GRDH_1S/2022/05/03/{name}",
+                "Checksum": [
+                    {"Value": "2b0d2e0c3b5c4b6d", "Algorithm": "MD5"},
+                ],
+                "ContentDate": {
+                    "Start": "2022-05-03T00:00:00.000Z",
+                    "End": "2022-05-03T00:00:25.000Z",
+                },
+                "Footprint": "geography'SRID=4326;POLYGON ((-5.1 48.2, -1.9 48.6, -1.5 47.0, -4.6 46.6, -5.1 48.2))'",
+                "Attributes": [
+                    {
+                        "@odata.type": "#OData.CSC.StringAttribute",
+                        "Name": attr,
+                        "Value": f"value-{attr}",
+                        "ValueType": "String",
+                    }
+                    for attr in (
+                        "origin",
+                        "orbitDirection",
+                        "productClass",
+                        "productType",
+                        "operationalMode",
+                        "polarisationChannels",
+                        "platformShortName",
+                        "instrumentShortName",
+                        "swathIdentifier",
+                        "timeliness",
+                    )
+                ],
+            }
+        )
+    return {"@odata.context": "$metadata#Products(Attributes())", "value": products}
+
+
+def bench_legacy(urls, answers, cache_dir):
+    t0 = time.perf_counter()
+    for url, answer in zip(urls, answers):
+        with open(qr.get_cache_filename(url, cache_dir), "w") as f:
+            json.dump(answer, f)
+    cold = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for url in urls:
+        with open(qr.get_cache_filename(url, cache_dir), "r") as f:
+            qr.process_data(json.load(f))
+    warm = time.perf_counter() - t0
+    size = sum(
+        os.path.getsize(os.path.join(cache_dir, ff)) for ff in os.listdir(cache_dir)
+    )
+    return cold, warm, size
+
+
+def bench_sqlite(urls, answers, cache_dir, compression):
+    get_query_cache(cache_dir, compression=compression)
+    cpt = defaultdict(int)
+    t0 = time.perf_counter()
+    for url, answer in zip(urls, answers):
+        qr.write_cache(url, answer, cache_dir)
+    cold = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for url in urls:
+        qr.process_data(qr.read_cache(url, cpt, cache_dir))
+    warm = time.perf_counter() - t0
+    cache = get_query_cache(cache_dir)
+    size = cache.stats()["bytes"]
+    cache.close()
+    return cold, warm, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark of the OData cache")
+    parser.add_argument("--nb-answers", type=int, default=10000)
+    parser.add_argument("--nb-products", type=int, default=20)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    urls = [
+        f"https://catalogue.dataspace.copernicus.eu/odata/v1/Products?$filter=test{i}&$top=1000&$expand=Attributes"
+        for i in range(args.nb_answers)
+    ]
+    answers = [synthetic_answer(i, args.nb_products) for i in range(args.nb_answers)]
+    print(
+        f"{args.nb_answers} answers of {args.nb_products} products, "
+        f"orjson: {orjson is not None}, zstandard: {zstandard is not None}"
+    )
+    print(f"{'backend':<20}{'cold (s)':>10}{'warm (s)':>10}{'size (Mo)':>12}")
+    backends = ["legacy json files", "none", "gzip"]
+    if zstandard is not None:
+        backends.append("zstd")
+    for backend in backends:
+        cache_dir = tempfile.mkdtemp(prefix="cdsodatacli_bench_")
+        try:
+            if backend == "legacy json files":
+                cold, warm, size = bench_legacy(urls, answers, cache_dir)
+            else:
+                cold, warm, size = bench_sqlite(urls, answers, cache_dir, backend)
+        finally:
+            shutil.rmtree(cache_dir)
+        print(f"{backend:<20}{cold:>10.2f}{warm:>10.2f}{size / 1024**2:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
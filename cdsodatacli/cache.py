@@ -0,0 +1,955 @@
+"""
+cache of the OData answers: one SQLite file per cache directory, indexed on the URL hash,
+with LRU eviction (number of entries and/or size on disk) and hit/miss statistics.
+Entries carry the time window of their query and their fetch time, so that a freshness
+policy can expire the answers about recent periods, still subject to new or reprocessed products.
+Complete answers are also stored by normalised query (filters, geometry and time window), so that
+a query on a sub-window or a smaller area is answered by filtering a cached superset locally.
+Payloads are compressed (gzip, or zstd if zstandard is installed) and decoded with orjson when available.
+"""
+
+import os
+import re
+import atexit
+import glob
+import gzip
+import json
+import time
+import sqlite3
+import hashlib
+import collections
+import logging
+import argparse
+import datetime
+import threading
+import contextlib
+from urllib.parse import unquote
+from shapely import wkt
+from shapely.errors import ShapelyError
+
+try:
+    import orjson
+except ImportError:  # optional dependency, faster JSON encoding/decoding
+    orjson = None
+try:
+    import zstandard
+except ImportError:  # optional dependency, needed by compression="zstd"
+    zstandard = None
+
+CACHE_DB_NAME = "odata_cache.sqlite"
+SQLITE_TIMEOUT = 60  # sec, wait for the lock of another process writing in the cache
+ACCESS_FLUSH_EVERY = 500  # hits/misses and access times are written every N get()
+COMPRESSIONS = ["none", "gzip", "zstd"]
+DEFAULT_COMPRESSION = "gzip"
+GZIP_LEVEL = 3  # OData answers are very redundant, higher levels barely reduce more
+ZSTD_LEVEL = 3
+DEFAULT_IMMUTABLE_AFTER_DAYS = (
+    30  # CDSE reprocessings and late publications are rare after a month
+)
+DEFAULT_RECENT_TTL_HOURS = 6
+ODATA_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+# ISO-8601 forms returned by the catalogue: with or without fraction of second (any
+# number of digits), "Z" or numeric offset
+ISO_DATE_PATTERN = re.compile(
+    r"^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.(\d+))?(Z|[+-]\d{2}:?\d{2})?$"
+)
+# clauses of the $filter built by cdsodatacli.query.create_urls(), field of the normalised query -> regex
+QUERY_FILTER_CLAUSES = {
+    "collection": r"Collection/Name eq '([^']*)'",
+    "name": r"contains\(Name,'([^']*)'\)",
+    "sensormode": r"Attributes/OData\.CSC\.StringAttribute/any\(att:att/Name eq 'operationalMode' "
+    r"and att/OData\.CSC\.StringAttribute/Value eq '([^']*)'\)",
+    "producttype": r"Attributes/OData\.CSC\.StringAttribute/any\(att:att/Name eq 'productType' "
+    r"and att/OData\.CSC\.StringAttribute/Value eq '([^']*)'\)",
+    "attributes": r"Attributes/OData\.CSC\.DoubleAttribute/any\(att:att/Name eq '([^']*)' "
+    r"and att/OData\.CSC\.DoubleAttribute/Value le ([^)]*)\)",
+    "geometry": r"OData\.CSC\.Intersects\(area=geography'SRID=4326;([^']*)'\)",
+    "start": r"ContentDate/Start (gt|ge) (\S+?Z)",
+    "end": r"ContentDate/Start lt (\S+?Z)",
+}
+# an inclusive lower bound `ge t` is stored as the exclusive bound t - 0.5 µs (sec),
+# the dates of CDSE having a microsecond resolution at most
+INCLUSIVE_BOUND_SHIFT = 0.5e-6
+QUERY_SIGNATURE_FIELDS = [
+    "collection",
+    "name",
+    "sensormode",
+    "producttype",
+    "attributes",
+    "expand",
+]
+
+_caches = {}  # absolute path of the cache directory -> QueryCache
+_caches_lock = threading.Lock()  # protect concurrent access from threads
+
+logger = logging.getLogger(__name__)
+
+
+def url_hash(url):
+    """
+    Arguments:
+        url (str): OData URL
+
+    Returns:
+        (str): MD5 hex digest of the URL, key of the cache
+    """
+    return hashlib.md5(url.encode("utf-8")).hexdigest()
+
+
+def odata_date_to_epoch(date):
+    """
+    Arguments:
+        date (str): OData date, e.g. 2022-05-03T00:00:00.000Z, 2022-05-03T00:00:00Z
+            or 2022-05-03T00:00:00.123456+00:00 (no offset means UTC)
+
+    Returns:
+        (float): epoch seconds
+
+    Raises:
+        ValueError: if the date is not in one of these ISO-8601 forms
+    """
+    match = ISO_DATE_PATTERN.match(date.strip())
+    if match is None:
+        raise ValueError(f"not an ISO-8601 date: {date}")
+    seconds, fraction, offset = match.groups()
+    timezone = datetime.timezone.utc
+    if offset not in (None, "Z"):
+        offset = offset.replace(":", "")
+        delta = datetime.timedelta(hours=int(offset[1:3]), minutes=int(offset[3:5]))
+        timezone = datetime.timezone(-delta if offset[0] == "-" else delta)
+    date = datetime.datetime.strptime(seconds, "%Y-%m-%dT%H:%M:%S")
+    epoch = date.replace(tzinfo=timezone).timestamp()
+    return epoch + (float("0." + fraction) if fraction else 0.0)
+
+
+def start_bound_to_epoch(operator, date):
+    """
+    Arguments:
+        operator (str): comparison of the ContentDate/Start lower bound, 'gt' or 'ge'
+        date (str): OData date of the bound
+
+    Returns:
+        (float): exclusive lower bound (epoch seconds), see INCLUSIVE_BOUND_SHIFT
+    """
+    epoch = odata_date_to_epoch(date)
+    if operator == "ge":
+        epoch -= INCLUSIVE_BOUND_SHIFT
+    return epoch
+
+
+def url_time_window(url):
+    """
+    Arguments:
+        url (str): OData URL, possibly percent-encoded (@odata.nextLink)
+
+    Returns:
+        (tuple): start (exclusive) and end (float, epoch seconds) of the
+            ContentDate/Start filter, None for a bound which is not in the URL
+    """
+    url = unquote(url)
+    start = re.search(QUERY_FILTER_CLAUSES["start"], url)
+    end = re.search(QUERY_FILTER_CLAUSES["end"], url)
+    return (
+        start_bound_to_epoch(*start.groups()) if start else None,
+        odata_date_to_epoch(end.group(1)) if end else None,
+    )
+
+
+def normalize_query_url(url):
+    """
+    Parse a data URL built by cdsodatacli.query.create_urls() into a normalised query,
+    independent of the order of the filter clauses, of $top and of $orderby.
+
+    Arguments:
+        url (str): OData URL, possibly percent-encoded
+
+    Returns:
+        query (dict): with keys 'signature' (MD5 of the filters other than geometry and time),
+            'geometry' (shapely geometry, None -> whole Earth), 'start' and 'end' (float,
+            epoch seconds, exclusive bounds, None -> unbounded) and 'top' (int, None if absent).
+            None if the URL contains clauses not understood ($count, $skip, unknown filters)
+    """
+    url = unquote(url)
+    if "$filter=" not in url:
+        return None
+    filter_part, _, options_part = url.split("$filter=", 1)[1].partition("&")
+    options = dict(
+        option.split("=", 1) for option in options_part.split("&") if "=" in option
+    )
+    if "$count" in options or "$skip" in options:
+        return None
+    query = {
+        "expand": options.get("$expand"),
+        "select": options.get("$select"),
+        "top": None,
+    }
+    if "$top" in options:
+        query["top"] = int(options["$top"])
+    remainder = filter_part
+    for field, pattern in QUERY_FILTER_CLAUSES.items():
+        match = re.search(pattern, remainder)
+        if match is None:
+            query[field] = None
+            continue
+        query[field] = match.group(1) if len(match.groups()) == 1 else match.groups()
+        remainder = remainder[: match.start()] + remainder[match.end() :]
+    if remainder.replace(" and ", " ").strip() != "":
+        logger.debug("filter not understood for semantic cache: %s", remainder)
+        return None
+    try:
+        if query["geometry"] is not None:
+            query["geometry"] = wkt.loads(query["geometry"])
+        if query["start"] is not None:
+            query["start"] = start_bound_to_epoch(*query["start"])
+        if query["end"] is not None:
+            query["end"] = odata_date_to_epoch(query["end"])
+    except (ShapelyError, ValueError):
+        return None
+    signature = [query[field] for field in QUERY_SIGNATURE_FIELDS]
+    if query["select"] is not None:
+        # an answer restricted to some properties cannot answer another projection
+        signature.append(query["select"])
+    query["signature"] = hashlib.md5(json.dumps(signature).encode("utf-8")).hexdigest()
+    return query
+
+
+def filter_products(products, query):
+    """
+    Keep the products of a cached answer matching the time window and the area of a query,
+    the way CDSE does: ContentDate/Start strictly inside the window and footprint intersecting the area.
+    A product without date (resp. footprint) cannot match a time window (resp. an area).
+
+    Arguments:
+        products (list): products (dict) of an OData answer
+        query (dict): normalised query, see normalize_query_url()
+
+    Returns:
+        (list): matching products, None if a date or a footprint cannot be parsed
+            (the answer of the query cannot be derived exactly from the cached one)
+    """
+    kept = []
+    for product in products:
+        if query["start"] is not None or query["end"] is not None:
+            start = (product.get("ContentDate") or {}).get("Start")
+            if start is None:
+                continue
+            try:
+                start = odata_date_to_epoch(start)
+            except (TypeError, AttributeError, ValueError):
+                logger.debug("date not understood for semantic cache: %s", start)
+                return None
+            if query["start"] is not None and start <= query["start"]:
+                continue
+            if query["end"] is not None and start >= query["end"]:
+                continue
+        if query["geometry"] is not None:
+            if product.get("Footprint") is None:
+                continue
+            try:
+                footprint = wkt.loads(product["Footprint"].split(";", 1)[1].rstrip("'"))
+            except (ShapelyError, IndexError, AttributeError):
+                logger.debug(
+                    "footprint not understood for semantic cache: %s",
+                    product["Footprint"],
+                )
+                return None
+            if not footprint.intersects(query["geometry"]):
+                continue
+        kept.append(product)
+    return kept
+
+
+class CacheFreshnessPolicy:
+    """
+    Decide whether a cached answer can still be used, from the end of its query window
+    and from the time it was fetched.
+    An answer is immutable if its window was already older than `immutable_after_days`
+    when it was fetched: CDSE does not publish new products for that period anymore.
+    Other answers (recent or open-ended window, unknown window) expire `recent_ttl_hours`
+    after they were fetched.
+
+    Arguments:
+        immutable_after_days (float): age of a window end above which answers never expire [optional, default=30]
+        recent_ttl_hours (float): lifetime of the answers about recent windows [optional, default=6]
+    """
+
+    def __init__(
+        self,
+        immutable_after_days=DEFAULT_IMMUTABLE_AFTER_DAYS,
+        recent_ttl_hours=DEFAULT_RECENT_TTL_HOURS,
+    ):
+        self.immutable_after = immutable_after_days * 86400
+        self.recent_ttl = recent_ttl_hours * 3600
+
+    def __repr__(self):
+        return (
+            f"CacheFreshnessPolicy(immutable_after_days={self.immutable_after / 86400:g}, "
+            f"recent_ttl_hours={self.recent_ttl / 3600:g})"
+        )
+
+    def is_fresh(self, window_end, fetched_at, now=None):
+        """
+        Arguments:
+            window_end (float): end of the query window (epoch seconds), None if unknown or open-ended
+            fetched_at (float): time the answer was fetched from CDSE (epoch seconds)
+            now (float): [optional, default=None -> time.time()]
+
+        Returns:
+            (bool): True if the answer can be used
+        """
+        if window_end is not None and window_end < fetched_at - self.immutable_after:
+            return True
+        if now is None:
+            now = time.time()
+        return now - fetched_at < self.recent_ttl
+
+
+def encode_payload(json_data, compression=DEFAULT_COMPRESSION):
+    """
+    Arguments:
+        json_data (dict): answer of the OData API
+        compression (str): 'none', 'gzip' or 'zstd'
+
+    Returns:
+        payload (bytes): serialized and compressed answer
+    """
+    if orjson is not None:
+        payload = orjson.dumps(json_data)
+    else:
+        payload = json.dumps(json_data).encode("utf-8")
+    if compression == "gzip":
+        payload = gzip.compress(payload, compresslevel=GZIP_LEVEL, mtime=0)
+    elif compression == "zstd":
+        if zstandard is None:
+            raise ImportError("compression='zstd' requires zstandard")
+        payload = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+    elif compression != "none":
+        raise ValueError(f"unknown compression {compression}, choose in {COMPRESSIONS}")
+    return payload
+
+
+def decode_payload(payload, compression):
+    """
+    Arguments:
+        payload (bytes): serialized and compressed answer
+        compression (str): 'none', 'gzip' or 'zstd' (None for entries stored before compression support)
+
+    Returns:
+        json_data (dict): answer of the OData API
+    """
+    if compression == "gzip":
+        payload = gzip.decompress(payload)
+    elif compression == "zstd":
+        if zstandard is None:
+            raise ImportError("reading zstd cache entries requires zstandard")
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+class QueryCache:
+    """
+    SQLite store of the OData answers (JSON payloads) indexed on the MD5 of the URL.
+
+    Arguments:
+        cache_dir (str): directory of the cache, created if needed
+        max_entries (int): maximum number of answers kept, URL answers and complete query answers together [optional, default=None -> no limit]
+        max_bytes (int): maximum size of the stored payloads, both tables included [optional, default=None -> no limit]
+        compression (str): 'none', 'gzip' or 'zstd', used for new answers [optional, default='gzip']
+        freshness (CacheFreshnessPolicy): expiration of the answers about recent periods [optional, default=None -> answers never expire]
+    """
+
+    def __init__(
+        self,
+        cache_dir,
+        max_entries=None,
+        max_bytes=None,
+        compression=DEFAULT_COMPRESSION,
+        freshness=None,
+    ):
+        if compression not in COMPRESSIONS:
+            raise ValueError(
+                f"unknown compression {compression}, choose in {COMPRESSIONS}"
+            )
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.path = os.path.join(cache_dir, CACHE_DB_NAME)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self.freshness = freshness
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._pending_access = {}  # url_hash -> [last_access, nb hits] not yet written
+        self._pending_query_access = (
+            {}
+        )  # rowid of queries -> last_access not yet written
+        self._pending_counters = collections.Counter()
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            self.path, timeout=SQLITE_TIMEOUT, check_same_thread=False
+        )
+        with self.lock, self.conn:
+            # the cache is re-built from the API if the last transactions are lost
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "url_hash TEXT PRIMARY KEY, url TEXT, payload BLOB, size INTEGER, "
+                "created REAL, last_access REAL, hits INTEGER DEFAULT 0, codec TEXT, "
+                "window_start REAL, window_end REAL)"
+            )
+            columns = [
+                column[1] for column in self.conn.execute("PRAGMA table_info(entries)")
+            ]
+            # caches created before compression support / freshness policy
+            for column, column_type in (
+                ("codec", "TEXT"),
+                ("window_start", "REAL"),
+                ("window_end", "REAL"),
+            ):
+                if column not in columns:
+                    self.conn.execute(
+                        f"ALTER TABLE entries ADD COLUMN {column} {column_type}"
+                    )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_entries_last_access "
+                "ON entries(last_access)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)"
+            )
+            # complete answers by normalised query, geometry as WKT (NULL -> whole Earth)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS queries ("
+                "signature TEXT, geometry TEXT, window_start REAL, window_end REAL, "
+                "payload BLOB, size INTEGER, nb_products INTEGER, created REAL, codec TEXT, "
+                "last_access REAL)"
+            )
+            columns = [
+                column[1] for column in self.conn.execute("PRAGMA table_info(queries)")
+            ]
+            if "last_access" not in columns:  # caches created before LRU of queries
+                self.conn.execute("ALTER TABLE queries ADD COLUMN last_access REAL")
+                self.conn.execute("UPDATE queries SET last_access = created")
+            self.conn.execute("DROP INDEX IF EXISTS idx_queries_signature")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_queries_window "
+                "ON queries(signature, window_start, window_end)"
+            )
+
+    def _flush_access(self):
+        """
+        write the buffered access times and hit/miss counters, to call within the lock
+        """
+        if (
+            not self._pending_access
+            and not self._pending_query_access
+            and not self._pending_counters
+        ):
+            return
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE entries SET last_access = ?, hits = hits + ? WHERE url_hash = ?",
+                [
+                    (last_access, nb_hits, key)
+                    for key, (last_access, nb_hits) in self._pending_access.items()
+                ],
+            )
+            self.conn.executemany(
+                "UPDATE queries SET last_access = ? WHERE rowid = ?",
+                [
+                    (last_access, rowid)
+                    for rowid, last_access in self._pending_query_access.items()
+                ],
+            )
+            self.conn.executemany(
+                "INSERT INTO counters(name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                list(self._pending_counters.items()),
+            )
+        self._pending_access.clear()
+        self._pending_query_access.clear()
+        self._pending_counters.clear()
+
+    def flush(self):
+        """
+        Write the access times and hit/miss counters buffered by get().
+        """
+        with self.lock:
+            self._flush_access()
+
+    def get(self, url):
+        """
+        Arguments:
+            url (str): OData URL
+
+        Returns:
+            json_data (dict): cached answer, None if the URL is not in the cache or if the answer expired
+        """
+        key = url_hash(url)
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT payload, codec, created, window_end FROM entries WHERE url_hash = ?",
+                (key,),
+            ).fetchone()
+            if (
+                row is not None
+                and self.freshness is not None
+                and not self.freshness.is_fresh(window_end=row[3], fetched_at=row[2])
+            ):
+                logger.debug("cached answer expired for %s", url)
+                self.expired += 1
+                self._pending_counters["expired"] += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                self._pending_counters["misses"] += 1
+            else:
+                self.hits += 1
+                self._pending_counters["hits"] += 1
+                access = self._pending_access.setdefault(key, [0.0, 0])
+                access[0] = time.time()
+                access[1] += 1
+            if sum(self._pending_counters.values()) >= ACCESS_FLUSH_EVERY:
+                self._flush_access()
+        if row is None:
+            return None
+        return decode_payload(row[0], row[1])
+
+    def is_fresh(self, url, fetched_at):
+        """
+        Arguments:
+            url (str): OData URL
+            fetched_at (float): time the answer was fetched from CDSE (epoch seconds)
+
+        Returns:
+            (bool): True if an answer of this URL fetched at this time can be used
+        """
+        if self.freshness is None:
+            return True
+        return self.freshness.is_fresh(
+            window_end=url_time_window(url)[1], fetched_at=fetched_at
+        )
+
+    @contextlib.contextmanager
+    def freshness_policy(self, freshness):
+        """
+        Use a freshness policy until the end of the with block, then restore the previous one.
+
+        Arguments:
+            freshness (CacheFreshnessPolicy): expiration of the answers, None -> answers never expire
+        """
+        previous = self.freshness
+        self.freshness = freshness
+        try:
+            yield self
+        finally:
+            self.freshness = previous
+
+    def put(self, url, json_data, fetched_at=None):
+        """
+        Store an answer, then evict the least recently used ones if the cache is over its limits.
+
+        Arguments:
+            url (str): OData URL, its ContentDate/Start filter gives the query window of the entry
+            json_data (dict): answer of the OData API
+            fetched_at (float): time the answer was fetched from CDSE [optional, default=None -> now]
+        """
+        payload = encode_payload(json_data, compression=self.compression)
+        now = time.time()
+        if fetched_at is None:
+            fetched_at = now
+        window_start, window_end = url_time_window(url)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries"
+                "(url_hash, url, payload, size, created, last_access, hits, codec, "
+                "window_start, window_end) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?, ?)",
+                (
+                    url_hash(url),
+                    url,
+                    payload,
+                    len(payload),
+                    fetched_at,
+                    now,
+                    self.compression,
+                    window_start,
+                    window_end,
+                ),
+            )
+            if self.max_entries is not None or self.max_bytes is not None:
+                self._flush_access()  # LRU order needs the last access times
+                self._evict(max_entries=self.max_entries, max_bytes=self.max_bytes)
+
+    def put_query(self, query, products, fetched_at=None):
+        """
+        Store the complete answer of a normalised query (all the products matching it, not a truncated answer).
+
+        Arguments:
+            query (dict): normalised query, see normalize_query_url()
+            products (list): products (dict) of the answer
+            fetched_at (float): time the answer was fetched from CDSE [optional, default=None -> now]
+        """
+        payload = encode_payload({"value": products}, compression=self.compression)
+        now = time.time()
+        if fetched_at is None:
+            fetched_at = now
+        geometry = query["geometry"].wkt if query["geometry"] is not None else None
+        with self.lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM queries WHERE signature = ? AND geometry IS ? "
+                "AND window_start IS ? AND window_end IS ?",
+                (query["signature"], geometry, query["start"], query["end"]),
+            )
+            self.conn.execute(
+                "INSERT INTO queries(signature, geometry, window_start, "
+                "window_end, payload, size, nb_products, created, codec, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    query["signature"],
+                    geometry,
+                    query["start"],
+                    query["end"],
+                    payload,
+                    len(payload),
+                    len(products),
+                    fetched_at,
+                    self.compression,
+                    now,
+                ),
+            )
+            if self.max_entries is not None or self.max_bytes is not None:
+                self._flush_access()
+                self._evict(max_entries=self.max_entries, max_bytes=self.max_bytes)
+
+    def find_query(self, query):
+        """
+        Answer a normalised query from a cached complete answer of a query with the same filters,
+        a time window and an area containing those of the query.
+
+        Arguments:
+            query (dict): normalised query, see normalize_query_url()
+
+        Returns:
+            products (list): products matching the query, None if no cached answer contains it
+        """
+        # the window bounds are checked by SQLite: a sweep stores many windows with
+        # the same signature, only the ones containing the query window are read
+        with self.lock:
+            candidates = self.conn.execute(
+                "SELECT rowid, geometry, window_end, created FROM queries "
+                "WHERE signature = ? "
+                "AND (window_start IS NULL OR window_start <= ?) "
+                "AND (window_end IS NULL OR window_end >= ?) "
+                "ORDER BY nb_products ASC",
+                (
+                    query["signature"],
+                    -float("inf") if query["start"] is None else query["start"],
+                    float("inf") if query["end"] is None else query["end"],
+                ),
+            ).fetchall()
+        for rowid, geometry, window_end, created in candidates:
+            if geometry is not None and (
+                query["geometry"] is None
+                or not wkt.loads(geometry).covers(query["geometry"])
+            ):
+                continue
+            end = query["end"] if query["end"] is not None else window_end
+            if self.freshness is not None and not self.freshness.is_fresh(
+                window_end=end, fetched_at=created
+            ):
+                continue
+            with self.lock:
+                row = self.conn.execute(
+                    "SELECT payload, codec FROM queries WHERE rowid = ?", (rowid,)
+                ).fetchone()
+            if row is None:  # evicted meanwhile by another thread
+                continue
+            products = filter_products(decode_payload(row[0], row[1])["value"], query)
+            if products is None:
+                continue
+            with self.lock:
+                self._pending_counters["query_hits"] += 1
+                self._pending_query_access[rowid] = time.time()
+            return products
+        return None
+
+    def _evict(self, max_entries=None, max_bytes=None, older_than=None, expired=False):
+        """
+        remove least recently used entries, to call within the lock and a transaction
+
+        Returns:
+            nb_removed (int)
+        """
+        nb_removed = 0
+        if expired and self.freshness is not None:
+            now = time.time()
+            for table in ("entries", "queries"):
+                nb_removed += self.conn.execute(
+                    f"DELETE FROM {table} WHERE created < ? AND "
+                    "(window_end IS NULL OR window_end >= created - ?)",
+                    (now - self.freshness.recent_ttl, self.freshness.immutable_after),
+                ).rowcount
+        if older_than is not None:
+            nb_removed += self.conn.execute(
+                "DELETE FROM entries WHERE last_access < ?", (older_than,)
+            ).rowcount
+            nb_removed += self.conn.execute(
+                "DELETE FROM queries WHERE last_access < ?", (older_than,)
+            ).rowcount
+        if max_entries is not None or max_bytes is not None:
+            # URL answers and complete query answers share the limits, in LRU order
+            nb_kept, total = self.conn.execute(
+                "SELECT (SELECT COUNT(*) FROM entries) + (SELECT COUNT(*) FROM queries), "
+                "(SELECT COALESCE(SUM(size), 0) FROM entries) "
+                "+ (SELECT COALESCE(SUM(size), 0) FROM queries)"
+            ).fetchone()
+            to_remove = ([], [])
+            if (max_entries is not None and nb_kept > max_entries) or (
+                max_bytes is not None and total > max_bytes
+            ):
+                for is_query, key, size, _ in self.conn.execute(
+                    "SELECT 0, url_hash, size, last_access FROM entries "
+                    "UNION ALL SELECT 1, rowid, size, last_access FROM queries "
+                    "ORDER BY 4 ASC"
+                ):
+                    if (max_entries is None or nb_kept <= max_entries) and (
+                        max_bytes is None or total <= max_bytes
+                    ):
+                        break
+                    to_remove[is_query].append((key,))
+                    nb_kept -= 1
+                    total -= size
+            self.conn.executemany(
+                "DELETE FROM entries WHERE url_hash = ?", to_remove[0]
+            )
+            self.conn.executemany("DELETE FROM queries WHERE rowid = ?", to_remove[1])
+            nb_removed += len(to_remove[0]) + len(to_remove[1])
+        if nb_removed > 0:
+            logger.debug("%s entries evicted from cache %s", nb_removed, self.path)
+        return nb_removed
+
+    def prune(
+        self, max_entries=None, max_bytes=None, older_than_days=None, expired=False
+    ):
+        """
+        Arguments:
+            max_entries (int): keep at most this number of answers [optional]
+            max_bytes (int): keep at most this size of payloads [optional]
+            older_than_days (float): remove answers not used since this number of days [optional]
+            expired (bool): remove the answers expired according to the freshness policy [optional]
+
+        Returns:
+            nb_removed (int): number of answers removed
+        """
+        older_than = None
+        if older_than_days is not None:
+            older_than = time.time() - older_than_days * 86400
+        with self.lock:
+            self._flush_access()
+        with self.lock, self.conn:
+            return self._evict(
+                max_entries=max_entries,
+                max_bytes=max_bytes,
+                older_than=older_than,
+                expired=expired,
+            )
+
+    def stats(self):
+        """
+        Returns:
+            (dict): with keys 'path', 'entries', 'queries', 'bytes', 'hits', 'misses', 'expired', 'query_hits' (all time) and
+                'session_hits', 'session_misses', 'session_expired' (this process)
+        """
+        with self.lock:
+            self._flush_access()
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            queries, queries_size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM queries"
+            ).fetchone()
+            counters = dict(
+                self.conn.execute("SELECT name, value FROM counters").fetchall()
+            )
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": size + queries_size,
+            "queries": queries,
+            "query_hits": counters.get("query_hits", 0),
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "expired": counters.get("expired", 0),
+            "session_hits": self.hits,
+            "session_misses": self.misses,
+            "session_expired": self.expired,
+        }
+
+    def vacuum(self):
+        """
+        Give back to the file system the space of removed answers.
+        """
+        with self.lock:
+            self.conn.execute("VACUUM")
+
+    def import_json_files(self, remove=False):
+        """
+        Import the answers of the former cache (one <md5 of url>.json file per URL).
+        The URL itself is unknown for those files, only its hash is stored.
+
+        Arguments:
+            remove (bool): True -> delete the .json files once imported
+
+        Returns:
+            nb_imported (int)
+        """
+        nb_imported = 0
+        for json_file in glob.glob(os.path.join(self.cache_dir, "*.json")):
+            key = os.path.basename(json_file)[: -len(".json")]
+            with open(json_file, "rb") as f:
+                payload = f.read()
+            now = time.time()
+            with self.lock, self.conn:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO entries"
+                    "(url_hash, url, payload, size, created, last_access, hits, codec) "
+                    "VALUES (?, NULL, ?, ?, ?, ?, 0, 'none')",
+                    (key, payload, len(payload), os.path.getmtime(json_file), now),
+                )
+            nb_imported += 1
+            if remove:
+                os.remove(json_file)
+        logger.info("%s json files imported in %s", nb_imported, self.path)
+        return nb_imported
+
+    def close(self):
+        with _caches_lock:
+            if _caches.get(os.path.abspath(self.cache_dir)) is self:
+                del _caches[os.path.abspath(self.cache_dir)]
+        with self.lock:
+            self._flush_access()
+            self.conn.close()
+
+
+def get_query_cache(
+    cache_dir, max_entries=None, max_bytes=None, compression=None, freshness=None
+):
+    """
+    Get the cache of a directory, shared by all the threads of the process.
+
+    Arguments:
+        cache_dir (str): directory of the cache
+        max_entries (int): if not None, set the maximum number of answers kept [optional]
+        max_bytes (int): if not None, set the maximum size of the payloads kept [optional]
+        compression (str): if not None, set the compression of new answers: 'none', 'gzip' or 'zstd' [optional]
+        freshness (CacheFreshnessPolicy): if not None, set the expiration policy of the answers [optional]
+
+    Returns:
+        cache (QueryCache)
+    """
+    path = os.path.abspath(cache_dir)
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = QueryCache(path)
+        cache = _caches[path]
+    if max_entries is not None:
+        cache.max_entries = max_entries
+    if max_bytes is not None:
+        cache.max_bytes = max_bytes
+    if compression is not None:
+        if compression not in COMPRESSIONS:
+            raise ValueError(
+                f"unknown compression {compression}, choose in {COMPRESSIONS}"
+            )
+        cache.compression = compression
+    if freshness is not None:
+        cache.freshness = freshness
+    return cache
+
+
+@atexit.register
+def _flush_query_caches():
+    """write the buffered access times of the caches still open at exit"""
+    with _caches_lock:
+        caches = list(_caches.values())
+    for cache in caches:
+        cache.flush()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="maintenance of the cdsodatacli cache of OData answers"
+    )
+    parser.add_argument("--verbose", action="store_true", default=False)
+    parser.add_argument(
+        "--cache-dir", required=True, help="cache directory given to queryCDS"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="number of answers, size, hits and misses")
+    prune = subparsers.add_parser("prune", help="remove least recently used answers")
+    prune.add_argument("--max-entries", type=int, default=None)
+    prune.add_argument("--max-mb", type=float, default=None)
+    prune.add_argument("--older-than-days", type=float, default=None)
+    prune.add_argument(
+        "--expired",
+        action="store_true",
+        help="remove answers about recent periods fetched more than --ttl-hours ago",
+    )
+    prune.add_argument(
+        "--immutable-after-days", type=float, default=DEFAULT_IMMUTABLE_AFTER_DAYS
+    )
+    prune.add_argument("--ttl-hours", type=float, default=DEFAULT_RECENT_TTL_HOURS)
+    subparsers.add_parser("vacuum", help="give back the space of removed answers")
+    import_json = subparsers.add_parser(
+        "import-json", help="import the .json files of the former cache"
+    )
+    import_json.add_argument(
+        "--remove", action="store_true", help="delete .json files once imported"
+    )
+    args = parser.parse_args()
+    fmt = "%(asctime)s %(levelname)s %(filename)s(%(lineno)d) %(message)s"
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format=fmt,
+        datefmt="%d/%m/%Y %H:%M:%S",
+    )
+    return args
+
+
+def main():
+    args = parse_args()
+    cache = get_query_cache(args.cache_dir)
+    if args.command == "prune":
+        cache.freshness = CacheFreshnessPolicy(
+            immutable_after_days=args.immutable_after_days,
+            recent_ttl_hours=args.ttl_hours,
+        )
+        nb_removed = cache.prune(
+            max_entries=args.max_entries,
+            max_bytes=int(args.max_mb * 1024**2) if args.max_mb is not None else None,
+            older_than_days=args.older_than_days,
+            expired=args.expired,
+        )
+        logger.info("%s answers removed", nb_removed)
+    elif args.command == "vacuum":
+        cache.vacuum()
+    elif args.command == "import-json":
+        cache.import_json_files(remove=args.remove)
+    stats = cache.stats()
+    logger.info(
+        "%s: %s answers, %1.1f Mo, %s hits, %s misses",
+        stats["path"],
+        stats["entries"],
+        stats["bytes"] / 1024**2,
+        stats["hits"],
+        stats["misses"],
+    )
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
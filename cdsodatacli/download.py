@@ -27,9 +27,16 @@ from cdsodatacli.utils import (
 )
 from cdsodatacli.product_parser import ExplodeSAFE
 from cdsodatacli.s3_path import guess_s3_path
+from cdsodatacli.rate_limiter import RateLimiter
 from collections import defaultdict
 
 logger = logging.getLogger(__name__)
+# bucket of the S3 LIST requests, separate from the catalogue and identity ones
+S3_LIST_REQUESTS_PER_SECOND = 20
+S3_LIST_MAX_BURST = 40
+_S3_LIST_RATE_LIMITER = RateLimiter(
+    max_requests_per_second=S3_LIST_REQUESTS_PER_SECOND, max_burst=S3_LIST_MAX_BURST
+)
 
 
 def cds_s3_download_one_product(
@@ -99,6 +106,7 @@ def cds_s3_download_one_product(
         bucket = s3_resources.Bucket(conf["s3_bucket"])
 
         # List all objects under the SAFE prefix
+        _S3_LIST_RATE_LIMITER.wait_if_needed()
         objects = list(bucket.objects.filter(Prefix=s3_path))
         if not objects:
             raise FileNotFoundError(f"No S3 objects found under prefix: {s3_path}")
@@ -346,6 +354,7 @@ def add_missing_cdse_hash_ids_in_listing(
             display_tqdm=display_tqdm,
             email=email,
             password=password,
+            fields=["Id", "Name", "S3Path"],
         )
         if collected_data_norm is not None:
             res = collected_data_norm[["Id", "Name", "S3Path"]]
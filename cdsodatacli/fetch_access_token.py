@@ -1,15 +1,23 @@
 import logging
+import hashlib
 import datetime
 import threading
 import random
 import urllib3
 import requests
+from cdsodatacli.http_session import get_http_session
+from cdsodatacli.rate_limiter import RateLimiter
 
 MAX_VALIDITY_ACCESS_TOKEN = 600  # sec (defined by CDS API)
-ACTIVE_ACCESS_TOKEN = (
-    {}
-)  # login -> list of {'access-token': str, 'access-token-creation-date': datetime}
-_token_cache_lock = threading.Lock()  # protect concurrent access from threads
+# tokens are renewed (in background if still in use) this long before their expiry
+TOKEN_REFRESH_MARGIN = 60  # sec
+URL_IDENTITY = "https://identity.dataspace.copernicus.eu/auth/realms/CDSE/protocol/openid-connect/token"
+# bucket of the identity server, separate from the catalogue and S3 ones
+IDENTITY_REQUESTS_PER_SECOND = 2
+IDENTITY_MAX_BURST = 5
+_IDENTITY_RATE_LIMITER = RateLimiter(
+    max_requests_per_second=IDENTITY_REQUESTS_PER_SECOND, max_burst=IDENTITY_MAX_BURST
+)
 
 logger = logging.getLogger(__name__)
 
@@ -51,13 +59,166 @@ def get_a_credentials_from_conf_file(conf, account_group, login):
     return credentials
 
 
+class TokenManager:
+    """
+    Cache of the CDSE access tokens, one per account, shared by all the threads.
+
+    Tokens are keyed by the login and a hash of the password: a wrong or changed
+    password never gets the token obtained with another one.
+    Concurrent requests for the same login wait for a single in-flight request to the
+    identity server (singleflight), requests for different logins run in parallel.
+    A token still in use is renewed in background `refresh_margin` seconds before its
+    expiry, with the refresh_token grant when the identity server provided a refresh
+    token, with the password grant otherwise.
+
+    Arguments:
+        refresh_margin (float): delay (sec) before expiry at which tokens are renewed
+        proactive_refresh (bool): if False, tokens are only renewed on demand
+    """
+
+    def __init__(self, refresh_margin=TOKEN_REFRESH_MARGIN, proactive_refresh=True):
+        self.refresh_margin = refresh_margin
+        self.proactive_refresh = proactive_refresh
+        self.tokens = {}  # (login, password hash) -> token entry, see _request_token()
+        self.login_locks = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _token_key(login, password):
+        password_hash = hashlib.sha256(str(password).encode()).hexdigest()
+        return login, password_hash
+
+    def _login_lock(self, key):
+        with self.lock:
+            return self.login_locks.setdefault(key, threading.Lock())
+
+    def get_token(self, login, password, url_identity=URL_IDENTITY):
+        """
+        Arguments:
+            login (str): CDSE account
+            password (str): password of the account
+            url_identity (str): token endpoint of the identity server
+
+        Returns:
+            token (str): bearer access token
+            date_generation (datetime.datetime): token creation time
+        """
+        key = self._token_key(login, password)
+        with self._login_lock(key):
+            entry = self.tokens.get(key)
+            if entry is not None and self._is_fresh(entry):
+                entry["last-use"] = datetime.datetime.today()
+                logger.debug("reusing cached token for %s", login)
+                return entry["access-token"], entry["access-token-creation-date"]
+            entry = self._request_token(login, password, url_identity, entry)
+        return entry["access-token"], entry["access-token-creation-date"]
+
+    def _is_fresh(self, entry):
+        age = (
+            datetime.datetime.today() - entry["access-token-creation-date"]
+        ).total_seconds()
+        return age < entry["expires-in"] - min(30, self.refresh_margin)
+
+    def _request_token(self, login, password, url_identity, previous=None):
+        """post to the identity server, the caller holds the lock of the login"""
+        data = None
+        if previous is not None and previous.get("refresh-token") is not None:
+            refresh_age = (
+                datetime.datetime.today() - previous["access-token-creation-date"]
+            ).total_seconds()
+            if refresh_age < previous["refresh-expires-in"] - 30:
+                data = {
+                    "client_id": "cdse-public",
+                    "grant_type": "refresh_token",
+                    "refresh_token": previous["refresh-token"],
+                }
+        if data is not None:
+            try:
+                answer = self._post(url_identity, data)
+            except requests.RequestException as e:  # revoked: back to the password
+                logger.debug("refresh_token grant failed for %s: %s", login, e)
+                data = None
+        if data is None:
+            answer = self._post(
+                url_identity,
+                {
+                    "client_id": "cdse-public",
+                    "username": login,
+                    "password": password,
+                    "grant_type": "password",
+                },
+            )
+        token = answer.get("access_token")
+        if not token:
+            raise ValueError("No access token for account %s" % login)
+        now = datetime.datetime.today()
+        entry = {
+            "access-token": token,
+            "access-token-creation-date": now,
+            "expires-in": answer.get("expires_in", MAX_VALIDITY_ACCESS_TOKEN),
+            "refresh-token": answer.get("refresh_token"),
+            "refresh-expires-in": answer.get("refresh_expires_in", 0),
+            "last-use": now,
+            "password": password,
+            "url-identity": url_identity,
+        }
+        self.tokens[self._token_key(login, password)] = entry
+        logger.debug("new token obtained for %s", login)
+        if self.proactive_refresh:
+            timer = threading.Timer(
+                max(entry["expires-in"] - self.refresh_margin, 1),
+                self._refresh_in_background,
+                args=(login, entry),
+            )
+            timer.daemon = True
+            timer.start()
+        return entry
+
+    @staticmethod
+    def _post(url_identity, data):
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        _IDENTITY_RATE_LIMITER.wait_if_needed()
+        response = get_http_session().post(
+            url_identity, data=data, verify=False, timeout=10
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def _refresh_in_background(self, login, entry):
+        """renew the token of a login before expiry, if it was used since its creation"""
+        key = self._token_key(login, entry["password"])
+        with self._login_lock(key):
+            if self.tokens.get(key) is not entry:  # already renewed on demand
+                return
+            if entry["last-use"] <= entry["access-token-creation-date"]:
+                logger.debug("token of %s unused, not renewed", login)
+                return
+            try:
+                self._request_token(
+                    login, entry["password"], entry["url-identity"], entry
+                )
+            except (requests.RequestException, ValueError) as e:
+                logger.warning(
+                    "background renewal of the token of %s failed: %s", login, e
+                )
+
+    def clear(self):
+        """forget all the tokens, the pending background renewals are dropped"""
+        with self.lock:
+            self.tokens.clear()
+
+
+# token manager shared by get_bearer_access_token() and get_access_token()
+_TOKEN_MANAGER = TokenManager()
+
+
 def get_bearer_access_token(
     conf, specific_account=None, specific_psswd=None, account_group="logins"
 ):
     """
     Get a CDSE bearer access token for a given account.
-    Uses an in-memory cache to avoid hitting the CDSE identity server on every call.
-    Expired tokens are cleaned up automatically.
+    Uses the shared TokenManager: concurrent calls for a login send a single request to
+    the CDSE identity server, and tokens in use are renewed in background before expiry.
 
     Parameters
     ----------
@@ -73,7 +234,7 @@ def get_bearer_access_token(
         login (str): account used
     """
     if specific_account is None:
-        get_a_login_from_conf_file(conf=conf, account_group=account_group)
+        login = get_a_login_from_conf_file(conf=conf, account_group=account_group)
     else:
         login = specific_account
 
@@ -88,93 +249,21 @@ def get_bearer_access_token(
         f"Requesting access token for account {login} from group {account_group}"
     )
     logger.debug(f"Password for {login} is {'*' * len(passwd) if passwd else '(none)'}")
-    # check if a valid token already exists in cache before hitting the server
-    with _token_cache_lock:
-        if login in ACTIVE_ACCESS_TOKEN:
-            for entry in ACTIVE_ACCESS_TOKEN[login]:
-                age = (
-                    datetime.datetime.today() - entry["access-token-creation-date"]
-                ).total_seconds()
-                if age < MAX_VALIDITY_ACCESS_TOKEN - 30:  # 30s safety margin
-                    logger.debug("reusing cached token for %s (age=%ds)", login, age)
-                    return (
-                        entry["access-token"],
-                        entry["access-token-creation-date"],
-                        login,
-                    )
-
-    # no valid cached token found — fetch a new one from CDSE identity server
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-    response = requests.post(
-        conf["URL_identity"],
-        data={
-            "client_id": "cdse-public",
-            "username": login,
-            "password": passwd,
-            "grant_type": "password",
-        },
-        verify=False,
-        timeout=10,
+    token, date_generation = _TOKEN_MANAGER.get_token(
+        login, passwd, url_identity=conf["URL_identity"]
     )
-    response.raise_for_status()
-    token = response.json().get("access_token")
-    if not token:
-        raise ValueError("No access token for account %s" % login)
-    date_generation = datetime.datetime.today()
-    logger.debug("new token obtained for %s", login)
-
-    with _token_cache_lock:
-        # store new token
-        if login not in ACTIVE_ACCESS_TOKEN:
-            ACTIVE_ACCESS_TOKEN[login] = []
-        ACTIVE_ACCESS_TOKEN[login].append(
-            {
-                "access-token": token,
-                "access-token-creation-date": date_generation,
-            }
-        )
-
-        # clean expired tokens for all logins — no nested lock needed
-        for logintest in list(ACTIVE_ACCESS_TOKEN.keys()):
-            cutoff = datetime.datetime.now() - datetime.timedelta(
-                seconds=MAX_VALIDITY_ACCESS_TOKEN
-            )
-            ACTIVE_ACCESS_TOKEN[logintest] = [
-                entry
-                for entry in ACTIVE_ACCESS_TOKEN[logintest]
-                if entry["access-token-creation-date"] > cutoff
-            ]
-            if not ACTIVE_ACCESS_TOKEN[logintest]:
-                logger.debug("clean active access token for: %s", logintest)
-                del ACTIVE_ACCESS_TOKEN[logintest]
-
     return token, date_generation, login
 
 
 def get_access_token(email, password):
     """Helper to retrieve OIDC token.
-    one can generate as many access token as wanted per CDSE account
+    The token is shared with the other callers using the same account (see TokenManager),
+    so that fetch_data() or create_urls() called in loop do not request a token each time.
     """
-    auth_url = "https://identity.dataspace.copernicus.eu/auth/realms/CDSE/protocol/openid-connect/token"
-    auth_data = {
-        "client_id": "cdse-public",
-        "username": email,
-        "password": password,
-        "grant_type": "password",
-    }
-
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-    # response = requests.post(auth_url, data=auth_data, verify=False)
-    response = requests.post(auth_url, data=auth_data, verify=False, timeout=10)
-    response.raise_for_status()
-    token = response.json().get("access_token")
+    token, _ = _TOKEN_MANAGER.get_token(email, password)
     logger.debug(f"Obtained ACCESS_TOKEN for {email}")
-    # check that token was obtained
-    if not token:
-        raise ValueError("No access token found in the response.")
+    if len(token) > 20:
+        logger.debug("Token: %s...%s", token[:10], token[-10:])
     else:
-        if len(token) > 20:
-            logger.debug("Token: %s...%s", token[:10], token[-10:])
-        else:
-            logger.debug("Token: %s", token)
-        return {"Authorization": f"Bearer {token}", "Accept": "application/json"}
+        logger.debug("Token: %s", token)
+    return {"Authorization": f"Bearer {token}", "Accept": "application/json"}
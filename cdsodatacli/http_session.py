@@ -0,0 +1,76 @@
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_CONNECTIONS = 10  # number of hosts (catalogue, identity, ...) kept in pool
+DEFAULT_POOL_MAXSIZE = 32  # keep-alive connections per host
+DEFAULT_POOL_BLOCK = True  # pool_maxsize is a hard limit of connections per host
+
+_http_session = None
+_http_session_lock = threading.Lock()  # protect concurrent creation from threads
+_pool_config = {
+    "pool_connections": DEFAULT_POOL_CONNECTIONS,
+    "pool_maxsize": DEFAULT_POOL_MAXSIZE,
+    "pool_block": DEFAULT_POOL_BLOCK,
+}
+
+logger = logging.getLogger(__name__)
+
+
+def configure_http_session(
+    pool_connections=DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize=DEFAULT_POOL_MAXSIZE,
+    pool_block=DEFAULT_POOL_BLOCK,
+):
+    """
+    Set the connection pool parameters of the shared HTTP session.
+    The current session (if any) is closed, the next call to get_http_session() creates a new one.
+
+    Arguments:
+        pool_connections (int): number of hosts for which a pool of connections is kept
+        pool_maxsize (int): number of keep-alive connections kept per host
+        pool_block (bool): True -> threads wait for a free connection instead of opening more than pool_maxsize per host
+    """
+    global _http_session
+    with _http_session_lock:
+        _pool_config["pool_connections"] = pool_connections
+        _pool_config["pool_maxsize"] = pool_maxsize
+        _pool_config["pool_block"] = pool_block
+        if _http_session is not None:
+            _http_session.close()
+            _http_session = None
+    logger.debug("HTTP session pool configuration: %s", _pool_config)
+
+
+def get_http_session():
+    """
+    Get the HTTP session shared by all the OData and identity requests of cdsodatacli.
+    Connections are kept alive and re-used, so that consecutive requests to the same host
+    do not pay a new TCP+TLS handshake.
+
+    Returns:
+        session (requests.Session): thread-safe for the way cdsodatacli uses it (no shared cookies or auth state)
+    """
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(**_pool_config)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _http_session = session
+                logger.debug("new HTTP session with pool: %s", _pool_config)
+    return _http_session
+
+
+def close_http_session():
+    """
+    Close the shared HTTP session and its pooled connections.
+    """
+    global _http_session
+    with _http_session_lock:
+        if _http_session is not None:
+            _http_session.close()
+            _http_session = None
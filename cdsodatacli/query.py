@@ -1,16 +1,20 @@
 import datetime
 import logging
 import os
+import re
 import json
 import hashlib
 import requests
 import pandas as pd
 import argparse
+import sys
 from shapely import wkt
 import geopandas as gpd
 import shapely
 from shapely.ops import unary_union
 import time
+import math
+import asyncio
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 from collections import defaultdict
@@ -19,24 +23,137 @@ import warnings
 from geodatasets import get_path
 import numpy as np
 from cdsodatacli.fetch_access_token import get_access_token
-from cdsodatacli.rate_limiter import RateLimiter  # Nouveau module
-from cdsodatacli.retry import retry_with_backoff  # Nouveau module
+from cdsodatacli.http_session import get_http_session
+from cdsodatacli.cache import (
+    get_query_cache,
+    normalize_query_url,
+    CacheFreshnessPolicy,
+    DEFAULT_IMMUTABLE_AFTER_DAYS,
+    DEFAULT_RECENT_TTL_HOURS,
+)
+from cdsodatacli.rate_limiter import (
+    AdaptiveRateLimiter,
+    SharedRateLimiter,
+    parse_retry_after,
+    shared_rate_limiter_key,
+)
+from cdsodatacli.retry import retry_with_backoff, RetryPolicy, CircuitOpenError
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_TOP_ROWS_PER_QUERY = 1000
+# OData refuses $skip values above this limit, pagination stops there
+ODATA_MAX_SKIP = 10000
+# stable ordering needed to page with $skip without losing or repeating products:
+# products of a datatake share their ContentDate/Start, the Id breaks the ties
+PAGINATION_ORDERBY = "ContentDate/Start asc,Id asc"
+# former names of the columns of the input GeoDataFrame
+QUERY_COLUMN_ALIASES = {
+    "startdate": "start_datetime",
+    "stopdate": "end_datetime",
+    "geofeature": "geometry",
+}
+# columns of the input GeoDataFrame translated into OData filters, besides the
+# area and the time window
+QUERY_FILTER_COLUMNS = ["collection", "name", "sensormode", "producttype", "Attributes"]
+# ordering of the incremental queries: a truncated answer is a prefix of the delta
+SYNC_ORDERBY = "ModificationDate asc,Id asc"
+# saturated time windows are not split below this duration
+DEFAULT_MIN_TIMEDELTA_SLICE = datetime.timedelta(minutes=1)
+# saturated areas whose bounding box is smaller (square degrees) are not split anymore
+DEFAULT_MIN_SPLIT_AREA = 1.0
+# coarse window used by bisection or planning without slicing: the whole period at once
+COARSE_TIMEDELTA_SLICE = datetime.timedelta(days=365 * 50)
+# planned slices target this fraction of the row cap, to absorb new products
+DEFAULT_PLANNING_FILL_RATIO = 0.9
+# part of the URL length left to the non spatial filters and options
+URL_LENGTH_RESERVED_FOR_FILTERS = 1500
+# MultiPolygons with more parts are queried through their convex hull
+DEFAULT_MAX_GEOMETRY_PARTS = 20
+# product properties always fetched, used by the post-processing and the local filters
+REQUIRED_FIELDS = ["Id", "Name", "ModificationDate", "ContentDate", "Footprint"]
+# properties written in the SAFE listing of the command line
+LISTING_FIELDS = ["Id", "Name", "S3Path", "geometry", "Checksum"]
+# products whose Attributes are fetched by a single `Id in (...)` request
+DEFAULT_HYDRATION_BATCH_SIZE = 100
+# areas OR-combined in a single URL when packing is enabled
+DEFAULT_MAX_PACK_SIZE = 50
+# products expected per day over a small area (Sentinel-1, all product types) and
+# typical footprint (square degrees): estimate of the answer size of a pack
+EXPECTED_PRODUCTS_PER_AREA_PER_DAY = 4
+PRODUCT_FOOTPRINT_AREA = 6.0
+# longest URL sent to CDSE (once percent-encoded), packed filters stay below it
+DEFAULT_MAX_URL_LENGTH = 6000
+ODATA_PRODUCTS_URL = (
+    "https://catalogue.dataspace.copernicus.eu/odata/v1/Products?$filter="
+)
 WORLDPOLYGON = shapely.wkt.loads("POLYGON((-180 -90,180 -90,180 90,-180 90,-180 -90))")
 # Limites officielles CDSE : 2000 requêtes/minute → ~33 req/s, mais on est conservateur
 REQUESTS_PER_SECOND = 30  # Marge pour éviter les 429
+# débit plafond exploré par le limiteur adaptatif tant que le serveur ne refuse rien
+MAX_REQUESTS_PER_SECOND = 100
 MAX_BURST = 40  # Burst autorisé
+# réponses signalant un débit trop élevé : le limiteur réduit le débit
+THROTTLING_STATUS_CODES = (429, 503)
 MAX_WORKERS = 4
-
-# Rate limiter global pour toutes les requêtes
-_GLOBAL_RATE_LIMITER = RateLimiter(
-    max_requests_per_second=REQUESTS_PER_SECOND, max_burst=MAX_BURST
+# requests in flight with querymode="async", the rate limiter still applies
+ASYNC_MAX_CONCURRENCY = 100
+
+# politique de retry commune à toutes les requêtes au catalogue : budget global et
+# disjoncteur partagés par les threads et les coroutines
+_RETRY_POLICY = RetryPolicy(max_retries=5, base_delay=1, max_delay=60)
+
+# Rate limiter global des requêtes au catalogue, adapté aux réponses 429/503
+# (identity et S3 ont leurs propres buckets, voir fetch_access_token et download)
+_GLOBAL_RATE_LIMITER = AdaptiveRateLimiter(
+    max_requests_per_second=REQUESTS_PER_SECOND,
+    max_burst=MAX_BURST,
+    max_requests_per_second_limit=MAX_REQUESTS_PER_SECOND,
 )
 
 
+class IncompleteFetchError(Exception):
+    """Some OData URLs could not be fetched: the result of fetch_data is incomplete.
+
+    Attributes:
+        failed_urls (list): Tuples (id_original_query, url) of the failed URLs.
+        result: What fetch_data returns without the failed URLs.
+    """
+
+    def __init__(self, failed_urls, result=None):
+        super().__init__(
+            f"{len(failed_urls)} OData URL(s) could not be fetched, "
+            f"first one: {failed_urls[0][1]}"
+        )
+        self.failed_urls = failed_urls
+        self.result = result
+
+
+def use_shared_rate_limiter(state_dir, account=None):
+    """Shares the request budget of CDSE with the other processes of the host.
+
+    The global rate limiter is replaced by a limiter whose bucket is stored in
+    `state_dir`: jobs launched in parallel with the same `state_dir` and account split
+    one request rate instead of all receiving 429 answers.
+
+    Args:
+        state_dir (str): Directory of the shared buckets, common to all the jobs.
+        account (str, optional): CDSE account (email) used by the queries.
+
+    Returns:
+        SharedRateLimiter: The new global rate limiter.
+    """
+    global _GLOBAL_RATE_LIMITER
+    _GLOBAL_RATE_LIMITER = SharedRateLimiter(
+        state_dir,
+        shared_rate_limiter_key(ODATA_PRODUCTS_URL, account),
+        max_requests_per_second=REQUESTS_PER_SECOND,
+        max_burst=MAX_BURST,
+        max_requests_per_second_limit=MAX_REQUESTS_PER_SECOND,
+    )
+    return _GLOBAL_RATE_LIMITER
+
+
 def time_based_hash(length=7):
     """Generates a short hash based on the current time in milliseconds.
 
@@ -96,8 +213,8 @@ def query_client():
     )
     parser.add_argument(
         "--querymode",
-        choices=["seq", "multi"],
-        help="query mode: sequential or multithreaded [optional, default=seq]",
+        choices=["seq", "multi", "async"],
+        help="query mode: sequential, multithreaded or asyncio (requires aiohttp) [optional, default=seq]",
         default="seq",
     )
     parser.add_argument(
@@ -140,6 +257,52 @@ def query_client():
         help="path to cache directory to store and re-use previous queries [optional]",
         default=None,
     )
+    parser.add_argument(
+        "--cache-immutable-after-days",
+        type=float,
+        default=None,
+        help="cached answers about time windows older than this number of days never expire [optional, default=None -> 30 if --cache-ttl-hours is set, otherwise cached answers never expire]",
+    )
+    parser.add_argument(
+        "--cache-ttl-hours",
+        type=float,
+        default=None,
+        help="cached answers about more recent time windows are fetched again after this number of hours [optional, default=None -> 6h if --cache-immutable-after-days is set]",
+    )
+    parser.add_argument(
+        "--shared-rate-limit-dir",
+        default=None,
+        help="directory of a request budget shared by all the jobs of the host using the same directory and --email [optional, default=None -> per-process rate limit]",
+    )
+    parser.add_argument(
+        "--sync-dir",
+        default=None,
+        help="directory of the incremental synchronisation state: only products modified since the previous run of the same --id_query are asked to CDSE [optional, default=None -> full query]",
+    )
+    parser.add_argument(
+        "--paginate",
+        action="store_true",
+        default=False,
+        help="follow OData pagination (@odata.nextLink or $skip) to get more than 1000 products per query [optional, default=False]",
+    )
+    parser.add_argument(
+        "--bisect-saturated",
+        action="store_true",
+        default=False,
+        help="query the whole period at once and split in two halves the time windows returning the maximum number of rows, instead of using 14 days slices [optional, default=False]",
+    )
+    parser.add_argument(
+        "--split-saturated-areas",
+        action="store_true",
+        default=False,
+        help="split in four quadrants (quadtree clipped to the geometry) the areas returning the maximum number of rows, before splitting their time window [optional, default=False]",
+    )
+    parser.add_argument(
+        "--plan-with-count",
+        action="store_true",
+        default=False,
+        help="count the products of the whole period first ($count) and size the time slices so that each request stays under the row cap [optional, default=False]",
+    )
     parser.add_argument(
         "--minimum-sea-percent",
         type=float,
@@ -161,6 +324,24 @@ def query_client():
     sta = datetime.datetime.strptime(args.startdate, "%Y%m%dT%H:%M:%S")
     sto = datetime.datetime.strptime(args.stopdate, "%Y%m%dT%H:%M:%S")
     id_query = time_based_hash() if args.id_query is None else args.id_query
+    if args.sync_dir is not None and args.id_query is None:
+        logger.warning("--sync-dir needs a fixed --id_query to find the previous run")
+    if args.shared_rate_limit_dir is not None:
+        use_shared_rate_limiter(args.shared_rate_limit_dir, account=args.email)
+    cache_freshness = None
+    if args.cache_immutable_after_days is not None or args.cache_ttl_hours is not None:
+        cache_freshness = CacheFreshnessPolicy(
+            immutable_after_days=(
+                DEFAULT_IMMUTABLE_AFTER_DAYS
+                if args.cache_immutable_after_days is None
+                else args.cache_immutable_after_days
+            ),
+            recent_ttl_hours=(
+                DEFAULT_RECENT_TTL_HOURS
+                if args.cache_ttl_hours is None
+                else args.cache_ttl_hours
+            ),
+        )
     gdf = gpd.GeoDataFrame(
         {
             "start_datetime": [sta],
@@ -174,16 +355,33 @@ def query_client():
             "id_query": [id_query],
         }
     )
-    result_query = fetch_data(
-        gdf,
-        timedelta_slice=datetime.timedelta(days=14),
-        min_sea_percent=None,
-        top=args.top,
-        cache_dir=args.cache_dir,
-        querymode=args.querymode,
-        email=args.email,
-        password=args.password,
-    )
+    failed_urls = []
+    try:
+        result_query = fetch_data(
+            gdf,
+            timedelta_slice=(
+                None
+                if args.bisect_saturated or args.plan_with_count
+                else datetime.timedelta(days=14)
+            ),
+            min_sea_percent=None,
+            top=args.top,
+            cache_dir=args.cache_dir,
+            querymode=args.querymode,
+            email=args.email,
+            password=args.password,
+            paginate=args.paginate,
+            bisect_saturated=args.bisect_saturated,
+            split_saturated_areas=args.split_saturated_areas,
+            plan_with_count=args.plan_with_count,
+            cache_freshness=cache_freshness,
+            sync_dir=args.sync_dir,
+            fields=LISTING_FIELDS,
+            raise_on_failed_urls=True,
+        )
+    except IncompleteFetchError as e:
+        # the listing collected so far is written, the exit status tells it is partial
+        result_query, failed_urls = e.result, e.failed_urls
     logger.info("time to query : %1.1f sec", time.time() - t0)
     if result_query is not None and result_query.empty is False:
         logger.info("number of product found: %s", len(result_query))
@@ -191,7 +389,7 @@ def query_client():
             os.makedirs(
                 os.path.dirname(args.output_safe_listing), 0o0755, exist_ok=True
             )
-            result_query[["Id", "Name", "S3Path", "geometry", "Checksum"]].to_csv(
+            result_query[LISTING_FIELDS].to_csv(
                 args.output_safe_listing, index=False, header=True
             )
             logger.info("SAFE listing saved to : %s", args.output_safe_listing)
@@ -207,6 +405,11 @@ def query_client():
             )
             touch(args.output_safe_listing)
             os.chmod(args.output_safe_listing, 0o0644)
+    if len(failed_urls) > 0:
+        logger.error(
+            "%s URLs could not be fetched, the listing is incomplete", len(failed_urls)
+        )
+        sys.exit(1)
     return result_query
 
 
@@ -234,11 +437,28 @@ def fetch_data(
     email=None,
     password=None,
     display_tqdm=False,
+    paginate=False,
+    bisect_saturated=False,
+    min_timedelta_slice=DEFAULT_MIN_TIMEDELTA_SLICE,
+    split_saturated_areas=False,
+    min_split_area=DEFAULT_MIN_SPLIT_AREA,
+    plan_with_count=False,
+    cache_freshness=None,
+    sync_dir=None,
+    max_pack_size=None,
+    max_url_length=DEFAULT_MAX_URL_LENGTH,
+    simplify_tolerance=None,
+    fields=None,
+    return_associations=False,
+    raise_on_failed_urls=False,
 ):
     """Fetches meta-data of CDSE products based on provided parameters.
 
-    Splits the input GeoDataFrame by the `id_query` column and executes fetching
-    for each unique query ID.
+    Each `id_query` of the input GeoDataFrame is normalized (and sliced in time)
+    on its own, then the URLs of all the queries are fetched by a single work pool,
+    so that many small queries (e.g. one per buoy) keep several requests in flight
+    under the global rate limit. The results are then split back by query for the
+    post-processing (deduplication, geometries, sea percent, incremental sync).
 
     Args:
         gdf (gpd.GeoDataFrame): Geospatial data for the query.
@@ -261,16 +481,105 @@ def fetch_data(
         min_sea_percent (float, optional): Minimum sea percent to filter products.
         top (int, optional): Max rows per individual OData query.
         cache_dir (str, optional): Path to directory for storing/reusing results.
-        querymode (str): 'seq' (sequential) or 'multi' (multithreaded). Defaults to 'seq'.
+            Answers are stored in a SQLite file, use
+            `cdsodatacli.cache.get_query_cache(cache_dir, max_bytes=...)` to bound
+            its size and the `cdsodatacli-cache` command for maintenance.
+        querymode (str): 'seq' (sequential), 'multi' (multithreaded) or 'async'
+            (asyncio, requires aiohttp). Defaults to 'seq'.
         email (str, optional): CDSE account email for authentication.
         password (str, optional): CDSE account password.
         display_tqdm (bool): Whether to show a progress bar. Defaults to False.
+        paginate (bool): If True, follow `@odata.nextLink` (or `$skip`) so that a
+            query returning more than `top` products is fetched page by page
+            instead of being truncated. Defaults to False.
+        bisect_saturated (bool): If True, every time window whose answer reaches the
+            row cap is split in two halves and queried again, recursively. When
+            `timedelta_slice` is None, the whole period is first queried at once, so
+            that the number of requests follows the real density of products.
+            Defaults to False.
+        min_timedelta_slice (datetime.timedelta): Saturated windows shorter than
+            twice this duration are not split anymore. Defaults to 1 minute.
+        split_saturated_areas (bool): If True, the area of every request whose
+            answer reaches the row cap is split in four quadrants of its bounding
+            box (quadtree, clipped to the area) and queried again, recursively, so
+            that dense regions are resolved in space before being split in time
+            (with `bisect_saturated`). Defaults to False.
+        min_split_area (float): Saturated areas whose bounding box is smaller than
+            this (square degrees) are not split anymore. Defaults to 1.
+        plan_with_count (bool): If True, the number of products of each (coarse)
+            time window is first counted with cheap `$count` requests, and the
+            windows are sliced so that each data request stays under the row cap.
+            Windows without products are not queried at all, and the slices that
+            still reach the row cap (products not spread evenly in time) are
+            bisected. Defaults to False.
+        cache_freshness (cdsodatacli.cache.CacheFreshnessPolicy, optional): Expiration
+            of the cached answers: answers about windows older than
+            `immutable_after_days` are kept forever, the others are fetched again
+            after `recent_ttl_hours`. It only applies to this call. Defaults to None
+            (policy of the cache itself, by default cached answers never expire).
+        sync_dir (str, optional): Directory of the incremental synchronisation state.
+            The result of each `id_query` is stored there with the highest
+            `ModificationDate`/`PublicationDate` seen (watermark). The next call only
+            asks CDSE for the products modified after the watermark and merges them
+            into the previous result (most recent `ModificationDate` kept per Name).
+            The delta is asked for the whole period at once (no time slicing),
+            paginated in `ModificationDate` order and bisected when saturated, and
+            the state of a query is left untouched when one of its answers failed
+            or was truncated.
+            Defaults to None (full query).
+        max_pack_size (int, optional): If greater than 1, the time windows differing
+            only by their area (e.g. buoys sharing a slice) are fetched by packs of up
+            to `max_pack_size` areas OR-combined in a single `$filter`, the products
+            being given back to each area by local intersection with its footprint.
+            The estimated answer of a pack stays under the row cap (see
+            estimate_expected_rows), and a saturated pack is queried again area by
+            area. Defaults to None (one URL per area).
+        max_url_length (int): Max length of a URL (packed or not). Defaults to 6000.
+            Query geometries too detailed for it are simplified (see
+            prepare_query_geometries).
+        simplify_tolerance (float, optional): Tolerance (degrees) used to simplify
+            every polygon of the queries. The simplified polygons cover the
+            original ones and the products are then filtered locally on the exact
+            geometries. Defaults to None (only the too long polygons are simplified).
+        fields (list, optional): Product properties to fetch (OData `$select`), e.g.
+            ["Id", "Name", "S3Path", "geometry"] for a listing. The properties used
+            by the post-processing (Id, Name, ModificationDate, ContentDate,
+            Footprint -> geometry) are always fetched, and the Attributes are only
+            expanded if "Attributes" is in `fields`. Defaults to None (all the
+            properties and the Attributes).
+        return_associations (bool): If True, return the products only once (most
+            recent `ModificationDate` per Name) and the product/query association
+            table (see associate_products_to_queries). Defaults to False.
+        raise_on_failed_urls (bool): If True, raise IncompleteFetchError at the end
+            when URLs could not be fetched (HTTP or network error, retry budget
+            exhausted, circuit breaker open), the partial result being its `result`
+            attribute. If False, the failed URLs are only logged (see get_failed_urls).
+            Defaults to False.
 
     Returns:
-        pd.DataFrame: Concatenated meta-data results from all queries.
+        pd.DataFrame: Concatenated meta-data results from all queries, one row per
+            product and `id_original_query`.
+        If `return_associations` is True: tuple (gpd.GeoDataFrame, pd.DataFrame)
+            - The deduplicated products.
+            - The association table: Name, id_query, query_index.
+
+    Raises:
+        IncompleteFetchError: If URLs could not be fetched and
+            `raise_on_failed_urls` is True.
     """
+    if cache_dir is not None and cache_freshness is not None:
+        # the cache is shared by the process: the policy only applies to this call
+        arguments = {**locals(), "cache_freshness": None}
+        with get_query_cache(cache_dir).freshness_policy(cache_freshness):
+            return fetch_data(**arguments)
     if email and password:
         headers = get_access_token(email, password)
+    if sync_dir is not None and not paginate:
+        # a delta cut at `top` would move the watermark past missing products
+        logger.info("incremental synchronisation: pagination enabled")
+        paginate = True
+    if (bisect_saturated or plan_with_count) and timedelta_slice is None:
+        timedelta_slice = COARSE_TIMEDELTA_SLICE
     collected_data = None
     # split the gdf in subsets based on the query_id
     unique_query_ids = gdf["id_query"].unique()
@@ -279,32 +588,406 @@ def fetch_data(
         disable=not display_tqdm,
         desc="individual CDSE queries",
     )
-    # for query_id in unique_query_ids:
     cpt = defaultdict(int)
+    gdf_norm_x = []
+    query_tags = {}
+    previous_states = {}
+    incremental = False
     for qi in pbar:
         query_id = unique_query_ids[qi]
         gdf_subset = gdf[gdf["id_query"] == query_id]
-        logger.info(
-            f"fetching data for query_id:{query_id} with {len(gdf_subset)} geometries"
+        logger.info(f"preparing query_id:{query_id} with {len(gdf_subset)} geometries")
+        if sync_dir is not None:
+            previous_data, watermark = load_sync_state(sync_dir, query_id)
+            previous_states[query_id] = previous_data
+            if watermark is not None:
+                logger.info(
+                    "incremental query %s: products modified after %s",
+                    query_id,
+                    watermark,
+                )
+                gdf_subset = gdf_subset.assign(modified_after=watermark)
+        if not isinstance(gdf_subset, gpd.GeoDataFrame):
+            continue
+        query_timedelta_slice = timedelta_slice
+        if "modified_after" in gdf_subset:
+            # few products were modified since the watermark: the whole period is
+            # asked at once, pagination and bisection handle the dense deltas
+            query_timedelta_slice = COARSE_TIMEDELTA_SLICE
+            incremental = True
+        gdf_norm = normalize_gdf(gdf=gdf_subset, timedelta_slice=query_timedelta_slice)
+        if gdf_norm is not None and len(gdf_norm) > 0:
+            gdf_norm_x.append(gdf_norm)
+            query_tags[query_id] = gdf_norm["id_original_query"].unique()
+
+    if incremental and not bisect_saturated:
+        logger.info("incremental synchronisation: saturated windows bisected")
+        bisect_saturated = True
+    # a single work pool for the URLs of all the queries
+    gdf_all = None
+    if len(gdf_norm_x) > 0:
+        gdf_all = pd.concat(gdf_norm_x)
+    logger.info(
+        "%s queries -> %s time windows fetched together",
+        len(unique_query_ids),
+        0 if gdf_all is None else len(gdf_all),
+    )
+    fetched, cpt = fetch_normalized_gdf(
+        gdf_norm=gdf_all,
+        top=top,
+        cache_dir=cache_dir,
+        querymode=querymode,
+        email=email,
+        password=password,
+        cpt=cpt,
+        headers=headers if email and password else None,
+        paginate=paginate,
+        bisect_saturated=bisect_saturated,
+        min_timedelta_slice=min_timedelta_slice,
+        split_saturated_areas=split_saturated_areas,
+        min_split_area=min_split_area,
+        plan_with_count=plan_with_count,
+        max_pack_size=max_pack_size,
+        max_url_length=max_url_length,
+        simplify_tolerance=simplify_tolerance,
+        fields=fields,
+    )
+    # the watermark of a query only advances if all its delta answers are complete
+    incomplete_tags = {tag for tag, _ in get_failed_urls(cpt) + get_truncated_urls(cpt)}
+    fetched_per_tag = {}
+    if fetched is not None:
+        fetched_per_tag = dict(
+            list(fetched.groupby("id_original_query", sort=False, dropna=False))
         )
-        data_subset, cpt = fetch_data_single_query(
-            gdf=gdf_subset,
-            timedelta_slice=timedelta_slice,
+
+    # post-processing query by query
+    collected_data_x = []
+    for query_id in unique_query_ids:
+        data_subset = post_process_results(
+            concat_results(
+                [
+                    fetched_per_tag[tag]
+                    for tag in query_tags.get(query_id, [])
+                    if tag in fetched_per_tag
+                ]
+            ),
             min_sea_percent=min_sea_percent,
-            top=top,
-            cache_dir=cache_dir,
-            querymode=querymode,
-            email=email,
-            password=password,
-            cpt=cpt,
-            headers=headers if email and password else None,
         )
-        pbar.set_description("queries: %s" % cpt)
-        if collected_data is None:
-            collected_data = data_subset
-        else:
-            collected_data = pd.concat([collected_data, data_subset], ignore_index=True)
-    return collected_data
+        if sync_dir is not None:
+            data_subset = merge_sync_delta(previous_states[query_id], data_subset)
+            if incomplete_tags.isdisjoint(query_tags.get(query_id, [])):
+                save_sync_state(sync_dir, query_id, data_subset)
+            else:
+                logger.warning(
+                    "incomplete answer for query %s: synchronisation state not updated",
+                    query_id,
+                )
+        if data_subset is not None:
+            collected_data_x.append(data_subset)
+    failed_urls = get_failed_urls(cpt)
+    logger.info(
+        "queries: %s",
+        {
+            key: value
+            for key, value in cpt.items()
+            if key not in ("failed_urls", "truncated_urls")
+        },
+    )
+    if len(collected_data_x) == 1:
+        collected_data = collected_data_x[0]
+    elif len(collected_data_x) > 1:
+        collected_data = pd.concat(collected_data_x, ignore_index=True)
+    result = collected_data
+    if return_associations:
+        associations = associate_products_to_queries(collected_data, gdf)
+        if collected_data is not None:
+            collected_data = remove_duplicates(collected_data).drop(
+                columns=["id_original_query"]
+            )
+        result = collected_data, associations
+    if len(failed_urls) > 0:
+        logger.error(
+            "%s URLs could not be fetched (failed fast: %s, retry budget exhausted: "
+            "%s, circuit open: %s), the result is incomplete: %s",
+            len(failed_urls),
+            cpt["urls_failed_fast"],
+            cpt["retry_budget_exhausted"],
+            cpt["urls_circuit_open"],
+            [url for _, url in failed_urls],
+        )
+        if raise_on_failed_urls:
+            raise IncompleteFetchError(failed_urls, result=result)
+    return result
+
+
+def associate_products_to_queries(products, gdf):
+    """Maps the products to every row of the queries they answer.
+
+    The footprints of the products are joined (STRtree) with the areas of the
+    query rows, and a pair is kept when the product starts inside the time window
+    of the row. The other filters (collection, name, product type...) are not
+    checked locally: a product is associated to the rows having the same filters
+    as a row of the query that found it, whatever their `id_query`. Overlapping
+    areas can thus be queried once and mapped locally.
+
+    Args:
+        products (pd.DataFrame): Results of fetch_data, with 'Name',
+            'id_original_query', 'geometry' or 'Footprint' and 'ContentDate'.
+        gdf (gpd.GeoDataFrame): Input query data given to fetch_data.
+
+    Returns:
+        pd.DataFrame: One row per (product, query row) pair with the columns
+            'Name', 'id_query' and 'query_index' (index of the row in `gdf`).
+    """
+    columns = ["Name", "id_query", "query_index"]
+    if products is None or len(products) == 0 or len(gdf) == 0:
+        return pd.DataFrame(columns=columns)
+    gdf = gdf.rename(columns=QUERY_COLUMN_ALIASES)
+    unique_products = products.drop_duplicates(subset=["Name"])
+    if "geometry" in unique_products:
+        footprints = np.asarray(unique_products["geometry"], dtype=object)
+    else:
+        footprints = footprints_to_geometries(unique_products["Footprint"])
+    # without footprint, the product is associated to every area
+    footprints = np.where(shapely.is_missing(footprints), WORLDPOLYGON, footprints)
+    if "geometry" in gdf:
+        areas = np.asarray(gdf["geometry"], dtype=object)
+        areas = np.where(shapely.is_missing(areas), WORLDPOLYGON, areas)
+    else:
+        areas = np.full(len(gdf), WORLDPOLYGON, dtype=object)
+    row_idx, product_idx = shapely.STRtree(footprints).query(
+        areas, predicate="intersects"
+    )
+    if "ContentDate" in unique_products:
+        # same condition as the OData filter: start_datetime < Start < end_datetime
+        starts = pd.to_datetime(
+            unique_products["ContentDate"].str.get("Start"), utc=True
+        ).to_numpy(dtype="datetime64[ns]")[product_idx]
+        row_starts = pd.to_datetime(gdf["start_datetime"], utc=True).to_numpy(
+            dtype="datetime64[ns]"
+        )
+        row_ends = pd.to_datetime(gdf["end_datetime"], utc=True).to_numpy(
+            dtype="datetime64[ns]"
+        )
+        inside = np.isnat(starts) | (
+            (starts > row_starts[row_idx]) & (starts < row_ends[row_idx])
+        )
+        row_idx, product_idx = row_idx[inside], product_idx[inside]
+    # rows sharing the same non spatio-temporal filters
+    filter_keys = [
+        _format_column(gdf[column], str)
+        for column in QUERY_FILTER_COLUMNS
+        if column in gdf
+    ]
+    row_filters = np.zeros(len(gdf), dtype=int)
+    if len(filter_keys) > 0:
+        row_keys = np.empty(len(gdf), dtype=object)
+        row_keys[:] = list(zip(*filter_keys))
+        row_filters = pd.factorize(row_keys)[0]
+    # same tag as the id_original_query of the products (see normalize_gdf)
+    row_tags = np.where(gdf["id_query"].isnull(), gdf.index, gdf["id_query"])
+    found = (
+        products[["Name", "id_original_query"]]
+        .merge(
+            pd.DataFrame({"id_original_query": row_tags, "filters": row_filters}),
+            on="id_original_query",
+        )
+        .drop(columns=["id_original_query"])
+        .drop_duplicates()
+    )
+    pairs = pd.DataFrame(
+        {
+            "Name": unique_products["Name"].to_numpy()[product_idx],
+            "id_query": gdf["id_query"].to_numpy()[row_idx],
+            "query_index": gdf.index.to_numpy()[row_idx],
+            "filters": row_filters[row_idx],
+        }
+    )
+    associations = pairs.merge(found, on=["Name", "filters"])
+    return associations[columns].sort_values(["query_index", "Name"], ignore_index=True)
+
+
+def hydrate_attributes(
+    products,
+    batch_size=DEFAULT_HYDRATION_BATCH_SIZE,
+    querymode="seq",
+    cache_dir=None,
+    email=None,
+    password=None,
+    headers=None,
+    raise_on_failed_urls=False,
+):
+    """Fetches the Attributes of some products only, after a lean listing.
+
+    Meant for results of `fetch_data(..., fields=[...])` without "Attributes":
+    once the products are filtered (name, sea percent, area...), their Attributes
+    are requested by batches of `batch_size` Ids (`Id in (...)` filters) and
+    joined back, so that the heavy expansion is not paid for discarded products.
+
+    Args:
+        products (pd.DataFrame): Products with an 'Id' column.
+        batch_size (int): Max number of Ids per request. Defaults to 100.
+        querymode (str): 'seq', 'multi' or 'async'. Defaults to 'seq'.
+        cache_dir (str, optional): Path for local caching.
+        email (str, optional): Auth email.
+        password (str, optional): Auth password.
+        headers (dict, optional): Pre-obtained authentication headers.
+        raise_on_failed_urls (bool): If True, raise IncompleteFetchError when some
+            batches could not be fetched. Defaults to False (the Ids of the failed
+            batches are logged).
+
+    Returns:
+        pd.DataFrame: `products` with an 'Attributes' column (None for the products
+            not found or whose batch failed).
+
+    Raises:
+        IncompleteFetchError: If some batches failed and `raise_on_failed_urls` is
+            True, with the hydrated products as `result`.
+    """
+    if products is None or len(products) == 0:
+        return products
+    if email and password and headers is None:
+        headers = get_access_token(email, password)
+    ids = products["Id"].dropna().unique().tolist()
+    urls = []
+    batches = {}
+    for ibatch, first in enumerate(range(0, len(ids), batch_size)):
+        batch = ids[first : first + batch_size]
+        batches[ibatch] = batch
+        id_list = ",".join(f"'{product_id}'" for product_id in batch)
+        options = f"$top={len(batch)}&$select=Id,Name&$expand=Attributes"
+        urls.append((ibatch, f"{ODATA_PRODUCTS_URL}Id in ({id_list})&{options}"))
+    logger.info("Attributes of %s products fetched in %s requests", len(ids), len(urls))
+    fetched, cpt = fetch_data_from_urls(
+        urls_plus_headers={"urls": urls, "headers": headers},
+        cache_dir=cache_dir,
+        querymode=querymode,
+    )
+    attributes = {}
+    if fetched is not None and "Attributes" in fetched:
+        attributes = dict(zip(fetched["Id"], fetched["Attributes"]))
+    hydrated = products.assign(Attributes=[attributes.get(i) for i in products["Id"]])
+    failed_urls = get_failed_urls(cpt)
+    if len(failed_urls) > 0:
+        failed_ids = [
+            product_id for ibatch, _ in failed_urls for product_id in batches[ibatch]
+        ]
+        cpt["products_not_hydrated"] += len(failed_ids)
+        logger.error(
+            "Attributes of %s products (%s batches) could not be fetched: %s",
+            len(failed_ids),
+            len(failed_urls),
+            failed_ids,
+        )
+        if raise_on_failed_urls:
+            raise IncompleteFetchError(failed_urls, result=hydrated)
+    return hydrated
+
+
+def get_sync_state_paths(sync_dir, id_query):
+    """Returns the files of the incremental synchronisation state of a query.
+
+    Args:
+        sync_dir (str): Directory of the synchronisation state.
+        id_query (str): Unique identifier of the query.
+
+    Returns:
+        tuple: (str, str) paths of the result (pickle) and of the watermark (json).
+    """
+    basename = str(id_query).replace(os.sep, "_")
+    return (
+        os.path.join(sync_dir, basename + ".pkl"),
+        os.path.join(sync_dir, basename + ".json"),
+    )
+
+
+def get_modification_watermark(data):
+    """Returns the most recent ModificationDate/PublicationDate of a result.
+
+    Args:
+        data (pd.DataFrame): Meta-data of CDSE products.
+
+    Returns:
+        str or None: OData datetime, None if there is no date in `data`.
+    """
+    watermark = None
+    if data is None:
+        return watermark
+    for date_col in ("ModificationDate", "PublicationDate"):
+        if date_col in data and data[date_col].notna().any():
+            latest = pd.to_datetime(data[date_col], utc=True, format="ISO8601").max()
+            if watermark is None or latest > watermark:
+                watermark = latest
+    if watermark is not None:
+        watermark = watermark.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+    return watermark
+
+
+def load_sync_state(sync_dir, id_query):
+    """Loads the result and the watermark of the previous synchronisation of a query.
+
+    Args:
+        sync_dir (str): Directory of the synchronisation state.
+        id_query (str): Unique identifier of the query.
+
+    Returns:
+        tuple: (pd.DataFrame or None, str or None) previous result and watermark,
+            (None, None) if the query was never synchronised.
+    """
+    data_file, watermark_file = get_sync_state_paths(sync_dir, id_query)
+    if not os.path.exists(data_file) or not os.path.exists(watermark_file):
+        return None, None
+    with open(watermark_file, "r") as f:
+        state = json.load(f)
+    return pd.read_pickle(data_file), state["watermark"]
+
+
+def save_sync_state(sync_dir, id_query, data):
+    """Stores the result and the watermark of a synchronised query.
+
+    Args:
+        sync_dir (str): Directory of the synchronisation state.
+        id_query (str): Unique identifier of the query.
+        data (pd.DataFrame or None): Merged result of the query.
+    """
+    if data is None:
+        return
+    os.makedirs(sync_dir, exist_ok=True)
+    data_file, watermark_file = get_sync_state_paths(sync_dir, id_query)
+    # write then rename, an interrupted job leaves the previous state untouched
+    data.to_pickle(data_file + ".tmp")
+    os.replace(data_file + ".tmp", data_file)
+    state = {
+        "id_query": str(id_query),
+        "watermark": get_modification_watermark(data),
+        "nb_products": len(data),
+        "updated": datetime.datetime.now(datetime.UTC).isoformat(),
+    }
+    with open(watermark_file + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(watermark_file + ".tmp", watermark_file)
+
+
+def merge_sync_delta(previous_data, delta):
+    """Merges the products modified since the last synchronisation into its result.
+
+    Args:
+        previous_data (pd.DataFrame or None): Result of the previous synchronisation.
+        delta (pd.DataFrame or None): Products modified after the watermark.
+
+    Returns:
+        pd.DataFrame or None: Merged result, the most recent ModificationDate being
+            kept for each product Name (see remove_duplicates).
+    """
+    if previous_data is None or len(previous_data) == 0:
+        return delta
+    if delta is None or len(delta) == 0:
+        return previous_data
+    logger.info("%s new or modified products merged", len(delta))
+    merged = remove_duplicates(pd.concat([previous_data, delta], ignore_index=True))
+    if isinstance(previous_data, gpd.GeoDataFrame):
+        merged = gpd.GeoDataFrame(merged, geometry="geometry", crs=previous_data.crs)
+    return merged
 
 
 def fetch_data_single_query(
@@ -318,6 +1001,16 @@ def fetch_data_single_query(
     password=None,
     cpt=None,
     headers=None,
+    paginate=False,
+    bisect_saturated=False,
+    min_timedelta_slice=DEFAULT_MIN_TIMEDELTA_SLICE,
+    split_saturated_areas=False,
+    min_split_area=DEFAULT_MIN_SPLIT_AREA,
+    plan_with_count=False,
+    max_pack_size=None,
+    max_url_length=DEFAULT_MAX_URL_LENGTH,
+    simplify_tolerance=None,
+    fields=None,
 ):
     """Executes fetching logic for a GeoDataFrame subset (single query ID).
 
@@ -329,12 +1022,22 @@ def fetch_data_single_query(
         min_sea_percent (float, optional): Threshold for sea coverage.
         top (int, optional): Max rows per query.
         cache_dir (str, optional): Path for local caching.
-        querymode (str): 'seq' or 'multi'. Defaults to 'seq'.
+        querymode (str): 'seq', 'multi' or 'async'. Defaults to 'seq'.
         timedelta_slice (datetime.timedelta, optional): Time-based slicing window.
         email (str, optional): Auth email.
         password (str, optional): Auth password.
         cpt (collections.defaultdict, optional): Counter for tracking query status.
         headers (dict, optional): Pre-obtained authentication headers. [optional]
+        paginate (bool): If True, follow OData pagination for each URL.
+        bisect_saturated (bool): If True, split recursively the saturated time windows.
+        min_timedelta_slice (datetime.timedelta): Minimum duration of a split window.
+        split_saturated_areas (bool): If True, split recursively the saturated areas.
+        min_split_area (float): Minimum bounding box area of a split area (deg²).
+        plan_with_count (bool): If True, size the time slices from `$count` requests.
+        max_pack_size (int, optional): Max number of areas OR-combined in one URL.
+        max_url_length (int): Max length of a URL.
+        simplify_tolerance (float, optional): Simplification tolerance of the polygons.
+        fields (list, optional): Product properties to fetch (see create_urls).
 
     Returns:
         tuple: (pd.DataFrame, dict)
@@ -343,21 +1046,202 @@ def fetch_data_single_query(
     """
     if cpt is None:
         cpt = defaultdict(int)
+    gdf_norm = None
+    if (bisect_saturated or plan_with_count) and timedelta_slice is None:
+        timedelta_slice = COARSE_TIMEDELTA_SLICE
     if gdf is not None and isinstance(gdf, gpd.GeoDataFrame):
         gdf_norm = normalize_gdf(
             gdf=gdf,
             timedelta_slice=timedelta_slice,
         )
+    collected_data, cpt = fetch_normalized_gdf(
+        gdf_norm=gdf_norm,
+        top=top,
+        cache_dir=cache_dir,
+        querymode=querymode,
+        email=email,
+        password=password,
+        cpt=cpt,
+        headers=headers,
+        paginate=paginate,
+        bisect_saturated=bisect_saturated,
+        min_timedelta_slice=min_timedelta_slice,
+        split_saturated_areas=split_saturated_areas,
+        min_split_area=min_split_area,
+        plan_with_count=plan_with_count,
+        max_pack_size=max_pack_size,
+        max_url_length=max_url_length,
+        simplify_tolerance=simplify_tolerance,
+        fields=fields,
+    )
+    full_data = post_process_results(collected_data, min_sea_percent=min_sea_percent)
+    return full_data, cpt
+
+
+def fetch_normalized_gdf(
+    gdf_norm,
+    top=None,
+    cache_dir=None,
+    querymode="seq",
+    email=None,
+    password=None,
+    cpt=None,
+    headers=None,
+    paginate=False,
+    bisect_saturated=False,
+    min_timedelta_slice=DEFAULT_MIN_TIMEDELTA_SLICE,
+    split_saturated_areas=False,
+    min_split_area=DEFAULT_MIN_SPLIT_AREA,
+    plan_with_count=False,
+    max_pack_size=None,
+    max_url_length=DEFAULT_MAX_URL_LENGTH,
+    simplify_tolerance=None,
+    fields=None,
+):
+    """Fetches all the rows of a normalized GeoDataFrame in a single work pool.
+
+    The rows may come from several queries: each result row is tagged with the
+    `id_original_query` of the row (time window) that found it.
+
+    Args:
+        gdf_norm (gpd.GeoDataFrame or None): Normalized (and sliced) query data.
+        top (int, optional): Max rows per query.
+        cache_dir (str, optional): Path for local caching.
+        querymode (str): 'seq', 'multi' or 'async'. Defaults to 'seq'.
+        email (str, optional): Auth email.
+        password (str, optional): Auth password.
+        cpt (collections.defaultdict, optional): Counter for tracking query status.
+        headers (dict, optional): Pre-obtained authentication headers.
+        paginate (bool): If True, follow OData pagination for each URL.
+        bisect_saturated (bool): If True, split recursively the saturated time windows.
+        min_timedelta_slice (datetime.timedelta): Minimum duration of a split window.
+        split_saturated_areas (bool): If True, split recursively the saturated areas.
+        min_split_area (float): Minimum bounding box area of a split area (deg²).
+        plan_with_count (bool): If True, size the time slices from `$count` requests,
+            then bisect the planned slices still saturated.
+        max_pack_size (int, optional): If greater than 1, the rows differing only by
+            their area are fetched by packs of up to `max_pack_size` areas.
+        max_url_length (int): Max length of a URL.
+        simplify_tolerance (float, optional): Simplification tolerance of the polygons.
+        fields (list, optional): Product properties to fetch (see create_urls).
+
+    Returns:
+        tuple: (pd.DataFrame, dict)
+            - pd.DataFrame: Raw results of all the rows (None if nothing found).
+            - dict: Updated status counters.
+    """
+    if cpt is None:
+        cpt = defaultdict(int)
+    collected_data = None
+    exact_gdf = None
+    if gdf_norm is not None:
+        if email and password and headers is None:
+            # a single token for the planning, the bisection or the packed requests
+            headers = get_access_token(email, password)
         logger.debug(gdf_norm.keys())
         logger.info(f"Length of input after slicing in time:{len(gdf_norm)}")
-        urls_plus_headers = create_urls(
-            gdf=gdf_norm, top=top, email=email, password=password, headers=headers
+        prepared_gdf, approximated = prepare_query_geometries(
+            gdf_norm,
+            simplify_tolerance=simplify_tolerance,
+            max_wkt_length=max_url_length - URL_LENGTH_RESERVED_FOR_FILTERS,
+        )
+        if approximated:
+            exact_gdf = gdf_norm
+        gdf_norm = prepared_gdf
+        if plan_with_count:
+            gdf_norm, cpt = plan_time_slices(
+                gdf=gdf_norm,
+                top=top,
+                headers=headers,
+                email=email,
+                password=password,
+                cpt=cpt,
+                querymode=querymode,
+            )
+    if (
+        bisect_saturated or split_saturated_areas or plan_with_count
+    ) and gdf_norm is not None:
+        # the planned slices assume evenly spread products: the dense ones are split
+        collected_data, cpt = fetch_data_bisecting_saturated_windows(
+            gdf=gdf_norm,
+            top=top,
+            cache_dir=cache_dir,
+            querymode=querymode,
+            cpt=cpt,
+            headers=headers,
+            paginate=paginate,
+            min_timedelta_slice=min_timedelta_slice,
+            split_time=bisect_saturated or plan_with_count,
+            split_space=split_saturated_areas,
+            min_split_area=min_split_area,
+            fields=fields,
+        )
+    elif max_pack_size is not None and max_pack_size > 1 and gdf_norm is not None:
+        collected_data, cpt = fetch_data_from_packed_urls(
+            urls_plus_headers=create_urls(
+                gdf=gdf_norm, top=top, headers=headers, fields=fields
+            ),
+            geometries=gdf_norm["geometry"].tolist(),
+            top=top,
+            cache_dir=cache_dir,
+            querymode=querymode,
+            cpt=cpt,
+            paginate=paginate,
+            max_pack_size=max_pack_size,
+            max_url_length=max_url_length,
+            expected_rows=estimate_expected_rows(gdf_norm),
         )
     else:
-        urls_plus_headers = {"urls": [], "headers": None}
+        urls_plus_headers = {"urls": [], "headers": headers}
+        if gdf_norm is not None:
+            urls_plus_headers = create_urls(
+                gdf=gdf_norm, top=top, headers=headers, fields=fields
+            )
+        collected_data, cpt = fetch_data_from_urls(
+            urls_plus_headers=urls_plus_headers,
+            cache_dir=cache_dir,
+            querymode=querymode,
+            cpt=cpt,
+            paginate=paginate,
+        )
+    if exact_gdf is not None and collected_data is not None:
+        collected_data = filter_on_exact_geometries(collected_data, exact_gdf)
+    return collected_data, cpt
+
+
+def fetch_data_from_urls(
+    urls_plus_headers,
+    cache_dir=None,
+    querymode="seq",
+    cpt=None,
+    paginate=False,
+    per_url=False,
+):
+    """Fetches meta-data from OData URLs with the fetcher of the given query mode.
+
+    Args:
+        urls_plus_headers (dict): Dict containing 'urls' (list) and 'headers' (dict).
+        cache_dir (str, optional): Path for local caching.
+        querymode (str): 'seq', 'multi' or 'async'. Defaults to 'seq'.
+        cpt (collections.defaultdict, optional): Status counters.
+        paginate (bool): If True, follow OData pagination for each URL.
+        per_url (bool): If True, return the answer of each URL instead of their
+            concatenation. Defaults to False.
+
+    Returns:
+        tuple: (pd.DataFrame, defaultdict)
+            - Concatenated results (None if nothing found), or with `per_url` a
+              list with one DataFrame (or None) per URL, in the order of the URLs.
+            - Updated status counters.
+    """
+    collected_data = None
     if querymode == "seq":
         collected_data, cpt = fetch_data_from_urls_sequential(
-            urls_plus_headers=urls_plus_headers, cache_dir=cache_dir, cpt=cpt
+            urls_plus_headers=urls_plus_headers,
+            cache_dir=cache_dir,
+            cpt=cpt,
+            paginate=paginate,
+            per_url=per_url,
         )
 
     elif querymode == "multi":
@@ -368,92 +1252,566 @@ def fetch_data_single_query(
             cache_dir=cache_dir,
             max_workers=maxworker,
             cpt=cpt,
+            paginate=paginate,
+            per_url=per_url,
         )
-    if collected_data is not None and collected_data.empty is False:
-        data_dedup = remove_duplicates(safes_ori=collected_data)
-        logger.info(
-            "number of product after removing duplicates: %s", len(data_dedup["Name"])
-        )
-        full_data = multy_to_poly(collected_data=data_dedup)
-        logger.info(
-            "number of product after removing multipolygon: %s", len(full_data["Name"])
+    elif querymode == "async":
+        collected_data, cpt = fetch_data_from_urls_async(
+            urls_plus_headers=urls_plus_headers,
+            cache_dir=cache_dir,
+            cpt=cpt,
+            paginate=paginate,
+            per_url=per_url,
         )
-        if min_sea_percent is not None:
-            full_data = sea_percent(
-                collected_data=full_data, min_sea_percent=min_sea_percent
-            )
-            logger.info(
-                "number of product after adding sea percent: %s", len(full_data["Name"])
-            )
-    else:
-        full_data = collected_data
+    return collected_data, cpt
 
-    return full_data, cpt
 
+def fetch_data_from_packed_urls(
+    urls_plus_headers,
+    geometries,
+    top=None,
+    cache_dir=None,
+    querymode="seq",
+    cpt=None,
+    paginate=False,
+    max_pack_size=DEFAULT_MAX_PACK_SIZE,
+    max_url_length=DEFAULT_MAX_URL_LENGTH,
+    expected_rows=None,
+):
+    """Fetches meta-data with one request per pack of areas instead of one per area.
 
-def apply_slicing_time_to_gdf(gdf, timedelta_slice=None):
-    """Slices a GeoDataFrame into multiple time windows.
+    The URLs differing only by their area are OR-combined (see pack_urls), then the
+    products of each packed answer are given back to the areas whose geometry
+    intersects their footprint (see unpack_answer). A pack whose answer reaches the
+    row cap (`top`, or the `$skip` limit when paginating) may be incomplete: its
+    areas are queried again one by one.
 
     Args:
-        gdf (gpd.GeoDataFrame): GeoDataFrame with 'start_datetime' and 'end_datetime'.
-        timedelta_slice (datetime.timedelta, optional): The time window to slice by.
+        urls_plus_headers (dict): Dict containing 'urls' (list) and 'headers' (dict).
+        geometries (list): shapely geometry of each URL, in the order of the URLs.
+        top (int, optional): Max rows per query. Defaults to 1000.
+        cache_dir (str, optional): Path for local caching.
+        querymode (str): 'seq', 'multi' or 'async'. Defaults to 'seq'.
+        cpt (collections.defaultdict, optional): Status counters.
+        paginate (bool): If True, follow OData pagination for each URL.
+        max_pack_size (int): Max number of areas combined in one URL.
+        max_url_length (int): Max length of a packed URL.
+        expected_rows (list, optional): Expected number of products of each URL
+            (see estimate_expected_rows): a pack is expected to return less than
+            `DEFAULT_PLANNING_FILL_RATIO * top` products.
 
     Returns:
-        gpd.GeoDataFrame: A GeoDataFrame containing expanded rows for each time slice.
+        tuple: (pd.DataFrame, defaultdict)
+            - Concatenated results (None if nothing found).
+            - Updated status counters.
     """
-    gdf_slices = gdf
-
-    # slice
-    if timedelta_slice is not None:
-        mindate = gdf["start_datetime"].min()
-        maxdate = gdf["end_datetime"].max()
-        # those index will need to be time expanded
-        idx_to_expand = gdf.index[
-            (gdf["end_datetime"] - gdf["start_datetime"]) > timedelta_slice
+    if cpt is None:
+        cpt = defaultdict(int)
+    if top is None:
+        top = DEFAULT_TOP_ROWS_PER_QUERY
+    row_cap = ODATA_MAX_SKIP + int(top) if paginate else int(top)
+    urls = urls_plus_headers["urls"]
+    headers = urls_plus_headers["headers"]
+    packs = pack_urls(
+        urls,
+        max_pack_size,
+        max_url_length=max_url_length,
+        expected_rows=expected_rows,
+        max_pack_rows=max(1, int(int(top) * DEFAULT_PLANNING_FILL_RATIO)),
+    )
+    logger.info("%s URLs packed in %s requests", len(urls), len(packs))
+    cpt["packed_requests"] += len(packs)
+    nb_failed = len(get_failed_urls(cpt))
+    nb_truncated = len(get_truncated_urls(cpt))
+    answers, cpt = fetch_data_from_urls(
+        urls_plus_headers={
+            "urls": [(ipack, url) for ipack, (url, _) in enumerate(packs)],
+            "headers": headers,
+        },
+        cache_dir=cache_dir,
+        querymode=querymode,
+        cpt=cpt,
+        paginate=paginate,
+        per_url=True,
+    )
+    if len(get_failed_urls(cpt)) > nb_failed:
+        # a failed pack is reported as the URLs of its areas
+        failed_packs = cpt["failed_urls"][nb_failed:]
+        cpt["failed_urls"][nb_failed:] = [
+            urls[position] for ipack, _ in failed_packs for position in packs[ipack][1]
         ]
-        # TO make sure that date does not contain future date
-        if maxdate > datetime.datetime.now(datetime.UTC):
-            maxdate = datetime.datetime.now(datetime.UTC) + datetime.timedelta(days=1)
-
-        if (mindate == mindate) and (maxdate == maxdate):  # non nan
-            gdf_slices = []
-            slice_begin = mindate
-            slice_end = slice_begin
-            islice = 0
-            while slice_end < maxdate:
-                islice += 1
-                slice_end = slice_begin + timedelta_slice
-                # this is time grouping
-                gdf_slice = gdf[
-                    (gdf["start_datetime"] >= slice_begin)
-                    & (gdf["end_datetime"] <= slice_end)
-                ]
-                for to_expand in idx_to_expand:
-                    # missings index in gdf_slice.
-                    # check if there is time overlap.
-                    latest_start = max(gdf.loc[to_expand].start_datetime, slice_begin)
-                    earliest_end = min(gdf.loc[to_expand].end_datetime, slice_end)
-                    overlap = earliest_end - latest_start
-                    if overlap >= datetime.timedelta(0):
-                        gdf_slice = pd.concat(
-                            [gdf_slice, gpd.GeoDataFrame(gdf.loc[to_expand]).T]
-                        )
-                        gdf_slice.loc[to_expand, "start_datetime"] = latest_start
-                        gdf_slice.loc[to_expand, "end_datetime"] = earliest_end
-                if not gdf_slice.empty:
-                    gdf_slices.append(gdf_slice)
-                slice_begin = slice_end
-    if len(gdf_slices) > 0:
-        gdf_norm = gpd.GeoDataFrame(
-            pd.concat(gdf_slices, ignore_index=False), crs=gdf_slices[0].crs
+    if len(get_truncated_urls(cpt)) > nb_truncated:
+        # a truncated pack of several areas is queried again area by area below
+        truncated_packs = cpt["truncated_urls"][nb_truncated:]
+        cpt["truncated_urls"][nb_truncated:] = [
+            urls[packs[ipack][1][0]]
+            for ipack, _ in truncated_packs
+            if len(packs[ipack][1]) == 1
+        ]
+    collected_data_x = []
+    urls_unpacked = []
+    for ipack, (_, positions) in enumerate(packs):
+        if answers[ipack] is None or answers[ipack].empty:
+            continue
+        if len(positions) > 1 and len(answers[ipack]) >= row_cap:
+            cpt["packs_saturated"] += 1
+            urls_unpacked.extend(urls[position] for position in positions)
+            continue
+        collected_data_x.append(
+            unpack_answer(
+                answers[ipack],
+                tags=[urls[position][0] for position in positions],
+                geometries=[geometries[position] for position in positions],
+                cpt=cpt,
+            )
         )
-    else:
-        gdf_norm = gdf
-    return gdf_norm
+    if len(urls_unpacked) > 0:
+        logger.info("%s areas of saturated packs queried again", len(urls_unpacked))
+        fetched, cpt = fetch_data_from_urls(
+            urls_plus_headers={"urls": urls_unpacked, "headers": headers},
+            cache_dir=cache_dir,
+            querymode=querymode,
+            cpt=cpt,
+            paginate=paginate,
+        )
+        if fetched is not None:
+            collected_data_x.append(fetched)
+    return concat_results(collected_data_x), cpt
 
 
-def normalize_gdf(
-    gdf,
+def post_process_results(collected_data, min_sea_percent=None):
+    """Post-processes the raw results of a query.
+
+    Removes the duplicated products, converts the footprints to polygons and
+    optionally filters the products on their sea percent.
+
+    Args:
+        collected_data (pd.DataFrame or None): Raw results of a query.
+        min_sea_percent (float, optional): Threshold for sea coverage.
+
+    Returns:
+        pd.DataFrame or None: Post-processed results (`collected_data` if empty).
+    """
+    if collected_data is None or collected_data.empty:
+        return collected_data
+    data_dedup = remove_duplicates(safes_ori=collected_data)
+    logger.info(
+        "number of product after removing duplicates: %s", len(data_dedup["Name"])
+    )
+    full_data = multy_to_poly(collected_data=data_dedup)
+    logger.info(
+        "number of product after removing multipolygon: %s", len(full_data["Name"])
+    )
+    if min_sea_percent is not None:
+        full_data = sea_percent(
+            collected_data=full_data, min_sea_percent=min_sea_percent
+        )
+        logger.info(
+            "number of product after adding sea percent: %s", len(full_data["Name"])
+        )
+    return full_data
+
+
+def apply_slicing_time_to_gdf(gdf, timedelta_slice=None):
+    """Slices a GeoDataFrame into multiple time windows.
+
+    The period covered by the GeoDataFrame is cut in consecutive slices of
+    `timedelta_slice`. A row contained in one slice is kept as is, a longer row
+    (or a row crossing a slice boundary) is cut into one row per slice it overlaps
+    with a positive duration. The pieces starting at a slice boundary start
+    inclusively ('start_inclusive' column, see create_urls), so that a product
+    starting exactly at the boundary is found once. The rows are expanded at once
+    with array arithmetic, so the cost is linear in the number of output rows.
+
+    Unlike the former slice by slice loop, a short row crossing a boundary is cut
+    instead of being dropped, and a row touching a slice only at its boundary does
+    not give an empty window in that slice.
+
+    Args:
+        gdf (gpd.GeoDataFrame): GeoDataFrame with 'start_datetime' and 'end_datetime'.
+        timedelta_slice (datetime.timedelta, optional): The time window to slice by.
+
+    Returns:
+        gpd.GeoDataFrame: A GeoDataFrame containing expanded rows for each time slice,
+            ordered by slice, the original index being kept.
+    """
+    if timedelta_slice is None:
+        return gdf
+    mindate = gdf["start_datetime"].min()
+    maxdate = gdf["end_datetime"].max()
+    if not ((mindate == mindate) and (maxdate == maxdate)):  # nan
+        return gdf
+    # TO make sure that date does not contain future date
+    now = datetime.datetime.now(datetime.UTC)
+    if pd.Timestamp(maxdate).tzinfo is None:
+        now = now.replace(tzinfo=None)
+    if maxdate > now:
+        maxdate = now + datetime.timedelta(days=1)
+    step = pd.Timedelta(timedelta_slice).value  # ns
+    origin = pd.Timestamp(mindate).value
+    nb_slices = math.ceil((pd.Timestamp(maxdate).value - origin) / step)
+    if nb_slices <= 0:
+        return gdf
+
+    start_column = pd.to_datetime(gdf["start_datetime"])
+    end_column = pd.to_datetime(gdf["end_datetime"])
+    valid = (start_column.notna() & end_column.notna()).to_numpy()
+    starts = np.where(
+        valid, start_column.to_numpy(dtype="datetime64[ns]").view(np.int64) - origin, 0
+    )
+    ends = np.where(
+        valid, end_column.to_numpy(dtype="datetime64[ns]").view(np.int64) - origin, 0
+    )
+    # rows contained in a slice are kept whole, in the first slice containing them
+    first_slice = np.floor_divide(starts, step)
+    contained = valid & (ends <= (first_slice + 1) * step) & (first_slice < nb_slices)
+    # other rows are cut in the slices they overlap (overlap of positive duration)
+    last_slice = np.minimum(-np.floor_divide(-ends, step) - 1, nb_slices - 1)
+    first_cut = np.maximum(first_slice, 0)
+    nb_pieces = np.where(
+        contained, 1, np.where(valid, np.maximum(last_slice - first_cut + 1, 0), 0)
+    )
+    positions = np.repeat(np.arange(len(gdf)), nb_pieces)
+    offsets = np.arange(len(positions)) - np.repeat(
+        np.cumsum(nb_pieces) - nb_pieces, nb_pieces
+    )
+    slice_index = np.where(
+        contained[positions], first_slice[positions], first_cut[positions] + offsets
+    )
+    is_cut = ~contained[positions]
+    piece_starts = np.where(
+        is_cut, np.maximum(starts[positions], slice_index * step), starts[positions]
+    )
+    piece_ends = np.where(
+        is_cut, np.minimum(ends[positions], (slice_index + 1) * step), ends[positions]
+    )
+    # same order as slicing one slice after the other: contained rows, then cut rows
+    order = np.lexsort((positions, is_cut, slice_index))
+    gdf_norm = gdf.iloc[positions[order]].copy()
+    at_boundary = is_cut & (piece_starts > starts[positions])
+    if at_boundary.any():
+        gdf_norm["start_inclusive"] = (
+            at_boundary | is_start_inclusive(gdf)[positions]
+        )[order]
+    for column, like, values in (
+        ("start_datetime", start_column, piece_starts[order]),
+        ("end_datetime", end_column, piece_ends[order]),
+    ):
+        values = pd.DatetimeIndex((values + origin).astype("datetime64[ns]"))
+        if like.dt.tz is not None:
+            values = values.tz_localize("UTC").tz_convert(like.dt.tz)
+        gdf_norm[column] = values.as_unit(like.dt.unit)
+    return gdf_norm
+
+
+def split_time_windows(gdf):
+    """Splits each time window of a GeoDataFrame in two halves.
+
+    The middle of each window is floored to the second, since OData URLs
+    are built with a one second precision. The second halves start at the
+    middle inclusively ('start_inclusive' column, see create_urls), so that a
+    product starting exactly at the middle is found by one half.
+
+    Args:
+        gdf (gpd.GeoDataFrame): GeoDataFrame with 'start_datetime' and 'end_datetime'.
+
+    Returns:
+        gpd.GeoDataFrame: Twice as many rows, the first halves then the second halves.
+    """
+    middle = (
+        gdf["start_datetime"] + (gdf["end_datetime"] - gdf["start_datetime"]) / 2
+    ).dt.floor("s")
+    first_halves = gdf.copy()
+    first_halves["end_datetime"] = middle
+    first_halves["start_inclusive"] = is_start_inclusive(gdf)
+    second_halves = gdf.copy()
+    second_halves["start_datetime"] = middle
+    second_halves["start_inclusive"] = True
+    return gpd.GeoDataFrame(
+        pd.concat([first_halves, second_halves]), crs=gdf.crs, geometry="geometry"
+    )
+
+
+def split_time_windows_in(gdf, nb_slices):
+    """Splits each time window of a GeoDataFrame in a given number of equal slices.
+
+    The slices after the first one start inclusively ('start_inclusive' column,
+    see create_urls): a product starting exactly at a cut is found by one slice.
+
+    Args:
+        gdf (gpd.GeoDataFrame): GeoDataFrame with 'start_datetime' and 'end_datetime'.
+        nb_slices (array-like of int): Number of slices for each row, rows with 0
+            slice are dropped.
+
+    Returns:
+        gpd.GeoDataFrame: The sliced GeoDataFrame, slices of a row being consecutive.
+    """
+    nb_slices = np.asarray(nb_slices, dtype=int)
+    positions = np.repeat(np.arange(len(gdf)), nb_slices)
+    rank = np.arange(len(positions)) - np.repeat(
+        np.cumsum(nb_slices) - nb_slices, nb_slices
+    )
+    sliced = gdf.iloc[positions].copy()
+    start = sliced["start_datetime"]
+    duration = sliced["end_datetime"] - start
+    slice_start = (start + duration * (rank / nb_slices[positions])).dt.floor("s")
+    slice_end = (start + duration * ((rank + 1) / nb_slices[positions])).dt.floor("s")
+    last = rank == nb_slices[positions] - 1
+    sliced["start_datetime"] = slice_start.where(rank != 0, start)
+    sliced["end_datetime"] = slice_end.where(~last, sliced["end_datetime"])
+    sliced["start_inclusive"] = (rank != 0) | is_start_inclusive(sliced)
+    return sliced
+
+
+def is_start_inclusive(gdf):
+    """Tells which rows have an inclusive start ('ge' instead of 'gt' filter).
+
+    Args:
+        gdf (gpd.GeoDataFrame): Query data, with an optional 'start_inclusive' column.
+
+    Returns:
+        np.ndarray: Boolean per row, False where the column is absent or missing.
+    """
+    if "start_inclusive" not in gdf:
+        return np.zeros(len(gdf), dtype=bool)
+    return gdf["start_inclusive"].eq(True).to_numpy()
+
+
+def split_areas(gdf):
+    """Splits the area of each row in the four quadrants of its bounding box.
+
+    Each quadrant is clipped to the area (quadtree), the clipped pieces being
+    decomposed in polygons since the OData filters only take single polygons.
+    Empty pieces (quadrants outside a concave area) are dropped.
+
+    Args:
+        gdf (gpd.GeoDataFrame): GeoDataFrame with polygon geometries.
+
+    Returns:
+        gpd.GeoDataFrame: One row per piece, pieces of a row being consecutive.
+    """
+    geometries = np.asarray(gdf["geometry"], dtype=object)
+    xmin, ymin, xmax, ymax = shapely.bounds(geometries).T
+    xmid = (xmin + xmax) / 2
+    ymid = (ymin + ymax) / 2
+    pieces_x = []
+    positions_x = []
+    for quadrant in (
+        shapely.box(xmin, ymin, xmid, ymid),
+        shapely.box(xmid, ymin, xmax, ymid),
+        shapely.box(xmin, ymid, xmid, ymax),
+        shapely.box(xmid, ymid, xmax, ymax),
+    ):
+        pieces, positions = shapely.get_parts(
+            shapely.intersection(geometries, quadrant), return_index=True
+        )
+        keep = (shapely.get_type_id(pieces) == shapely.GeometryType.POLYGON) & (
+            shapely.area(pieces) > 0
+        )
+        pieces_x.append(pieces[keep])
+        positions_x.append(positions[keep])
+    pieces = np.concatenate(pieces_x)
+    positions = np.concatenate(positions_x)
+    order = np.argsort(positions, kind="stable")
+    split = gdf.iloc[positions[order]].copy()
+    split["geometry"] = pieces[order]
+    return split
+
+
+def plan_time_slices(
+    gdf,
+    top=None,
+    headers=None,
+    email=None,
+    password=None,
+    cpt=None,
+    fill_ratio=DEFAULT_PLANNING_FILL_RATIO,
+    querymode="seq",
+):
+    """Sizes the time slices of a query from the number of products to expect.
+
+    One `$count` request (no product returned) is issued per row, then each row
+    is sliced in as many equal time windows as needed for each data request to
+    return less than `fill_ratio * top` products. Rows without products are
+    dropped since there is nothing to fetch. The products are not spread evenly
+    in time: the planned slices are meant to be fetched by
+    fetch_data_bisecting_saturated_windows, which splits the dense ones again.
+    A row whose probe failed is kept as it is.
+
+    Args:
+        gdf (gpd.GeoDataFrame): Normalized query data, typically with coarse windows.
+        top (int, optional): Max rows per query. Defaults to 1000.
+        headers (dict, optional): Authentication headers.
+        email (str, optional): Auth email.
+        password (str, optional): Auth password.
+        cpt (collections.defaultdict, optional): Status counters.
+        fill_ratio (float): Targeted fraction of the row cap. Defaults to 0.9.
+        querymode (str): 'seq', 'multi' or 'async' fetcher of the `$count`
+            requests. Defaults to 'seq'.
+
+    Returns:
+        tuple: (gpd.GeoDataFrame, defaultdict)
+            - The planned GeoDataFrame.
+            - Updated status counters.
+    """
+    if cpt is None:
+        cpt = defaultdict(int)
+    if top is None:
+        top = DEFAULT_TOP_ROWS_PER_QUERY
+    rows_per_slice = max(1, int(int(top) * fill_ratio))
+    count_urls = create_urls(
+        gdf=gdf, email=email, password=password, headers=headers, count=True
+    )
+    pages, cpt = fetch_pages_from_urls(count_urls, querymode=querymode, cpt=cpt)
+    cpt["count_probes"] += len(pages)
+    counts = []
+    failed_probes = []
+    for (_, url), json_data in zip(count_urls["urls"], pages):
+        if json_data is None or "@odata.count" not in json_data:
+            # unknown density -> keep the window as it is
+            failed_probes.append(url)
+            counts.append(rows_per_slice)
+        else:
+            counts.append(int(json_data["@odata.count"]))
+    if len(failed_probes) > 0:
+        cpt["count_probes_failed"] += len(failed_probes)
+        logger.warning(
+            "%s $count requests failed, their windows are not sliced: %s",
+            len(failed_probes),
+            failed_probes,
+        )
+    nb_slices = [math.ceil(count / rows_per_slice) for count in counts]
+    planned = split_time_windows_in(gdf, nb_slices)
+    logger.info(
+        "planning: %s products expected, %s data requests (~%1.1f sec at %s req/s)",
+        sum(counts),
+        len(planned),
+        len(planned) / REQUESTS_PER_SECOND,
+        REQUESTS_PER_SECOND,
+    )
+    return planned, cpt
+
+
+def fetch_data_bisecting_saturated_windows(
+    gdf,
+    top=None,
+    cache_dir=None,
+    querymode="seq",
+    cpt=None,
+    headers=None,
+    paginate=False,
+    min_timedelta_slice=DEFAULT_MIN_TIMEDELTA_SLICE,
+    min_split_area=DEFAULT_MIN_SPLIT_AREA,
+    split_time=True,
+    split_space=False,
+    fields=None,
+):
+    """Fetches meta-data, splitting the requests that hit the row cap.
+
+    Each row of the normalized GeoDataFrame is queried. Rows whose answer
+    reaches the row cap (`top`, or the `$skip` limit when paginating) are
+    considered incomplete: their answer is dropped and the request is split,
+    until every request is complete or cannot be split anymore:
+
+    - with `split_space`, the area is split in four quadrants of its bounding box
+      (clipped to the area) while this box is larger than `min_split_area`,
+    - then, with `split_time`, the time window is split in two halves while it is
+      longer than twice `min_timedelta_slice`.
+
+    Args:
+        gdf (gpd.GeoDataFrame): Normalized query data.
+        top (int, optional): Max rows per query. Defaults to 1000.
+        cache_dir (str, optional): Path for local caching.
+        querymode (str): 'seq', 'multi' or 'async'. Defaults to 'seq'.
+        cpt (collections.defaultdict, optional): Status counters.
+        headers (dict, optional): Authentication headers.
+        paginate (bool): If True, follow OData pagination for each URL.
+        min_timedelta_slice (datetime.timedelta): Minimum duration of a split window.
+        min_split_area (float): Minimum bounding box area of a split area (deg²).
+        split_time (bool): If True, split the time window of the saturated requests.
+            Defaults to True.
+        split_space (bool): If True, split the area of the saturated requests first.
+            Defaults to False.
+        fields (list, optional): Product properties to fetch (see create_urls).
+
+    Returns:
+        tuple: (pd.DataFrame, defaultdict)
+            - Concatenated results (None if nothing found).
+            - Updated status counters.
+    """
+    if cpt is None:
+        cpt = defaultdict(int)
+    if top is None:
+        top = DEFAULT_TOP_ROWS_PER_QUERY
+    top = int(top)
+    row_cap = ODATA_MAX_SKIP + top if paginate else top
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+    collected_data_x = []
+    pending = gdf
+    while len(pending) > 0:
+        urls_plus_headers = create_urls(
+            gdf=pending, top=top, headers=headers, fields=fields
+        )
+        results, cpt = fetch_data_from_urls(
+            urls_plus_headers=urls_plus_headers,
+            cache_dir=cache_dir,
+            querymode=querymode,
+            cpt=cpt,
+            paginate=paginate,
+            per_url=True,
+        )
+        durations = pending["end_datetime"] - pending["start_datetime"]
+        xmin, ymin, xmax, ymax = shapely.bounds(
+            np.asarray(pending["geometry"], dtype=object)
+        ).T
+        splittable_in_space = split_space & (
+            (xmax - xmin) * (ymax - ymin) >= min_split_area
+        )
+        splittable_in_time = (
+            split_time & (durations >= 2 * min_timedelta_slice).to_numpy()
+        )
+        saturated_areas = []
+        saturated_windows = []
+        for pos, collected_data in enumerate(results):
+            if collected_data is None or collected_data.empty:
+                continue
+            if len(collected_data) >= row_cap:
+                if splittable_in_space[pos]:
+                    saturated_areas.append(pos)
+                    continue
+                if splittable_in_time[pos]:
+                    saturated_windows.append(pos)
+                    continue
+                logger.warning(
+                    "time window %s -> %s still saturated but not split below %s",
+                    pending["start_datetime"].iloc[pos],
+                    pending["end_datetime"].iloc[pos],
+                    min_timedelta_slice,
+                )
+            collected_data_x.append(collected_data)
+        cpt["areas_split"] += len(saturated_areas)
+        cpt["windows_bisected"] += len(saturated_windows)
+        if len(get_truncated_urls(cpt)) > 0:
+            # the split requests are complete once their pieces are
+            split_urls = {
+                urls_plus_headers["urls"][pos]
+                for pos in saturated_areas + saturated_windows
+            }
+            cpt["truncated_urls"] = [
+                url for url in get_truncated_urls(cpt) if url not in split_urls
+            ]
+        pending = pd.concat(
+            [
+                split_areas(pending.iloc[saturated_areas]),
+                split_time_windows(pending.iloc[saturated_windows]),
+            ]
+        )
+    return concat_results(collected_data_x), cpt
+
+
+def normalize_gdf(
+    gdf,
     timedelta_slice=None,
 ):
     """Standardizes input column names and geometry for the fetching logic.
@@ -494,12 +1852,7 @@ def normalize_gdf(
 
     start_time = time.time()
     default_timedelta_slice = datetime.timedelta(weeks=1)
-    if "startdate" in gdf:
-        gdf.rename(columns={"startdate": "start_datetime"}, inplace=True)
-    if "stopdate" in gdf:
-        gdf.rename(columns={"stopdate": "end_datetime"}, inplace=True)
-    if "geofeature" in gdf:
-        gdf.rename(columns={"geofeature": "geometry"}, inplace=True)
+    gdf.rename(columns=QUERY_COLUMN_ALIASES, inplace=True)
 
     if timedelta_slice is None:
         timedelta_slice = default_timedelta_slice
@@ -553,7 +1906,221 @@ def normalize_gdf(
     return gdf_norm_sliced
 
 
-def create_urls(gdf, top=None, email=None, password=None, headers=None):
+def _encoded_wkt_length(wkts):
+    """Length of WKT strings once in a URL (spaces are percent-encoded as %20)."""
+    return np.array([len(value) + 2 * value.count(" ") for value in wkts], dtype=int)
+
+
+def _cover_polygon(polygon, tolerance, max_wkt_length):
+    """Returns a polygon covering `polygon` whose WKT fits in `max_wkt_length`.
+
+    The polygon is buffered then simplified by the same tolerance, so that the
+    simplified outline stays outside the original one. The tolerance is doubled
+    until the WKT is short enough, the convex hull then the bounding box being
+    the last resorts.
+    """
+    if tolerance is None:
+        xmin, ymin, xmax, ymax = polygon.bounds
+        tolerance = max(xmax - xmin, ymax - ymin) / 1000
+    for _ in range(10):
+        candidate = shapely.simplify(
+            shapely.buffer(polygon, tolerance, quad_segs=1, join_style="mitre"),
+            tolerance,
+        )
+        # the holes are not sent to CDSE (see create_urls)
+        candidate = shapely.polygons(shapely.get_exterior_ring(candidate))
+        if _encoded_wkt_length([candidate.wkt])[0] <= max_wkt_length:
+            return candidate
+        tolerance *= 2
+    candidate = polygon.convex_hull
+    if _encoded_wkt_length([candidate.wkt])[0] <= max_wkt_length:
+        return candidate
+    return shapely.box(*polygon.bounds)
+
+
+def prepare_query_geometries(
+    gdf,
+    simplify_tolerance=None,
+    max_wkt_length=DEFAULT_MAX_URL_LENGTH - URL_LENGTH_RESERVED_FOR_FILTERS,
+    max_parts=DEFAULT_MAX_GEOMETRY_PARTS,
+):
+    """Turns the query geometries into areas the OData filters can take.
+
+    OData `Intersects` filters are built for points and polygons only (see
+    create_urls), with the full coordinates in the URL:
+
+    - MultiPoints and MultiPolygons are decomposed in one row per part, or
+      replaced by their convex hull when they have more than `max_parts` parts,
+    - other geometries (lines, collections) are replaced by their bounding box,
+    - polygons are simplified with `simplify_tolerance`, and the polygons whose
+      WKT is longer than `max_wkt_length` with an increasing tolerance, the
+      simplified polygons covering the original ones.
+
+    Approximated areas return more products than the exact ones: they have to
+    be filtered afterwards (see filter_on_exact_geometries).
+
+    Args:
+        gdf (gpd.GeoDataFrame): Normalized query data.
+        simplify_tolerance (float, optional): Simplification tolerance (degrees) of
+            every polygon. Defaults to None (only the too long polygons).
+        max_wkt_length (int): Max length of a polygon WKT in a URL.
+        max_parts (int): Max number of rows a multi-part geometry is decomposed in.
+
+    Returns:
+        tuple: (gpd.GeoDataFrame, bool)
+            - The query data, with one row per part of the multi-part geometries.
+            - True if some areas are approximations of the original geometries.
+    """
+    geometries = np.asarray(gdf["geometry"], dtype=object)
+    type_ids = shapely.get_type_id(geometries)
+    is_point = type_ids == shapely.GeometryType.POINT
+    is_polygon = type_ids == shapely.GeometryType.POLYGON
+    is_multi = np.isin(
+        type_ids, [shapely.GeometryType.MULTIPOINT, shapely.GeometryType.MULTIPOLYGON]
+    )
+    # rows without geometry are kept as they are (no spatial filter)
+    is_missing = shapely.is_missing(geometries)
+    if simplify_tolerance is None and (is_point | is_polygon | is_missing).all():
+        too_long = _encoded_wkt_length(
+            shapely.to_wkt(geometries[is_polygon], rounding_precision=-1)
+        )
+        if (too_long <= max_wkt_length).all():
+            return gdf, False
+    approximated = np.zeros(len(geometries), dtype=bool)
+    prepared = geometries.copy()
+    hull = is_multi & (shapely.get_num_geometries(geometries) > max_parts)
+    prepared[hull] = shapely.convex_hull(geometries[hull])
+    other = ~(is_point | is_polygon | is_multi | is_missing)
+    prepared[other] = shapely.box(*shapely.bounds(geometries[other]).T)
+    approximated |= hull | other
+    # flat hulls or boxes (aligned points, straight lines): thin polygon around them
+    flat = approximated & (shapely.area(prepared) == 0)
+    prepared[flat] = shapely.buffer(prepared[flat], 1e-4, quad_segs=1)
+    # one row per part (single geometries are their own part)
+    parts, positions = shapely.get_parts(prepared, return_index=True)
+    parts = np.concatenate([parts, np.full(is_missing.sum(), None, dtype=object)])
+    positions = np.concatenate([positions, np.flatnonzero(is_missing)])
+    order = np.argsort(positions, kind="stable")
+    parts, positions = parts[order], positions[order]
+    approximated = approximated[positions]
+    wkt_lengths = np.zeros(len(parts), dtype=int)
+    polygons = np.flatnonzero(
+        shapely.get_type_id(parts) == shapely.GeometryType.POLYGON
+    )
+    wkt_lengths[polygons] = _encoded_wkt_length(
+        shapely.to_wkt(parts[polygons], rounding_precision=-1)
+    )
+    for ipart in polygons:
+        if simplify_tolerance is not None or wkt_lengths[ipart] > max_wkt_length:
+            parts[ipart] = _cover_polygon(
+                parts[ipart], simplify_tolerance, max_wkt_length
+            )
+            approximated[ipart] = True
+    if len(parts) != len(geometries):
+        logger.info(
+            "%s query geometries decomposed in %s parts", len(geometries), len(parts)
+        )
+    if approximated.any():
+        logger.info("%s query geometries approximated", approximated.sum())
+    prepared_gdf = gdf.iloc[positions].copy()
+    prepared_gdf["geometry"] = parts
+    return prepared_gdf, bool(approximated.any())
+
+
+def filter_on_exact_geometries(collected_data, gdf):
+    """Keeps the products intersecting the exact geometry of their query.
+
+    Args:
+        collected_data (pd.DataFrame): Raw results, with 'Footprint' and
+            'id_original_query'.
+        gdf (gpd.GeoDataFrame): Query data with the exact geometries.
+
+    Returns:
+        pd.DataFrame: The products intersecting at least one geometry of the rows
+            with their `id_original_query` (products without footprint are kept).
+    """
+    footprints = footprints_to_geometries(collected_data["Footprint"])
+    product_idx, row_idx = shapely.STRtree(
+        np.asarray(gdf["geometry"], dtype=object)
+    ).query(footprints, predicate="intersects")
+    same_query = (
+        collected_data["id_original_query"].to_numpy()[product_idx]
+        == gdf["id_original_query"].to_numpy()[row_idx]
+    )
+    keep = shapely.is_missing(footprints)
+    keep[product_idx[same_query]] = True
+    logger.info("%s products outside the exact query geometries removed", (~keep).sum())
+    return collected_data[keep]
+
+
+def _format_column(values, formatter):
+    """Formats the non-null values of a column, None for the null ones.
+
+    Args:
+        values (pd.Series): Column of the query GeoDataFrame.
+        formatter (callable): Function formatting one value.
+
+    Returns:
+        list: Formatted values (str) or None.
+    """
+    notna = values.notna().to_numpy()
+    return [
+        formatter(value) if keep else None
+        for value, keep in zip(values.tolist(), notna)
+    ]
+
+
+def _format_datetime_column(values, unit="s"):
+    """Formats a column of datetimes as ISO 8601 (wall time, no time zone), None for the null ones.
+
+    Args:
+        values (pd.Series): Column of datetimes (datetime64 or objects).
+        unit (str): 's' -> YYYY-MM-DDTHH:MM:SS, 'ms' -> YYYY-MM-DDTHH:MM:SS.fff
+            (truncated, not rounded). Defaults to 's'.
+
+    Returns:
+        list: Formatted datetimes (str) or None.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        if getattr(values.dt, "tz", None) is not None:
+            values = values.dt.tz_localize(None)
+        notna = values.notna().to_numpy()
+        formatted = np.datetime_as_string(
+            values.to_numpy(dtype="datetime64[ns]").astype(f"datetime64[{unit}]"),
+            unit=unit,
+        )
+        return [
+            value if keep else None for value, keep in zip(formatted.tolist(), notna)
+        ]
+    fmt = "%Y-%m-%dT%H:%M:%S" if unit == "s" else "%Y-%m-%dT%H:%M:%S.%f"
+    nb_chars = 19 if unit == "s" else 23
+    return _format_column(values, lambda value: value.strftime(fmt)[:nb_chars])
+
+
+def select_fields(fields):
+    """Returns the OData properties to `$select` for the requested fields.
+
+    The properties needed by the post-processing (deduplication, footprint
+    geometry, local time filters) are always added. "geometry" stands for
+    "Footprint", "Attributes" is expanded instead of selected.
+
+    Args:
+        fields (list): Requested fields, e.g. ["Id", "Name", "S3Path", "geometry"].
+
+    Returns:
+        list: The OData properties, in a stable order.
+    """
+    selected = list(REQUIRED_FIELDS)
+    for field in fields:
+        field = "Footprint" if field == "geometry" else field
+        if field not in selected and field not in ("Attributes", "id_original_query"):
+            selected.append(field)
+    return selected
+
+
+def create_urls(
+    gdf, top=None, email=None, password=None, headers=None, count=False, fields=None
+):
     """Constructs OData query URLs based on GeoDataFrame attributes.
 
     Args:
@@ -562,6 +2129,11 @@ def create_urls(gdf, top=None, email=None, password=None, headers=None):
         email (str, optional): Account email for access token generation.
         password (str, optional): Account password.
         headers (dict, optional): Pre-obtained authentication headers. [optional]
+        count (bool): If True, build `$count` URLs returning only the number of
+            matching products (`$top=0`, no Attributes). Defaults to False.
+        fields (list, optional): Product properties to fetch (`$select`), see
+            select_fields(). The Attributes are expanded only if "Attributes" is
+            in `fields`. Defaults to None (all the properties and the Attributes).
 
     Returns:
         dict: A dictionary containing:
@@ -575,71 +2147,124 @@ def create_urls(gdf, top=None, email=None, password=None, headers=None):
         logger.info(f"[*] Authenticating for {email}...")
         headers = get_access_token(email, password)
         logger.info("[*] Authentication successful.")
-    urlapi = "https://catalogue.dataspace.copernicus.eu/odata/v1/Products?$filter="
-    urls = []
+    urlapi = ODATA_PRODUCTS_URL
 
     if top is None:
         top = DEFAULT_TOP_ROWS_PER_QUERY
 
-    for row in range(len(gdf)):
-        gdf_row = gdf.iloc[row]
-        enter_index = gdf["id_original_query"].iloc[row]
+    # the filter clauses are formatted column by column, in the order of the URL,
+    # None for the rows without this filter
+    clauses = []
+
+    # Geometry processing
+    if "geometry" in gdf:
+        geometries = np.asarray(gdf["geometry"], dtype=object)
+        wkts = shapely.to_wkt(geometries, rounding_precision=-1).tolist()
+        type_ids = shapely.get_type_id(geometries)
+        geometry_clauses = [None] * len(wkts)
+        for irow in np.flatnonzero(type_ids == shapely.GeometryType.POINT):
+            value = wkts[irow]
+            coordinates_part = value[value.find("(") + 1 : value.find(")")]
+            geometry_clauses[irow] = (
+                "OData.CSC.Intersects(area=geography'SRID=4326;"
+                f"POINT({coordinates_part.replace(' ', '%20')})')"
+            )
+        for irow in np.flatnonzero(type_ids == shapely.GeometryType.POLYGON):
+            value = wkts[irow]
+            coordinates_part = value[value.find("(") + 1 : value.find(")")]
+            geometry_clauses[irow] = (
+                f"OData.CSC.Intersects(area=geography'SRID=4326;POLYGON({coordinates_part}))')"
+            )
+        clauses.append(geometry_clauses)
+
+    # OData Filter Mapping
+    string_filters = [
+        ("collection", "Collection/Name eq '{}'"),
+        ("name", "contains(Name,'{}')"),
+        (
+            "sensormode",
+            "Attributes/OData.CSC.StringAttribute/any(att:att/Name eq 'operationalMode' and att/OData.CSC.StringAttribute/Value eq '{}')",
+        ),
+        (
+            "producttype",
+            "Attributes/OData.CSC.StringAttribute/any(att:att/Name eq 'productType' and att/OData.CSC.StringAttribute/Value eq '{}')",
+        ),
+    ]
+    for column, template in string_filters:
+        if column in gdf:
+            clauses.append(_format_column(gdf[column], template.format))
+
+    if "start_datetime" in gdf:
+        start_dts = _format_datetime_column(gdf["start_datetime"])
+        # windows split by the bisection or the planning start at the cut
+        operators = np.where(is_start_inclusive(gdf), "ge", "gt")
+        clauses.append(
+            [
+                f"ContentDate/Start {operator} {dt}.000Z" if dt is not None else None
+                for operator, dt in zip(operators, start_dts)
+            ]
+        )
 
-        params = {}
+    if "end_datetime" in gdf:
+        end_dts = _format_datetime_column(gdf["end_datetime"])
+        clauses.append(
+            [
+                f"ContentDate/Start lt {dt}.000Z" if dt is not None else None
+                for dt in end_dts
+            ]
+        )
 
-        # Geometry processing
-        if "geometry" in gdf_row and not pd.isna(gdf_row["geometry"]):
-            value = str(gdf_row.geometry)
-            geo_type = gdf_row.geometry.geom_type
-            coordinates_part = value[value.find("(") + 1 : value.find(")")]
+    if "modified_after" in gdf:
+        modified_dts = _format_datetime_column(
+            pd.to_datetime(gdf["modified_after"]), unit="ms"
+        )
+        clauses.append(
+            [
+                f"ModificationDate gt {dt}Z" if dt is not None else None
+                for dt in modified_dts
+            ]
+        )
 
-            if geo_type == "Point":
-                coordinates_part = coordinates_part.replace(" ", "%20")
-                params["OData.CSC.Intersects"] = (
-                    f"(area=geography'SRID=4326;POINT({coordinates_part})')"
-                )
-            elif geo_type == "Polygon":
-                params["OData.CSC.Intersects"] = (
-                    f"(area=geography'SRID=4326;POLYGON({coordinates_part}))')"
-                )
+    if "Attributes" in gdf:
 
-        # OData Filter Mapping
-        if "collection" in gdf_row and not pd.isna(gdf_row["collection"]):
-            params["Collection/Name eq"] = f" '{gdf_row['collection']}'"
-
-        if "name" in gdf_row and not pd.isna(gdf_row["name"]):
-            params["contains"] = f"(Name,'{gdf_row['name']}')"
-
-        if "sensormode" in gdf_row and not pd.isna(gdf_row["sensormode"]):
-            params[
-                "Attributes/OData.CSC.StringAttribute/any(att:att/Name eq 'operationalMode' and att/OData.CSC.StringAttribute/Value eq"
-            ] = f" '{gdf_row['sensormode']}')"
-
-        if "producttype" in gdf_row and not pd.isna(gdf_row["producttype"]):
-            params[
-                "Attributes/OData.CSC.StringAttribute/any(att:att/Name eq 'productType' and att/OData.CSC.StringAttribute/Value eq"
-            ] = f" '{gdf_row['producttype']}')"
-
-        if "start_datetime" in gdf_row and not pd.isna(gdf_row["start_datetime"]):
-            start_dt = gdf_row["start_datetime"].strftime("%Y-%m-%dT%H:%M:%S.000Z")
-            params["ContentDate/Start gt"] = f" {start_dt}"
-
-        if "end_datetime" in gdf_row and not pd.isna(gdf_row["end_datetime"]):
-            end_dt = gdf_row["end_datetime"].strftime("%Y-%m-%dT%H:%M:%S.000Z")
-            params["ContentDate/Start lt"] = f" {end_dt}"
-
-        if "Attributes" in gdf_row and not pd.isna(gdf_row["Attributes"]):
-            attr_str = str(gdf_row["Attributes"]).replace(" ", "")
-            attr_name = attr_str.split(",")[0]
-            attr_val = attr_str.split(",")[1]
-            params["Attributes/OData.CSC.DoubleAttribute/any(att:att/Name eq"] = (
-                f" '{attr_name}' and att/OData.CSC.DoubleAttribute/Value le {attr_val})"
+        def attribute_clause(value):
+            attr_name, attr_val = str(value).replace(" ", "").split(",")[:2]
+            return (
+                f"Attributes/OData.CSC.DoubleAttribute/any(att:att/Name eq '{attr_name}' "
+                f"and att/OData.CSC.DoubleAttribute/Value le {attr_val})"
             )
 
-        # Construction of the final URL
-        str_query = " and ".join([f"{key}{val}" for key, val in params.items()])
-        url = f"{urlapi}{str_query}&$top={top}&$expand=Attributes"
-        urls.append((enter_index, url))
+        clauses.append(_format_column(gdf["Attributes"], attribute_clause))
+
+    # Construction of the final URLs
+    if count:
+        options = "&$count=True&$top=0"
+    else:
+        options = f"&$top={top}"
+        if fields is not None:
+            options += "&$select=" + ",".join(select_fields(fields))
+        if fields is None or "Attributes" in fields:
+            options += "&$expand=Attributes"
+    row_options = [options] * len(gdf)
+    if "modified_after" in gdf and not count:
+        # incremental queries: pages in modification order (see SYNC_ORDERBY)
+        row_options = [
+            options if dt is None else f"{options}&$orderby={SYNC_ORDERBY}"
+            for dt in modified_dts
+        ]
+    urls = [
+        (
+            enter_index,
+            urlapi
+            + " and ".join(clause for clause in row_clauses if clause is not None)
+            + row_option,
+        )
+        for enter_index, row_clauses, row_option in zip(
+            gdf["id_original_query"].tolist(),
+            zip(*clauses) if clauses else [()] * len(gdf),
+            row_options,
+        )
+    ]
 
     processing_time = time.time() - start_time
     logger.info("processing time:%1.1fs", processing_time)
@@ -649,85 +2274,466 @@ def create_urls(gdf, top=None, email=None, password=None, headers=None):
     return {"urls": urls, "headers": headers}
 
 
-def get_cache_filename(url, cache_dir=None):
-    """Generates a filename for caching a URL response based on its MD5 hash.
+def pack_urls(
+    urls,
+    max_pack_size,
+    max_url_length=DEFAULT_MAX_URL_LENGTH,
+    expected_rows=None,
+    max_pack_rows=None,
+):
+    """Packs the URLs differing only by their area into OR-combined filters.
+
+    URLs sharing all their filter clauses but `OData.CSC.Intersects` (same time
+    window, collection, product type...) are merged into a single URL whose area
+    clause is `(Intersects(A) or Intersects(B) or ...)`. A pack holds at most
+    `max_pack_size` areas, its percent-encoded URL stays below `max_url_length`
+    and the sum of the expected answer sizes of its areas below `max_pack_rows`.
 
     Args:
-        url (str): The OData URL.
-        cache_dir (str, optional): The directory where cache files are stored.
+        urls (list): List of tuples (id_original_query, url_string) from create_urls.
+        max_pack_size (int): Max number of areas combined in one URL.
+        max_url_length (int): Max length of a packed URL. Defaults to 6000.
+        expected_rows (list, optional): Expected number of products of each URL
+            (see estimate_expected_rows). Defaults to None (not bounded).
+        max_pack_rows (int, optional): Max expected number of products of a pack.
 
     Returns:
-        str: The full path to the JSON cache file.
+        list: Tuples (url_string, positions), `positions` being the indices in
+            `urls` of the URLs merged into `url_string`.
     """
-    url_hash = hashlib.md5(url.encode("utf-8")).hexdigest()
-    return os.path.join(cache_dir, url_hash + ".json")
+    packs = []
+    open_packs = {}
+    for position, (_, url) in enumerate(urls):
+        url_filter = url[len(ODATA_PRODUCTS_URL) :]
+        if not (
+            url.startswith(ODATA_PRODUCTS_URL)
+            and url_filter.startswith("OData.CSC.Intersects(")
+        ):
+            packs.append({"clauses": [], "rest": url, "positions": [position]})
+            continue
+        end_clause = url_filter.index("')") + 2
+        clause, rest = url_filter[:end_clause], url_filter[end_clause:]
+        rows = 0
+        if expected_rows is not None and max_pack_rows is not None:
+            rows = expected_rows[position]
+        pack = open_packs.get(rest)
+        if pack is not None:
+            length = pack["length"] + len(requests.utils.requote_uri(clause)) + 4
+            if (
+                len(pack["clauses"]) < max_pack_size
+                and length <= max_url_length
+                and (rows == 0 or pack["rows"] + rows <= max_pack_rows)
+            ):
+                pack["clauses"].append(clause)
+                pack["positions"].append(position)
+                pack["length"] = length
+                pack["rows"] += rows
+                continue
+        pack = {
+            "clauses": [clause],
+            "rest": rest,
+            "positions": [position],
+            # +2 for the parentheses around the OR-combined clauses
+            "length": len(requests.utils.requote_uri(url)) + 2,
+            "rows": rows,
+        }
+        open_packs[rest] = pack
+        packs.append(pack)
+    packed_urls = []
+    for pack in packs:
+        if len(pack["clauses"]) == 0:
+            url = pack["rest"]
+        elif len(pack["clauses"]) == 1:
+            url = ODATA_PRODUCTS_URL + pack["clauses"][0] + pack["rest"]
+        else:
+            url = (
+                ODATA_PRODUCTS_URL
+                + "("
+                + " or ".join(pack["clauses"])
+                + ")"
+                + pack["rest"]
+            )
+        packed_urls.append((url, pack["positions"]))
+    return packed_urls
 
 
-def fetch_one_url(url, cpt, index, cache_dir, headers=None):
-    """Fetches meta-data for a single OData URL.
+def estimate_expected_rows(gdf):
+    """Estimates the number of products of each row of a query, to size the packs.
 
-    Handles local JSON caching if enabled and updates status counters.
+    The estimate grows with the duration of the time window and with the bounding
+    box of the area (see EXPECTED_PRODUCTS_PER_AREA_PER_DAY), it is not a count.
 
     Args:
-        url (str): The CDSE OData query URL.
-        cpt (collections.defaultdict): Status counters.
-        index (str): Original query identifier.
-        cache_dir (str, optional): Path to directory for local caching.
-        headers (dict, optional): Authentication headers.
+        gdf (gpd.GeoDataFrame): Normalized query data.
 
     Returns:
-        tuple: (defaultdict, pd.DataFrame)
-            - Updated counters.
-            - DataFrame containing result rows for this URL.
+        np.ndarray: Expected number of products (int) of each row.
     """
-    timeout = 30  # seconds
-    json_data = None
-    collected_data = None
-    if cache_dir is not None:
-        cache_file = get_cache_filename(url, cache_dir)
-        if os.path.exists(cache_file):
-            cpt["cache_used"] += 1
-            logger.debug("cache file exists: %s", cache_file)
-            with open(cache_file, "r") as f:
-                json_data = json.load(f)
-                collected_data = process_data(json_data)
-    if json_data is None:
-        logger.debug("no cache file -> go for query CDS")
-        cpt["urls_tested"] += 1
-        try:
-            # json_data = requests.get(url, headers=headers, timeout=timeout).json()
-            # Application du rate limiting GLOBAL avant la requête
-            _GLOBAL_RATE_LIMITER.wait_if_needed()
+    durations = (gdf["end_datetime"] - gdf["start_datetime"]).dt.total_seconds()
+    xmin, ymin, xmax, ymax = shapely.bounds(np.asarray(gdf["geometry"], dtype=object)).T
+    areas = np.nan_to_num((xmax - xmin) * (ymax - ymin))
+    expected = (
+        durations.to_numpy()
+        / 86400
+        * EXPECTED_PRODUCTS_PER_AREA_PER_DAY
+        * (1 + areas / PRODUCT_FOOTPRINT_AREA)
+    )
+    return np.ceil(np.nan_to_num(expected)).astype(int)
 
-            # Requête avec retry automatique sur 429 et autres erreurs réseau
-            json_data = _fetch_with_retry(url, headers, timeout)
-            cpt["urls_OK"] += 1
+
+def footprints_to_geometries(footprints):
+    """Parses the OData footprints (`geography'SRID=4326;POLYGON (...)'`).
+
+    Args:
+        footprints (pd.Series): 'Footprint' column of an OData answer.
+
+    Returns:
+        np.ndarray: shapely geometries, None where the footprint is missing.
+    """
+    wkts = footprints.str.split(";", n=1).str[1].str.strip().str[:-1]
+    return shapely.from_wkt(wkts.to_numpy(dtype=object), on_invalid="ignore")
+
+
+def unpack_answer(collected_data, tags, geometries, cpt=None):
+    """Gives the products of a packed answer back to the areas they intersect.
+
+    Each product is copied once per area (of the pack) intersecting its footprint,
+    with the `id_original_query` of this area. Products without footprint are
+    given to every area of the pack. A product matched by the server but meeting
+    none of the areas locally (geodesic edges, antimeridian, tolerance) is given
+    to the nearest area.
+
+    Args:
+        collected_data (pd.DataFrame): Answer of a packed URL, with a 'Footprint'.
+        tags (list): id_original_query of each area of the pack.
+        geometries (list): shapely geometry of each area of the pack.
+        cpt (collections.defaultdict, optional): Status counters.
+
+    Returns:
+        pd.DataFrame: Products tagged by area.
+    """
+    if len(tags) == 1:
+        return collected_data.assign(id_original_query=tags[0])
+    footprints = footprints_to_geometries(collected_data["Footprint"])
+    tree = shapely.STRtree(footprints)
+    area_idx, product_idx = tree.query(np.asarray(geometries), predicate="intersects")
+    missing = shapely.is_missing(footprints)
+    unmatched = np.setdiff1d(np.flatnonzero(~missing), product_idx)
+    if len(unmatched) > 0:
+        logger.warning(
+            "%s products of a packed answer meet none of its areas locally, "
+            "given to the nearest area",
+            len(unmatched),
+        )
+        if cpt is not None:
+            cpt["products_unmatched_in_pack"] += len(unmatched)
+        nearest = shapely.STRtree(np.asarray(geometries)).nearest(footprints[unmatched])
+        area_idx = np.concatenate([area_idx, nearest])
+        product_idx = np.concatenate([product_idx, unmatched])
+    unknown = np.flatnonzero(missing)
+    if len(unknown) > 0:
+        area_idx = np.concatenate(
+            [area_idx, np.repeat(np.arange(len(tags)), len(unknown))]
+        )
+        product_idx = np.concatenate([product_idx, np.tile(unknown, len(tags))])
+    order = np.lexsort((product_idx, area_idx))
+    unpacked = collected_data.iloc[product_idx[order]].copy()
+    unpacked["id_original_query"] = np.asarray(tags, dtype=object)[area_idx[order]]
+    return unpacked
+
+
+def get_cache_filename(url, cache_dir=None):
+    """Generates the filename of the former one-JSON-file-per-URL cache.
+
+    Those files are still read (and imported in the SQLite cache) when found.
+
+    Args:
+        url (str): The OData URL.
+        cache_dir (str, optional): The directory where cache files are stored.
+
+    Returns:
+        str: The full path to the JSON cache file.
+    """
+    url_hash = hashlib.md5(url.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, url_hash + ".json")
+
+
+def get_next_page_url(url, json_data):
+    """Returns the URL of the next page of an OData answer.
+
+    The `@odata.nextLink` given by the server is used when present, otherwise
+    the `$skip` parameter of the current URL is incremented, as long as the
+    current page is full.
+
+    Args:
+        url (str): The OData URL of the current page.
+        json_data (dict): The JSON payload of the current page.
+
+    Returns:
+        str or None: URL of the next page, None if the current page is the last one.
+    """
+    next_link = json_data.get("@odata.nextLink")
+    if next_link:
+        return next_link
+    match_top = re.search(r"[?&]\$top=(\d+)", url)
+    top = int(match_top.group(1)) if match_top else DEFAULT_TOP_ROWS_PER_QUERY
+    page_size = len(json_data.get("value", []))
+    if page_size < top:
+        return None
+    match_skip = re.search(r"[?&]\$skip=(\d+)", url)
+    skip = (int(match_skip.group(1)) if match_skip else 0) + page_size
+    if skip > ODATA_MAX_SKIP:
+        logger.warning(
+            "$skip=%s is above the OData limit (%s), products may be missing for: %s",
+            skip,
+            ODATA_MAX_SKIP,
+            url,
+        )
+        return None
+    if match_skip:
+        return re.sub(r"\$skip=\d+", f"$skip={skip}", url)
+    return f"{url}&$skip={skip}"
+
+
+def add_orderby(url, orderby=PAGINATION_ORDERBY):
+    """Adds a `$orderby` parameter to an OData URL if it does not have one yet.
+
+    Args:
+        url (str): The OData URL.
+        orderby (str): Ordering expression. Defaults to PAGINATION_ORDERBY.
+
+    Returns:
+        str: The URL with a stable ordering.
+    """
+    if "$orderby=" in url:
+        return url
+    return f"{url}&$orderby={orderby}"
+
+
+def read_cache(url, cpt, cache_dir):
+    """Reads the cached JSON answer of an OData URL.
+
+    The answer is looked up in the SQLite cache of `cache_dir` (see
+    cdsodatacli.cache), then in the former one-JSON-file-per-URL cache, in which
+    case it is imported in the SQLite cache. Answers expired according to the
+    freshness policy of the cache are ignored.
+
+    Args:
+        url (str): The CDSE OData query URL.
+        cpt (collections.defaultdict): Status counters.
+        cache_dir (str, optional): Path to directory for local caching.
+
+    Returns:
+        dict or None: The cached JSON payload, None if not cached.
+    """
+    json_data = None
+    if cache_dir is not None:
+        cache = get_query_cache(cache_dir)
+        json_data = cache.get(url)
+        if json_data is None:
+            cache_file = get_cache_filename(url, cache_dir)
+            if os.path.exists(cache_file) and cache.is_fresh(
+                url, fetched_at=os.path.getmtime(cache_file)
+            ):
+                logger.debug("legacy cache file exists: %s", cache_file)
+                with open(cache_file, "r") as f:
+                    json_data = json.load(f)
+                cache.put(url, json_data, fetched_at=os.path.getmtime(cache_file))
+        if json_data is not None:
+            cpt["cache_used"] += 1
+    return json_data
+
+
+def write_cache(url, json_data, cache_dir):
+    """Stores the JSON answer of an OData URL in the cache, if it contains products.
+
+    Args:
+        url (str): The CDSE OData query URL.
+        json_data (dict or None): The JSON payload.
+        cache_dir (str, optional): Path to directory for local caching.
+    """
+    if json_data is not None and "value" in json_data and cache_dir is not None:
+        get_query_cache(cache_dir).put(url, json_data)
+
+
+def answer_is_complete(url, json_data):
+    """Tells whether an OData page is the last one of its query.
+
+    Args:
+        url (str): The OData URL of the page.
+        json_data (dict): The JSON payload of the page.
+
+    Returns:
+        bool: True if the page has no `@odata.nextLink` and is not full.
+    """
+    if json_data.get("@odata.nextLink"):
+        return False
+    match_top = re.search(r"[?&]\$top=(\d+)", url)
+    top = int(match_top.group(1)) if match_top else DEFAULT_TOP_ROWS_PER_QUERY
+    return len(json_data.get("value", [])) < top
+
+
+def read_query_cache(url, cpt, cache_dir, paginate=False):
+    """Answers an OData URL from the cached complete answer of a containing query.
+
+    The URL is normalised (filters, geometry and time window) and a cached
+    answer of a query with the same filters on a larger time window and/or area
+    is filtered locally, whatever the `$top`, slicing or clause order used to
+    build it (see cdsodatacli.cache.QueryCache.find_query).
+
+    Args:
+        url (str): The CDSE OData query URL.
+        cpt (collections.defaultdict): Status counters.
+        cache_dir (str, optional): Path to directory for local caching.
+        paginate (bool): If False, the answer is truncated at `$top` products
+            like CDSE does. Defaults to False.
+
+    Returns:
+        list or None: The products matching the URL, None if not cached.
+    """
+    if cache_dir is None:
+        return None
+    query = normalize_query_url(url)
+    if query is None:
+        return None
+    products = get_query_cache(cache_dir).find_query(query)
+    if products is None:
+        return None
+    cpt["query_cache_used"] += 1
+    if not paginate and query["top"] is not None:
+        products = products[: query["top"]]
+    return products
+
+
+def write_query_cache(url, products, cache_dir):
+    """Stores the complete answer of an OData URL in the cache of normalised queries.
+
+    Args:
+        url (str): The CDSE OData query URL (first page).
+        products (list): All the products matching the URL.
+        cache_dir (str, optional): Path to directory for local caching.
+    """
+    if cache_dir is None:
+        return
+    query = normalize_query_url(url)
+    if query is not None:
+        get_query_cache(cache_dir).put_query(query, products)
+
+
+def fetch_one_page(url, cpt, cache_dir, headers=None, timeout=30):
+    """Fetches the raw JSON answer of one OData URL, from cache or from CDSE.
+
+    Args:
+        url (str): The CDSE OData query URL.
+        cpt (collections.defaultdict): Status counters.
+        cache_dir (str, optional): Path to directory for local caching.
+        headers (dict, optional): Authentication headers.
+        timeout (int): Request timeout in seconds. Defaults to 30.
+
+    Returns:
+        dict or None: The JSON payload, None if the query failed.
+    """
+    json_data = read_cache(url, cpt, cache_dir)
+    if json_data is None:
+        logger.debug("no cache file -> go for query CDS")
+        cpt["urls_tested"] += 1
+        try:
+            # Requête avec retry automatique sur 429, 5xx et erreurs réseau,
+            # chaque tentative passant par le rate limiting GLOBAL
+            json_data = _fetch_with_retry(url, headers, timeout, cpt=cpt)
+            cpt["urls_OK"] += 1
         except requests.exceptions.ReadTimeout:
             cpt["urls_timeout"] += 1
+        except CircuitOpenError as e:
+            cpt["urls_circuit_open"] += 1
+            logger.warning("query not sent, CDSE keeps failing (%s): %s", e, url)
         except KeyboardInterrupt:
             raise
-        except ValueError:
+        except (requests.exceptions.RequestException, ValueError):
+            # HTTPError: 4xx not retried or 5xx once the retry budget is exhausted
             cpt["urls_KO"] += 1
             logger.error(
                 "impossible to get data from CDS for query: %s: %s",
                 url,
                 traceback.format_exc(),
             )
-        if json_data is not None:
-            if "value" in json_data:
-                if cache_dir is not None:
-                    cache_file = get_cache_filename(url, cache_dir)
-                    with open(cache_file, "w") as f:
-                        json.dump(json_data, f)
-                collected_data = process_data(json_data)
+        write_cache(url, json_data, cache_dir)
+    return json_data
+
+
+def record_failed_url(cpt, index, url):
+    """Records a URL whose answer could not be fetched (or only partially).
+
+    Args:
+        cpt (collections.defaultdict): Status counters, the failed URLs are listed
+            under the key 'failed_urls'.
+        index (str): Original query identifier.
+        url (str): The CDSE OData query URL.
+    """
+    cpt.setdefault("failed_urls", []).append((index, url))
+
+
+def get_failed_urls(cpt):
+    """
+    Args:
+        cpt (collections.defaultdict): Status counters.
+
+    Returns:
+        list: Tuples (id_original_query, url) of the URLs that could not be fetched.
+    """
+    return cpt.get("failed_urls", [])
+
+
+def record_truncated_url(cpt, index, url):
+    """Records a paginated URL whose answer stopped at the `$skip` limit of OData.
+
+    Args:
+        cpt (collections.defaultdict): Status counters, the truncated URLs are
+            listed under the key 'truncated_urls'.
+        index (str): Original query identifier.
+        url (str): The CDSE OData query URL.
+    """
+    cpt.setdefault("truncated_urls", []).append((index, url))
+
+
+def get_truncated_urls(cpt):
+    """
+    Args:
+        cpt (collections.defaultdict): Status counters.
+
+    Returns:
+        list: Tuples (id_original_query, url) of the answers truncated at the
+            `$skip` limit (and not split afterwards).
+    """
+    return cpt.get("truncated_urls", [])
+
+
+def answer_to_dataframe(products, cpt, index, paginate=False):
+    """Converts the products of an OData answer into a DataFrame and counts them.
+
+    Args:
+        products (list or None): Products of all the pages, None if the query failed.
+        cpt (collections.defaultdict): Status counters.
+        index (str): Original query identifier.
+        paginate (bool): Whether the answer was paginated. Defaults to False.
+
+    Returns:
+        tuple: (defaultdict, pd.DataFrame)
+            - Updated counters.
+            - DataFrame containing result rows for this URL.
+    """
+    collected_data = None
+    if products is not None:
+        collected_data = process_data({"value": products})
 
     if collected_data is not None:
         if len(collected_data.index) > 0:
             cpt["product_proposed_by_CDS"] += len(collected_data["Name"])
             collected_data["id_original_query"] = index
-            if len(collected_data) == DEFAULT_TOP_ROWS_PER_QUERY:
+            if not paginate and len(collected_data) == DEFAULT_TOP_ROWS_PER_QUERY:
                 logger.warning(
-                    "%i products found in a single OData query (max is %s).",
+                    "%i products found in a single OData query (max is %s), "
+                    "use paginate=True to get all of them.",
                     len(collected_data),
                     DEFAULT_TOP_ROWS_PER_QUERY,
                 )
@@ -741,22 +2747,356 @@ def fetch_one_url(url, cpt, index, cache_dir, headers=None):
     return cpt, collected_data
 
 
-@retry_with_backoff(max_retries=5, base_delay=1, max_delay=60)
-def _fetch_with_retry(url, headers, timeout):
-    """Effectue la requête HTTP avec retry en cas d'erreur."""
-    response = requests.get(url, headers=headers, timeout=timeout)
+def fetch_one_url(url, cpt, index, cache_dir, headers=None, paginate=False):
+    """Fetches meta-data for a single OData URL.
+
+    Handles local JSON caching if enabled and updates status counters. A URL
+    contained in a previously cached complete answer (same filters, larger time
+    window or area) is answered locally without any request.
+    When `paginate` is True, the following pages are fetched (and cached) one by
+    one until the answer is complete, so that no product is lost at the `$top` limit.
+
+    Args:
+        url (str): The CDSE OData query URL.
+        cpt (collections.defaultdict): Status counters.
+        index (str): Original query identifier.
+        cache_dir (str, optional): Path to directory for local caching.
+        headers (dict, optional): Authentication headers.
+        paginate (bool): If True, follow OData pagination. Defaults to False.
+
+    Returns:
+        tuple: (defaultdict, pd.DataFrame)
+            - Updated counters.
+            - DataFrame containing result rows for this URL.
+    """
+    products = read_query_cache(url, cpt, cache_dir, paginate=paginate)
+    if products is not None:
+        return answer_to_dataframe(products, cpt, index, paginate=paginate)
+    page_url = add_orderby(url) if paginate else url
+    complete = False
+    failed = False
+    while page_url is not None:
+        json_data = fetch_one_page(page_url, cpt, cache_dir=cache_dir, headers=headers)
+        if json_data is None or "value" not in json_data:
+            if products is not None:
+                logger.warning("pagination interrupted at: %s", page_url)
+            record_failed_url(cpt, index, url)
+            failed = True
+            break
+        if products is None:
+            products = []
+        products.extend(json_data["value"])
+        complete = answer_is_complete(page_url, json_data)
+        page_url = get_next_page_url(page_url, json_data) if paginate else None
+        if page_url is not None:
+            cpt["pages_followed"] += 1
+    if complete:
+        write_query_cache(url, products, cache_dir)
+    elif paginate and not failed:
+        # the $skip limit of OData is reached
+        record_truncated_url(cpt, index, url)
+    return answer_to_dataframe(products, cpt, index, paginate=paginate)
+
+
+@retry_with_backoff(policy=_RETRY_POLICY)
+def _fetch_with_retry(url, headers, timeout, cpt=None):
+    """Effectue la requête HTTP avec retry sur les erreurs transitoires."""
+    _GLOBAL_RATE_LIMITER.wait_if_needed()
+    response = get_http_session().get(url, headers=headers, timeout=timeout)
+    _report_throttling(response.status_code, response.headers)
     response.raise_for_status()  # Lève une exception pour les codes 4xx/5xx
+    _GLOBAL_RATE_LIMITER.on_success()
     return response.json()
 
 
-def fetch_data_from_urls_sequential(urls_plus_headers, cache_dir, cpt=None):
-    """Fetches meta-data sequentially from a list of OData URLs."""
+def _report_throttling(status_code, headers):
+    """Réduit le débit global sur un 429/503, en suivant le Retry-After du serveur."""
+    if status_code in THROTTLING_STATUS_CODES:
+        _GLOBAL_RATE_LIMITER.on_throttle(parse_retry_after(headers.get("Retry-After")))
+        logger.warning(
+            "HTTP %s from CDSE: rate lowered to %1.1f req/s",
+            status_code,
+            _GLOBAL_RATE_LIMITER.current_rate,
+        )
+
+
+async def _cache_io_async(func, *args, **kwargs):
+    """Runs a cache read or write in a worker thread, off the event loop.
+
+    The SQLite queries, the compression and the cache lock would otherwise block
+    all the coroutines in flight. Without cache (last positional argument
+    `cache_dir` is None) the function returns at once and is called directly.
+
+    Args:
+        func (callable): read_cache, write_cache, read_query_cache or write_query_cache.
+        *args: Positional arguments of `func`, ending with `cache_dir`.
+        **kwargs: Keyword arguments of `func`.
+
+    Returns:
+        The result of `func`.
+    """
+    if args[-1] is None:
+        return func(*args, **kwargs)
+    return await asyncio.to_thread(func, *args, **kwargs)
+
+
+async def fetch_one_page_async(
+    session, semaphore, url, cpt, cache_dir, headers=None, timeout=30
+):
+    """Asyncio counterpart of fetch_one_page().
+
+    Args:
+        session (aiohttp.ClientSession): HTTP session shared by all the coroutines.
+        semaphore (asyncio.Semaphore): Bounds the number of requests in flight.
+        url (str): The CDSE OData query URL.
+        cpt (collections.defaultdict): Status counters.
+        cache_dir (str, optional): Path to directory for local caching.
+        headers (dict, optional): Authentication headers.
+        timeout (int): Request timeout in seconds. Defaults to 30.
+
+    Returns:
+        dict or None: The JSON payload, None if the query failed.
+    """
+    import aiohttp
+
+    json_data = await _cache_io_async(read_cache, url, cpt, cache_dir)
+    if json_data is None:
+        cpt["urls_tested"] += 1
+        try:
+            async with semaphore:
+                json_data = await _fetch_with_retry_async(
+                    session, url, headers, timeout, cpt=cpt
+                )
+            cpt["urls_OK"] += 1
+        except TimeoutError:
+            cpt["urls_timeout"] += 1
+        except CircuitOpenError as e:
+            cpt["urls_circuit_open"] += 1
+            logger.warning("query not sent, CDSE keeps failing (%s): %s", e, url)
+        except (aiohttp.ClientError, ValueError):
+            cpt["urls_KO"] += 1
+            logger.error(
+                "impossible to get data from CDS for query: %s: %s",
+                url,
+                traceback.format_exc(),
+            )
+        await _cache_io_async(write_cache, url, json_data, cache_dir)
+    return json_data
+
+
+async def fetch_one_url_async(
+    session, semaphore, url, cpt, index, cache_dir, headers=None, paginate=False
+):
+    """Asyncio counterpart of fetch_one_url().
+
+    Args:
+        session (aiohttp.ClientSession): HTTP session shared by all the coroutines.
+        semaphore (asyncio.Semaphore): Bounds the number of requests in flight.
+        url (str): The CDSE OData query URL.
+        cpt (collections.defaultdict): Status counters.
+        index (str): Original query identifier.
+        cache_dir (str, optional): Path to directory for local caching.
+        headers (dict, optional): Authentication headers.
+        paginate (bool): If True, follow OData pagination. Defaults to False.
+
+    Returns:
+        tuple: (defaultdict, pd.DataFrame)
+            - Updated counters.
+            - DataFrame containing result rows for this URL.
+    """
+    products = await _cache_io_async(
+        read_query_cache, url, cpt, cache_dir, paginate=paginate
+    )
+    if products is not None:
+        return answer_to_dataframe(products, cpt, index, paginate=paginate)
+    page_url = add_orderby(url) if paginate else url
+    complete = False
+    failed = False
+    while page_url is not None:
+        json_data = await fetch_one_page_async(
+            session, semaphore, page_url, cpt, cache_dir=cache_dir, headers=headers
+        )
+        if json_data is None or "value" not in json_data:
+            if products is not None:
+                logger.warning("pagination interrupted at: %s", page_url)
+            record_failed_url(cpt, index, url)
+            failed = True
+            break
+        if products is None:
+            products = []
+        products.extend(json_data["value"])
+        complete = answer_is_complete(page_url, json_data)
+        page_url = get_next_page_url(page_url, json_data) if paginate else None
+        if page_url is not None:
+            cpt["pages_followed"] += 1
+    if complete:
+        await _cache_io_async(write_query_cache, url, products, cache_dir)
+    elif paginate and not failed:
+        # the $skip limit of OData is reached
+        record_truncated_url(cpt, index, url)
+    return answer_to_dataframe(products, cpt, index, paginate=paginate)
+
+
+@retry_with_backoff(policy=_RETRY_POLICY)
+async def _fetch_with_retry_async(session, url, headers, timeout, cpt=None):
+    """Effectue la requête HTTP asynchrone avec retry sur les erreurs transitoires."""
+    import aiohttp
+
+    await _GLOBAL_RATE_LIMITER.wait_if_needed_async()
+    async with session.get(
+        url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)
+    ) as response:
+        _report_throttling(response.status, response.headers)
+        response.raise_for_status()  # Lève une exception pour les codes 4xx/5xx
+        _GLOBAL_RATE_LIMITER.on_success()
+        return json.loads(await response.text())
+
+
+def fetch_urls_async(
+    urls, headers=None, cache_dir=None, max_concurrency=None, cpt=None, paginate=False
+):
+    """Fetches a list of OData URLs concurrently with asyncio.
+
+    Requires the optional dependency `aiohttp` (pip install cdsodatacli[async]).
+    All the requests share the global rate limiter, `max_concurrency` only bounds
+    the number of requests in flight.
+
+    Args:
+        urls (list): List of tuples (id_original_query, url_string).
+        headers (dict, optional): Authentication headers.
+        cache_dir (str, optional): Path for local caching.
+        max_concurrency (int, optional): Max requests in flight. Defaults to
+            ASYNC_MAX_CONCURRENCY.
+        cpt (collections.defaultdict, optional): Status counters.
+        paginate (bool): If True, follow OData pagination for each URL.
+
+    Returns:
+        tuple: (list, defaultdict)
+            - One DataFrame (or None) per URL, in the order of `urls`.
+            - Updated status counters.
+    """
+    if cpt is None:
+        cpt = defaultdict(int)
+    answers = _gather_async(
+        lambda session, semaphore, index, url: fetch_one_url_async(
+            session,
+            semaphore,
+            url,
+            cpt,
+            index,
+            cache_dir,
+            headers=headers,
+            paginate=paginate,
+        ),
+        urls,
+        max_concurrency=max_concurrency,
+    )
+    return [collected_data for _, collected_data in answers], cpt
+
+
+def _gather_async(fetch, urls, max_concurrency=None):
+    """Runs a coroutine per URL in an event loop sharing one aiohttp session.
+
+    Args:
+        fetch (callable): Called as fetch(session, semaphore, index, url), returns
+            the coroutine fetching one URL.
+        urls (list): List of tuples (id_original_query, url_string).
+        max_concurrency (int, optional): Max requests in flight. Defaults to
+            ASYNC_MAX_CONCURRENCY.
+
+    Returns:
+        list: The result of each coroutine, in the order of `urls`.
+    """
+    try:
+        import aiohttp
+    except ImportError as exc:
+        raise ImportError(
+            "querymode='async' requires aiohttp: pip install cdsodatacli[async]"
+        ) from exc
+    if max_concurrency is None:
+        max_concurrency = ASYNC_MAX_CONCURRENCY
+
+    async def _run():
+        semaphore = asyncio.Semaphore(max_concurrency)
+        connector = aiohttp.TCPConnector(limit=max_concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            return await asyncio.gather(
+                *[fetch(session, semaphore, index, url) for index, url in urls]
+            )
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_run())
+    # already inside an event loop (e.g. notebook): run in a dedicated thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, _run()).result()
+
+
+def fetch_pages_from_urls(urls_plus_headers, querymode="seq", cpt=None):
+    """Fetches the raw JSON answer of OData URLs (no pagination, no cache).
+
+    Used for the `$count` probes, which go through the same seq/multi/async
+    fetcher as the data requests.
+
+    Args:
+        urls_plus_headers (dict): Dict containing 'urls' (list) and 'headers' (dict).
+        querymode (str): 'seq', 'multi' or 'async'. Defaults to 'seq'.
+        cpt (collections.defaultdict, optional): Status counters.
+
+    Returns:
+        tuple: (list, defaultdict)
+            - One JSON payload (or None if the query failed) per URL, in the
+              order of the URLs.
+            - Updated status counters.
+    """
+    if cpt is None:
+        cpt = defaultdict(int)
+    urls = urls_plus_headers["urls"]
+    headers = urls_plus_headers["headers"]
+    if querymode == "seq":
+        pages = [
+            fetch_one_page(url, cpt, cache_dir=None, headers=headers)
+            for _, url in tqdm(urls)
+        ]
+    elif querymode == "multi":
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            pages = list(
+                tqdm(
+                    executor.map(
+                        lambda url: fetch_one_page(
+                            url, cpt, cache_dir=None, headers=headers
+                        ),
+                        [url for _, url in urls],
+                    ),
+                    total=len(urls),
+                )
+            )
+    elif querymode == "async":
+        pages = _gather_async(
+            lambda session, semaphore, index, url: fetch_one_page_async(
+                session, semaphore, url, cpt, None, headers=headers
+            ),
+            urls,
+        )
+    else:
+        raise ValueError(f"unknown querymode: {querymode}")
+    return pages, cpt
+
+
+def fetch_data_from_urls_sequential(
+    urls_plus_headers, cache_dir, cpt=None, paginate=False, per_url=False
+):
+    """Fetches meta-data sequentially from a list of OData URLs.
+
+    See fetch_data_from_urls() for the arguments and the returned values.
+    """
     urls = urls_plus_headers["urls"]
     headers = urls_plus_headers["headers"]
     if cpt is None:
         cpt = defaultdict(int)
     start_time = time.time()
-    collected_data_x = []
+    results = []
     collected_data_final = None
     if cache_dir is not None:
         if not os.path.exists(cache_dir):
@@ -765,31 +3105,44 @@ def fetch_data_from_urls_sequential(urls_plus_headers, cache_dir, cpt=None):
     with tqdm(total=len(urls), desc="Fetching data from CDSE", unit="query") as pbar:
         for index, url in urls:  # <-- CHANGED: was (url, index), now (index, url)
             cpt, collected_data = fetch_one_url(
-                url, cpt, index=index, cache_dir=cache_dir, headers=headers
+                url,
+                cpt,
+                index=index,
+                cache_dir=cache_dir,
+                headers=headers,
+                paginate=paginate,
             )
-            if collected_data is not None and not collected_data.empty:
-                collected_data_x.append(collected_data)
+            results.append(collected_data)
             pbar.update(1)
             pbar.set_postfix(
                 {
                     "OK": cpt["urls_OK"],
                     "Cache": cpt["cache_used"],
                     "429": cpt.get("urls_retried", 0),
+                    "KO": len(get_failed_urls(cpt)),
                 }
             )
-    if len(collected_data_x) > 0:
-        collected_data_final = pd.concat(collected_data_x)
     end_time = time.time()
     processing_time = end_time - start_time
     logger.info("fetch_data_from_urls time:%1.1fsec", processing_time)
     logger.info("counter: %s", cpt)
+    if per_url:
+        return results, cpt
+    collected_data_final = concat_results(
+        [df for df in results if df is not None and not df.empty]
+    )
     if collected_data_final is not None:
         assert "id_original_query" in collected_data_final
     return collected_data_final, cpt
 
 
 def fetch_data_from_urls_multithread(
-    urls_plus_headers, cache_dir=None, max_workers=5, cpt=None
+    urls_plus_headers,
+    cache_dir=None,
+    max_workers=5,
+    cpt=None,
+    paginate=False,
+    per_url=False,
 ):
     """Fetches meta-data from OData URLs using a thread pool.
 
@@ -798,41 +3151,110 @@ def fetch_data_from_urls_multithread(
         cache_dir (str, optional): Path for local caching.
         max_workers (int): Max number of threads. Defaults to 50.
         cpt (collections.defaultdict, optional): Status counters.
+        paginate (bool): If True, follow OData pagination for each URL.
+        per_url (bool): If True, return one answer per URL (see fetch_data_from_urls).
 
     Returns:
         tuple: (pd.DataFrame, defaultdict)
-            - Concatenated results.
+            - Concatenated results (None if nothing found).
             - Updated status counters.
     """
-    collected_data = pd.DataFrame()
     max_workers = min(max_workers, 5)  # Maximum de 5 threads pour éviter la saturatio
     if cpt is None:
         cpt = defaultdict(int)
     urls = urls_plus_headers["urls"]
     headers = urls_plus_headers["headers"]
+    results = [None] * len(urls)
     with (
         ThreadPoolExecutor(max_workers=max_workers) as executor,
         tqdm(total=len(urls)) as pbar,
     ):
-        future_to_url = {
+        future_to_position = {
             executor.submit(
-                fetch_one_url, url[1], cpt, url[0], cache_dir, headers=headers
-            ): (
-                url[0],
+                fetch_one_url,
                 url[1],
-            )
-            for url in urls
+                cpt,
+                url[0],
+                cache_dir,
+                headers=headers,
+                paginate=paginate,
+            ): position
+            for position, url in enumerate(urls)
         }
-        for future in as_completed(future_to_url):
-            cpt, df = future.result()
-            if df is not None:
-                if not df.empty:
-                    collected_data = pd.concat([collected_data, df])
+        for future in as_completed(future_to_position):
+            cpt, results[future_to_position[future]] = future.result()
             pbar.update(1)
     logger.info("counter: %s", cpt)
+    if per_url:
+        return results, cpt
+    # a single concatenation: concatenating at each answer copies the results over and over
+    collected_data = concat_results(
+        [df for df in results if df is not None and not df.empty]
+    )
+    return collected_data, cpt
+
+
+def fetch_data_from_urls_async(
+    urls_plus_headers,
+    cache_dir=None,
+    max_concurrency=None,
+    cpt=None,
+    paginate=False,
+    per_url=False,
+):
+    """Fetches meta-data from OData URLs using an asyncio event loop.
+
+    Args:
+        urls_plus_headers (dict): Dict containing 'urls' (list) and 'headers' (dict).
+        cache_dir (str, optional): Path for local caching.
+        max_concurrency (int, optional): Max requests in flight. Defaults to
+            ASYNC_MAX_CONCURRENCY.
+        cpt (collections.defaultdict, optional): Status counters.
+        paginate (bool): If True, follow OData pagination for each URL.
+        per_url (bool): If True, return one answer per URL (see fetch_data_from_urls).
+
+    Returns:
+        tuple: (pd.DataFrame, defaultdict)
+            - Concatenated results (None if nothing found).
+            - Updated status counters.
+    """
+    start_time = time.time()
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+    results, cpt = fetch_urls_async(
+        urls_plus_headers["urls"],
+        headers=urls_plus_headers["headers"],
+        cache_dir=cache_dir,
+        max_concurrency=max_concurrency,
+        cpt=cpt,
+        paginate=paginate,
+    )
+    logger.info("fetch_data_from_urls_async time:%1.1fsec", time.time() - start_time)
+    logger.info("counter: %s", cpt)
+    if per_url:
+        return results, cpt
+    collected_data = concat_results(
+        [df for df in results if df is not None and not df.empty]
+    )
     return collected_data, cpt
 
 
+def concat_results(results):
+    """Concatenates the DataFrames of the answers once, at the end of the fetching.
+
+    Args:
+        results (list): DataFrames of the answers (not empty).
+
+    Returns:
+        pd.DataFrame or None: Concatenated results, None if `results` is empty.
+    """
+    if len(results) == 0:
+        return None
+    if len(results) == 1:
+        return results[0]
+    return pd.concat(results, ignore_index=True)
+
+
 def process_data(json_data):
     """Converts the raw JSON response from OData into a pandas DataFrame.
 
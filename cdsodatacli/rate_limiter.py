@@ -1,30 +1,310 @@
 # rate_limiter.py
+import os
+import json
+import asyncio
 import time
+import hashlib
+import datetime
+import contextlib
+import email.utils
+import urllib.parse
 from threading import Lock
 
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou de fichier POSIX
+    fcntl = None
+
+# champs du bucket partagé, écrits dans le fichier d'état
+SHARED_STATE_FIELDS = (
+    "tokens",
+    "last_refill",
+    "max_requests_per_second",
+    "blocked_until",
+    "last_decrease",
+    "nb_throttled",
+)
+
 
 class RateLimiter:
-    """Rate limiter thread-safe basé sur un bucket de jetons."""
+    """Rate limiter thread-safe basé sur un bucket de jetons.
+
+    Chaque requête réserve un jeton sous verrou (le bucket peut devenir négatif :
+    jetons réservés mais pas encore générés) et attend son échéance hors verrou.
+    Les autres threads et coroutines ne sont donc jamais bloqués par une attente.
+    """
 
     def __init__(self, max_requests_per_second: float = 10.0, max_burst: int = 20):
         self.max_requests_per_second = max_requests_per_second
         self.max_burst = max_burst
         self.tokens = max_burst
         self.last_refill = time.time()
+        self.blocked_until = 0.0
         self.lock = Lock()
 
+    def _reserve(self):
+        """Réserve un jeton, l'appelant doit tenir le verrou.
+
+        Returns:
+            (float): délai (s) avant de pouvoir envoyer la requête
+        """
+        now = time.time()
+        # pas de nouveaux jetons pendant un Retry-After
+        start = max(now, self.blocked_until)
+        if start > self.last_refill:
+            self.tokens = min(
+                self.max_burst,
+                self.tokens + (start - self.last_refill) * self.max_requests_per_second,
+            )
+            self.last_refill = start
+        self.tokens -= 1
+        wait_time = start - now
+        if self.tokens < 0:
+            wait_time += -self.tokens / self.max_requests_per_second
+        return wait_time
+
+    def reserve(self):
+        """
+        Returns:
+            (float): délai (s) avant de pouvoir envoyer la requête, le jeton est réservé
+        """
+        with self.lock:
+            return self._reserve()
+
     def wait_if_needed(self):
         """Attend si le nombre de requêtes autorisées est atteint."""
+        wait_time = self.reserve()
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+    async def wait_if_needed_async(self):
+        """Équivalent asyncio de wait_if_needed(), sans bloquer la boucle."""
+        wait_time = self.reserve()
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+
+    def on_success(self):
+        """Réponse correcte du serveur (rien à faire pour un débit fixe)."""
+
+    def on_throttle(self, retry_after=None):
+        """Réponse 429/503 du serveur (rien à faire pour un débit fixe)."""
+
+    @property
+    def current_rate(self):
+        """Débit autorisé actuellement (requêtes/s)."""
+        return self.max_requests_per_second
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """Bucket de jetons dont le débit s'adapte aux réponses du serveur (AIMD).
+
+    Le débit augmente de `additive_increase` requêtes/s par seconde de réponses
+    correctes, et il est multiplié par `decrease_factor` à chaque 429/503 (au plus
+    une fois par `decrease_cooldown` secondes, les requêtes en vol recevant souvent
+    le même refus). Un `Retry-After` bloque toutes les requêtes jusqu'à l'échéance.
+
+    Arguments:
+        max_requests_per_second (float): débit initial
+        max_burst (int): taille du bucket
+        min_requests_per_second (float): débit plancher
+        max_requests_per_second_limit (float): débit plafond
+        additive_increase (float): gain de débit (req/s) par seconde sans refus
+        decrease_factor (float): facteur appliqué au débit à chaque refus
+        decrease_cooldown (float): délai (s) entre deux réductions du débit
+    """
+
+    def __init__(
+        self,
+        max_requests_per_second: float = 10.0,
+        max_burst: int = 20,
+        min_requests_per_second: float = 1.0,
+        max_requests_per_second_limit: float = 100.0,
+        additive_increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        decrease_cooldown: float = 1.0,
+    ):
+        super().__init__(
+            max_requests_per_second=max_requests_per_second, max_burst=max_burst
+        )
+        self.min_requests_per_second = min_requests_per_second
+        self.max_requests_per_second_limit = max_requests_per_second_limit
+        self.additive_increase = additive_increase
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+        self.last_decrease = 0.0
+        self.nb_throttled = 0
+
+    def on_success(self):
+        """Augmentation additive : +additive_increase req/s par seconde correcte."""
+        with self.lock:
+            self.max_requests_per_second = min(
+                self.max_requests_per_second_limit,
+                self.max_requests_per_second
+                + self.additive_increase / self.max_requests_per_second,
+            )
+
+    def on_throttle(self, retry_after=None):
+        """Réduction multiplicative du débit, et pause si le serveur l'indique.
+
+        Arguments:
+            retry_after (float): délai (s) demandé par le serveur [optional]
+        """
         with self.lock:
             now = time.time()
-            elapsed = now - self.last_refill
-            new_tokens = elapsed * self.max_requests_per_second
-            self.tokens = min(self.max_burst, self.tokens + new_tokens)
-            self.last_refill = now
-
-            if self.tokens < 1:
-                wait_time = (1 - self.tokens) / self.max_requests_per_second
-                time.sleep(wait_time)
-                self.tokens = 0
-            else:
-                self.tokens -= 1
+            self.nb_throttled += 1
+            if retry_after is not None:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+            if now - self.last_decrease < self.decrease_cooldown:
+                return
+            self.last_decrease = now
+            self.max_requests_per_second = max(
+                self.min_requests_per_second,
+                self.max_requests_per_second * self.decrease_factor,
+            )
+            # les jetons déjà réservés restent dus
+            self.tokens = min(self.tokens, 0)
+
+
+class SharedRateLimiter(AdaptiveRateLimiter):
+    """Bucket adaptatif partagé par tous les processus d'une même machine.
+
+    L'état du bucket (jetons, débit, Retry-After) est stocké dans un fichier de
+    `state_dir` propre à `key`, lu et réécrit sous verrou `fcntl.flock` : les jobs
+    lancés en parallèle se partagent un seul budget de requêtes au lieu de recevoir
+    tous des 429. Une requête réserve son jeton sous verrou et attend hors verrou.
+
+    Les réponses correctes sont comptées localement et appliquées au débit partagé
+    lors de la réservation suivante (qui prend déjà le verrou), ou dès que
+    `success_batch_size` réponses sont en attente : le fichier d'état n'est ainsi
+    lu et réécrit qu'une fois par requête.
+
+    Arguments:
+        state_dir (str): répertoire des fichiers d'état, commun aux processus
+        key (str): budget partagé, voir shared_rate_limiter_key()
+        success_batch_size (int): nombre de réponses correctes en attente au-delà
+            duquel elles sont écrites sans attendre la réservation suivante
+        **kwargs: paramètres de AdaptiveRateLimiter
+    """
+
+    def __init__(self, state_dir, key, success_batch_size=16, **kwargs):
+        if fcntl is None:
+            raise RuntimeError("SharedRateLimiter requires fcntl (POSIX systems)")
+        super().__init__(**kwargs)
+        os.makedirs(state_dir, exist_ok=True)
+        self.key = key
+        self.success_batch_size = success_batch_size
+        self.pending_successes = 0
+        self.state_path = os.path.join(
+            state_dir, hashlib.sha1(key.encode()).hexdigest()[:16] + ".bucket"
+        )
+
+    @contextlib.contextmanager
+    def _shared_state(self):
+        """Charge l'état partagé dans self sous verrou, et le réécrit en sortie."""
+        with open(self.state_path, "a+") as fid:
+            fcntl.flock(fid, fcntl.LOCK_EX)
+            try:
+                fid.seek(0)
+                try:
+                    state = json.loads(fid.read())
+                except ValueError:  # premier processus, ou fichier tronqué
+                    state = {}
+                for field in SHARED_STATE_FIELDS:
+                    if field in state:
+                        setattr(self, field, state[field])
+                yield
+                fid.seek(0)
+                fid.truncate()
+                fid.write(
+                    json.dumps(
+                        {field: getattr(self, field) for field in SHARED_STATE_FIELDS}
+                    )
+                )
+                fid.flush()
+            finally:
+                fcntl.flock(fid, fcntl.LOCK_UN)
+
+    def _apply_pending_successes(self):
+        """Applique les réponses correctes en attente, l'appelant tient l'état partagé."""
+        with self.lock:
+            nb_successes = self.pending_successes
+            self.pending_successes = 0
+        for _ in range(nb_successes):
+            super().on_success()
+
+    def reserve(self):
+        """
+        Returns:
+            (float): délai (s) avant de pouvoir envoyer la requête, le jeton est réservé
+        """
+        with self._shared_state():
+            self._apply_pending_successes()
+            return self._reserve()
+
+    def on_success(self):
+        """Augmentation additive du débit partagé, différée jusqu'au prochain verrou."""
+        with self.lock:
+            self.pending_successes += 1
+            flush = self.pending_successes >= self.success_batch_size
+        if flush:
+            self.flush()
+
+    def flush(self):
+        """Écrit dans l'état partagé les réponses correctes en attente."""
+        with self._shared_state():
+            self._apply_pending_successes()
+
+    def on_throttle(self, retry_after=None):
+        """Réduction multiplicative du débit partagé, et pause de tous les processus.
+
+        Arguments:
+            retry_after (float): délai (s) demandé par le serveur [optional]
+        """
+        with self._shared_state():
+            self._apply_pending_successes()
+            super().on_throttle(retry_after)
+
+    @property
+    def current_rate(self):
+        """Débit partagé autorisé actuellement (requêtes/s)."""
+        with self._shared_state():
+            self._apply_pending_successes()
+            return self.max_requests_per_second
+
+
+def shared_rate_limiter_key(url, account=None):
+    """
+    Arguments:
+        url (str): URL du service interrogé, seul son hôte compte
+        account (str): compte CDSE utilisé, None pour les requêtes anonymes [optional]
+
+    Returns:
+        (str): clé du budget de requêtes partagé (un par service et par compte)
+    """
+    host = urllib.parse.urlsplit(url).netloc or url
+    return f"{host}|{account or 'anonymous'}"
+
+
+def parse_retry_after(value):
+    """
+    Arguments:
+        value (str): en-tête HTTP Retry-After, en secondes ou date HTTP
+
+    Returns:
+        (float): délai en secondes, None si absent ou illisible
+    """
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    return max(
+        0.0, (date - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+    )
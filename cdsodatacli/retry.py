@@ -1,10 +1,196 @@
 # retry.py
 import time
+import random
+import asyncio
 import logging
+from threading import Lock
 from functools import wraps
 
 logger = logging.getLogger(__name__)
 
+# codes HTTP transitoires : réessayés, les autres 4xx échouent immédiatement
+RETRYABLE_STATUS_CODES = (408, 429)
+
+
+class CircuitOpenError(Exception):
+    """Le disjoncteur est ouvert : le serveur échoue trop, la requête n'est pas envoyée."""
+
+
+def get_status_code(error):
+    """
+    Arguments:
+        error (Exception): erreur levée par requests ou aiohttp
+
+    Returns:
+        (int): code HTTP de la réponse en erreur, None si l'erreur n'en a pas
+    """
+    status = getattr(error, "status", None)  # aiohttp.ClientResponseError
+    if isinstance(status, int):
+        return status
+    response = getattr(error, "response", None)  # requests.HTTPError
+    status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable_error(error):
+    """Classe une erreur : transitoire (429, 5xx, timeout, réseau) ou définitive.
+
+    Arguments:
+        error (Exception): erreur levée par la fonction réessayée
+
+    Returns:
+        (bool): True si une nouvelle tentative a une chance d'aboutir
+    """
+    status = get_status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES or status >= 500
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    try:
+        import requests
+
+        if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+            return True
+    except ImportError:
+        pass
+    try:
+        import aiohttp
+
+        if isinstance(error, aiohttp.ClientConnectionError):
+            return True
+    except ImportError:
+        pass
+    return False
+
+
+class RetryPolicy:
+    """Politique de retry partagée par toutes les requêtes d'un run (thread-safe).
+
+    - seules les erreurs transitoires sont réessayées (voir is_retryable_error),
+    - attente "full jitter" : tirage uniforme entre 0 et le backoff exponentiel,
+      pour que les threads ne réessaient pas tous au même instant,
+    - budget global : au plus `min_retries_budget` + `retry_budget_ratio` x le
+      nombre de requêtes, pour ne pas multiplier la charge quand tout échoue,
+    - disjoncteur : après `failure_threshold` échecs transitoires consécutifs, les
+      requêtes échouent immédiatement (CircuitOpenError) pendant `reset_timeout` s,
+      puis une requête d'essai décide de la fermeture.
+
+    Arguments:
+        max_retries (int): nombre maximal de nouvelles tentatives par appel
+        base_delay (float): attente (s) maximale avant la première nouvelle tentative
+        max_delay (float): plafond (s) de l'attente
+        exponential_base (float): facteur de l'attente maximale à chaque tentative
+        retry_budget_ratio (float): part des requêtes pouvant être réessayées
+        min_retries_budget (int): nouvelles tentatives toujours permises
+        failure_threshold (int): échecs consécutifs ouvrant le disjoncteur
+        reset_timeout (float): durée (s) d'ouverture du disjoncteur
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        exponential_base: float = 2.0,
+        retry_budget_ratio: float = 0.2,
+        min_retries_budget: int = 50,
+        failure_threshold: int = 20,
+        reset_timeout: float = 30.0,
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.exponential_base = exponential_base
+        self.retry_budget_ratio = retry_budget_ratio
+        self.min_retries_budget = min_retries_budget
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.nb_calls = 0
+        self.nb_retries = 0
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = Lock()
+
+    def backoff(self, attempt):
+        """
+        Arguments:
+            attempt (int): numéro de la tentative échouée (0 pour la première)
+
+        Returns:
+            (float): attente (s) tirée uniformément sous le backoff exponentiel
+        """
+        ceiling = min(self.max_delay, self.base_delay * self.exponential_base**attempt)
+        return random.uniform(0, ceiling)
+
+    def before_call(self, first_attempt=True):
+        """Compte l'appel, ou lève CircuitOpenError si le disjoncteur est ouvert.
+
+        Arguments:
+            first_attempt (bool): False pour une nouvelle tentative (hors budget)
+        """
+        with self.lock:
+            if self.opened_at is not None:
+                if time.time() - self.opened_at < self.reset_timeout:
+                    raise CircuitOpenError(
+                        f"{self.consecutive_failures} consecutive failures"
+                    )
+                if self.trial_in_flight:  # semi-ouvert : une seule requête d'essai
+                    raise CircuitOpenError("waiting for the trial request")
+                self.trial_in_flight = True
+            if first_attempt:
+                self.nb_calls += 1
+
+    def on_success(self):
+        """Le serveur répond : ferme le disjoncteur."""
+        with self.lock:
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def on_failure(self, error):
+        """
+        Arguments:
+            error (Exception): erreur de la tentative
+
+        Returns:
+            (bool): True si l'erreur est transitoire (elle compte pour le disjoncteur)
+        """
+        if not is_retryable_error(error):
+            self.on_success()  # le serveur a répondu : il n'est pas en panne
+            return False
+        with self.lock:
+            self.consecutive_failures += 1
+            if self.trial_in_flight or (
+                self.opened_at is None
+                and self.consecutive_failures >= self.failure_threshold
+            ):
+                logger.error(
+                    "circuit breaker opened for %1.0f s after %d consecutive failures",
+                    self.reset_timeout,
+                    self.consecutive_failures,
+                )
+                self.opened_at = time.time()
+                self.trial_in_flight = False
+        return True
+
+    def acquire_retry(self):
+        """
+        Returns:
+            (bool): True si le budget global permet une nouvelle tentative
+        """
+        with self.lock:
+            budget = self.min_retries_budget + self.retry_budget_ratio * self.nb_calls
+            if self.nb_retries >= budget or self.opened_at is not None:
+                return False
+            self.nb_retries += 1
+            return True
+
+
+def _count(cpt, key):
+    if cpt is not None:
+        cpt[key] += 1
+
 
 def retry_with_backoff(
     max_retries: int = 5,
@@ -12,33 +198,80 @@ def retry_with_backoff(
     max_delay: float = 60.0,
     exponential_base: float = 2.0,
     retry_on_exceptions: tuple = (Exception,),
+    policy: RetryPolicy = None,
 ):
-    """Décorateur pour réessayer une fonction avec backoff exponentiel."""
+    """Décorateur pour réessayer une fonction selon une RetryPolicy.
+
+    Fonctionne aussi pour les coroutines (l'attente se fait alors avec asyncio.sleep).
+    Sans `policy`, une politique propre à la fonction est créée avec les paramètres
+    donnés. Si la fonction décorée reçoit un argument nommé `cpt` (compteurs), les
+    nouvelles tentatives y sont comptées (urls_retried, urls_failed_fast,
+    retry_budget_exhausted).
+    """
+    if policy is None:
+        policy = RetryPolicy(
+            max_retries=max_retries,
+            base_delay=base_delay,
+            max_delay=max_delay,
+            exponential_base=exponential_base,
+        )
+
+    def next_delay(func, error, attempt, cpt):
+        """attente avant la nouvelle tentative, None s'il faut lever l'erreur"""
+        if not isinstance(error, retry_on_exceptions):
+            return None
+        if not policy.on_failure(error):
+            _count(cpt, "urls_failed_fast")
+            logger.error(f"{func.__name__} failed, not retried: {error}")
+            return None
+        if attempt == policy.max_retries:
+            logger.error(f"Max retries reached for {func.__name__}: {error}")
+            return None
+        if not policy.acquire_retry():
+            _count(cpt, "retry_budget_exhausted")
+            logger.error(f"{func.__name__} failed, retry budget exhausted: {error}")
+            return None
+        _count(cpt, "urls_retried")
+        delay = policy.backoff(attempt)
+        logger.warning(
+            f"{func.__name__} failed (attempt {attempt+1}/{policy.max_retries}): {error}. "
+            f"Retrying in {delay:.1f}s..."
+        )
+        return delay
 
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            delay = base_delay
-            last_exception = None
-
-            for attempt in range(max_retries + 1):
+            for attempt in range(policy.max_retries + 1):
+                policy.before_call(first_attempt=attempt == 0)
                 try:
-                    return func(*args, **kwargs)
-                except retry_on_exceptions as e:
-                    last_exception = e
-                    if attempt == max_retries:
-                        logger.error(f"Max retries reached for {func.__name__}: {e}")
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    delay = next_delay(func, e, attempt, kwargs.get("cpt"))
+                    if delay is None:
                         raise
-
-                    logger.warning(
-                        f"{func.__name__} failed (attempt {attempt+1}/{max_retries}): {e}. "
-                        f"Retrying in {delay:.1f}s..."
-                    )
                     time.sleep(delay)
-                    delay = min(delay * exponential_base, max_delay)
+                else:
+                    policy.on_success()
+                    return result
 
-            raise last_exception
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            for attempt in range(policy.max_retries + 1):
+                policy.before_call(first_attempt=attempt == 0)
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    delay = next_delay(func, e, attempt, kwargs.get("cpt"))
+                    if delay is None:
+                        raise
+                    await asyncio.sleep(delay)
+                else:
+                    policy.on_success()
+                    return result
 
+        if asyncio.iscoroutinefunction(func):
+            return async_wrapper
         return wrapper
 
     return decorator
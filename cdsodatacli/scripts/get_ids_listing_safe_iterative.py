@@ -3,6 +3,7 @@ import logging
 
 import cdsodatacli.download as dl
 from cdsodatacli.utils import get_conf
+from cdsodatacli.query import use_shared_rate_limiter
 import pandas as pd
 import tempfile
 
@@ -19,6 +20,8 @@ def entrypoint():
         logging.info(
             "No email/password provided, using cdsodatacli default behavior for authentication."
         )
+    if args.shared_rate_limit_dir is not None:
+        use_shared_rate_limiter(args.shared_rate_limit_dir, account=args.email)
     conf = get_conf(args.cdsodatacli_conf_file)
     add_ids_to_listing_iterative(
         input_listing=args.input_listing,
@@ -277,6 +280,12 @@ def parse_args():
         default=None,
         help="password of the CDSE account to use for queries [optional, default None -> use cdsodatacli default behavior]",
     )
+    parser.add_argument(
+        "--shared-rate-limit-dir",
+        required=False,
+        default=None,
+        help="directory of a request budget shared by all the jobs of the host using the same directory and --email [optional, default None -> per-process rate limit]",
+    )
     parser.add_argument(
         "--cdsodatacli_conf_file",
         required=True,
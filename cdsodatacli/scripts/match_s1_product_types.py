@@ -13,7 +13,12 @@ from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock
 from cdsodatacli.product_parser import ExplodeSAFE
-from cdsodatacli.rate_limiter import RateLimiter
+from cdsodatacli.http_session import get_http_session
+from cdsodatacli.rate_limiter import (
+    RateLimiter,
+    SharedRateLimiter,
+    shared_rate_limiter_key,
+)
 from cdsodatacli.retry import retry_with_backoff
 
 # ── CONFIGURATION ────────────────────────────────────────────────────────────
@@ -61,10 +66,10 @@ def _query_odata_with_retry(
     """Effectue une requête OData avec retry et rate limiting."""
     params = {"$filter": query_filter, "$top": 999}
     _GLOBAL_RATE_LIMITER.wait_if_needed()
-    logger.debug("requests.get URL: %s params : %s", ODATA_URL, params)
-    response = requests.get(ODATA_URL, params=params, timeout=30)
+    logger.debug("GET URL: %s params : %s", ODATA_URL, params)
+    response = get_http_session().get(ODATA_URL, params=params, timeout=30)
     logger.debug("response raw: %s", response)
-    response.raise_for_status()  # Déclenche le retry sur 4xx/5xx
+    response.raise_for_status()  # Retry sur 429/5xx, échec immédiat sur les autres 4xx
     return response
 
 
@@ -366,6 +371,13 @@ Examples:
         metavar="DIR",
         help="Directory to store checkpoint files for resuming interrupted runs.",
     )
+    parser.add_argument(
+        "--shared-rate-limit-dir",
+        metavar="DIR",
+        help="Directory of a request budget shared with the other jobs of the host. "
+        "The requests of this script are anonymous: the budget is the one of the host "
+        "without credentials, shared with anonymous jobs only, not with the jobs of a CDSE account.",
+    )
     parser.add_argument(
         "--dev",
         action="store_true",
@@ -392,8 +404,18 @@ def load_listing(filepath: str, logger: logging.Logger) -> list[str]:
 
 
 def main():
+    global _GLOBAL_RATE_LIMITER
     args = parse_args()
     logger = setup_logger(verbose=args.verbose)
+    if args.shared_rate_limit_dir:
+        # requêtes sans identifiant : le quota appliqué par le serveur est celui de
+        # la machine (par hôte), partagé avec les seuls autres jobs anonymes
+        _GLOBAL_RATE_LIMITER = SharedRateLimiter(
+            args.shared_rate_limit_dir,
+            shared_rate_limiter_key(ODATA_URL),
+            max_requests_per_second=REQUESTS_PER_SECOND,
+            max_burst=MAX_BURST,
+        )
 
     if args.input_listing:
         safe_list = load_listing(args.input_listing, logger)
@@ -1,12 +1,17 @@
 # query_test.py - Version qui patch correctement normalize_gdf
 """Tests for fetch_data function."""
 
+import re
+import time
+import threading
 import pytest
 import cdsodatacli.query as qr
 import geopandas as gpd
+import pandas as pd
 import numpy as np
-from datetime import datetime
-from unittest.mock import patch, MagicMock
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock, AsyncMock
+import requests
 import shapely
 
 
@@ -16,6 +21,7 @@ def disable_rate_limiter():
     """Désactive le rate limiter global pour les tests."""
     with patch("cdsodatacli.query._GLOBAL_RATE_LIMITER") as mock_limiter:
         mock_limiter.wait_if_needed = MagicMock()
+        mock_limiter.wait_if_needed_async = AsyncMock()
         yield
 
 
@@ -23,7 +29,7 @@ def disable_rate_limiter():
 @pytest.fixture
 def mock_requests():
     """Mock les requêtes HTTP pour les tests."""
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         mock_response = MagicMock()
         mock_response.json.return_value = {"value": []}
         mock_response.status_code = 200
@@ -376,5 +382,1119 @@ def test_footprint_parsing(mock_requests, patch_normalize_gdf):
     assert str(unique_ids[0]) == "test1"
 
 
+def test_fetch_one_url_follows_next_link(mock_requests):
+    """Test que la pagination suit @odata.nextLink jusqu'à la dernière page."""
+    url = "https://catalogue.dataspace.copernicus.eu/odata/v1/Products?$filter=x&$top=2"
+    page1 = MagicMock()
+    page1.json.return_value = {
+        "value": [create_mock_product("1", "S1A_1"), create_mock_product("2", "S1A_2")],
+        "@odata.nextLink": url + "&$skip=2",
+    }
+    page2 = MagicMock()
+    page2.json.return_value = {"value": [create_mock_product("3", "S1A_3")]}
+    mock_requests.side_effect = [page1, page2]
+
+    cpt, result = qr.fetch_one_url(
+        url, qr.defaultdict(int), index="q1", cache_dir=None, paginate=True
+    )
+
+    assert mock_requests.call_count == 2
+    assert list(result["Name"]) == ["S1A_1", "S1A_2", "S1A_3"]
+    assert cpt["pages_followed"] == 1
+    assert "$orderby=" in mock_requests.call_args_list[0].args[0]
+
+
+def test_pagination_with_identical_starts(mock_requests):
+    """Test que la pagination $skip ne perd ni ne répète de produit quand des
+    produits d'un même datatake ont le même ContentDate/Start."""
+    products = [create_mock_product(id_val, f"S1A_{id_val}") for id_val in "dacb"]
+    for product in products:
+        product["ContentDate"] = {"Start": "2022-05-03T00:00:00.000Z"}
+
+    def fake_server(url, **kwargs):
+        # sans critère départageant, l'ordre des ex aequo change d'une requête à l'autre
+        shift = mock_requests.call_count
+        candidates = products[shift % 4 :] + products[: shift % 4]
+        orderby = re.search(r"\$orderby=([^&]+)", url).group(1).split(",")
+        for key in reversed(orderby):
+            field = key.split()[0]
+            candidates = sorted(
+                candidates,
+                key=lambda product: (
+                    product["ContentDate"]["Start"]
+                    if field == "ContentDate/Start"
+                    else product[field]
+                ),
+            )
+        skip = int(re.search(r"\$skip=(\d+)", url).group(1)) if "$skip" in url else 0
+        answer = MagicMock(status_code=200, headers={})
+        answer.json.return_value = {"value": candidates[skip : skip + 2]}
+        return answer
+
+    mock_requests.side_effect = fake_server
+    url = "https://catalogue.dataspace.copernicus.eu/odata/v1/Products?$filter=x&$top=2"
+    cpt, result = qr.fetch_one_url(
+        url, qr.defaultdict(int), index="q1", cache_dir=None, paginate=True
+    )
+    assert qr.PAGINATION_ORDERBY in (mock_requests.call_args_list[0].args[0])
+    assert sorted(result["Name"]) == ["S1A_a", "S1A_b", "S1A_c", "S1A_d"]
+
+
+def test_get_next_page_url_with_skip():
+    """Test le calcul de la page suivante avec $skip quand nextLink est absent."""
+    url = "https://foo/Products?$filter=x&$top=2"
+    full_page = {"value": [{}, {}]}
+    assert qr.get_next_page_url(url, full_page) == url + "&$skip=2"
+    assert qr.get_next_page_url(url + "&$skip=2", full_page) == url + "&$skip=4"
+    assert qr.get_next_page_url(url, {"value": [{}]}) is None
+
+
+def test_bisection_splits_saturated_windows():
+    """Test que les fenêtres saturées sont coupées en deux jusqu'à être complètes."""
+    gdf = create_test_gdf(
+        start_datetime="2022-05-01 00:00:00",
+        end_datetime="2022-05-05 00:00:00",
+        collection="SENTINEL-1",
+    )
+    gdf_norm = qr.normalize_gdf(gdf, timedelta_slice=qr.COARSE_TIMEDELTA_SLICE)
+
+    def fake_fetch_one_url(url, cpt, index, cache_dir, headers=None, paginate=False):
+        start, stop = re.findall(r"Start [gl][te] (\S+)\.000Z", url)
+        duration = datetime.fromisoformat(stop) - datetime.fromisoformat(start)
+        # plus d'un jour -> réponse saturée (top=2)
+        nb = 2 if duration.total_seconds() > 86400 else 1
+        df = pd.DataFrame(
+            {"Name": [f"{start}_{i}" for i in range(nb)], "id_original_query": index}
+        )
+        return cpt, df
+
+    with patch("cdsodatacli.query.fetch_one_url", side_effect=fake_fetch_one_url):
+        result, cpt = qr.fetch_data_bisecting_saturated_windows(gdf_norm, top=2)
+
+    # 4 jours -> 2 x 2 jours -> 4 x 1 jour complets
+    assert cpt["windows_bisected"] == 3
+    assert len(result) == 4
+
+
+def test_split_time_windows_keeps_the_middle_second():
+    """Test qu'un produit pile à la seconde de coupe est dans une des deux moitiés."""
+    gdf = create_test_gdf(
+        start_datetime="2022-05-01 00:00:00",
+        end_datetime="2022-05-01 00:00:03",
+        collection="SENTINEL-1",
+    )
+    gdf_norm = qr.normalize_gdf(gdf, timedelta_slice=qr.COARSE_TIMEDELTA_SLICE)
+    halves = qr.split_time_windows(gdf_norm)
+    # la seconde moitié, coupée à nouveau, garde son début inclus
+    quarters = qr.split_time_windows(halves.iloc[[1]])
+    urls = [url for _, url in qr.create_urls(pd.concat([halves, quarters]))["urls"]]
+    windows = [re.findall(r"Start (\S+ \S+)\.000Z", url) for url in urls]
+    assert windows == [
+        ["gt 2022-05-01T00:00:00", "lt 2022-05-01T00:00:01"],
+        ["ge 2022-05-01T00:00:01", "lt 2022-05-01T00:00:03"],
+        ["ge 2022-05-01T00:00:01", "lt 2022-05-01T00:00:02"],
+        ["ge 2022-05-01T00:00:02", "lt 2022-05-01T00:00:03"],
+    ]
+
+
+def test_fetch_data_from_urls_per_url_keeps_url_order():
+    """Test que per_url renvoie une réponse par URL, dans l'ordre des URLs."""
+
+    def fake_fetch_one_url(url, cpt, index, cache_dir, headers=None, paginate=False):
+        time.sleep(0.05 if index == 0 else 0)  # la première URL répond en dernier
+        cpt["urls_OK"] += 1
+        if index == 1:
+            return cpt, None
+        return cpt, pd.DataFrame({"Name": [url], "id_original_query": index})
+
+    urls = [(i, f"https://foo/Products?url={i}") for i in range(3)]
+    with patch("cdsodatacli.query.fetch_one_url", side_effect=fake_fetch_one_url):
+        results, cpt = qr.fetch_data_from_urls(
+            {"urls": urls, "headers": None}, querymode="multi", per_url=True
+        )
+
+    assert results[1] is None
+    assert [df["Name"].iloc[0] for df in (results[0], results[2])] == [
+        urls[0][1],
+        urls[2][1],
+    ]
+    assert cpt["urls_OK"] == 3
+
+
+def test_quadtree_splits_saturated_areas():
+    """Test que les zones saturées sont découpées en quadrants avant le temps."""
+    gdf = create_test_gdf(
+        start_datetime="2022-05-01 00:00:00",
+        end_datetime="2022-05-03 00:00:00",
+        # polygone concave en L : le quadrant nord-est est vide
+        geometry=shapely.wkt.loads("POLYGON ((0 0, 4 0, 4 2, 2 2, 2 4, 0 4, 0 0))"),
+        collection="SENTINEL-1",
+    )
+    gdf_norm = qr.normalize_gdf(gdf, timedelta_slice=qr.COARSE_TIMEDELTA_SLICE)
+
+    def fake_fetch_one_url(url, cpt, index, cache_dir, headers=None, paginate=False):
+        polygon = shapely.wkt.loads(re.search(r"(POLYGON\(\(.*?\)\))'", url).group(1))
+        start, stop = re.findall(r"Start [gl][te] (\S+)\.000Z", url)
+        duration = datetime.fromisoformat(stop) - datetime.fromisoformat(start)
+        # zone de plus de 1 deg² ou plus d'un jour -> réponse saturée (top=2)
+        saturated = polygon.area > 1 or duration.total_seconds() > 86400
+        nb = 2 if saturated else 1
+        df = pd.DataFrame(
+            {"Name": [f"{url}_{i}" for i in range(nb)], "id_original_query": index}
+        )
+        return cpt, df
+
+    with patch("cdsodatacli.query.fetch_one_url", side_effect=fake_fetch_one_url):
+        result, cpt = qr.fetch_data_bisecting_saturated_windows(
+            gdf_norm, top=2, split_space=True, min_split_area=2
+        )
+
+    # L -> 3 quadrants de 4 deg² -> 12 quadrants de 1 deg² (non redécoupés)
+    # -> 24 demi-fenêtres d'un jour complètes
+    assert cpt["areas_split"] == 4
+    assert cpt["windows_bisected"] == 12
+    assert len(result) == 24
+    pieces = qr.split_areas(gdf_norm)
+    assert len(pieces) == 3
+    assert pieces.union_all().equals(gdf_norm.geometry.iloc[0])
+
+
+def test_plan_time_slices_from_count():
+    """Test que le planning découpe selon le nombre de produits comptés."""
+    gdf = create_test_gdf(
+        start_datetime="2022-05-01 00:00:00",
+        end_datetime="2022-05-05 00:00:00",
+        collection="SENTINEL-1",
+    )
+    gdf_norm = qr.normalize_gdf(gdf, timedelta_slice=qr.COARSE_TIMEDELTA_SLICE)
+    with patch(
+        "cdsodatacli.query.fetch_one_page", return_value={"@odata.count": 2500}
+    ) as mock_page:
+        planned, cpt = qr.plan_time_slices(gdf_norm, top=1000, fill_ratio=1.0)
+
+    assert "$count=True&$top=0" in mock_page.call_args.args[0]
+    assert cpt["count_probes"] == 1
+    assert len(planned) == 3
+    assert planned["start_datetime"].iloc[0] == gdf_norm["start_datetime"].iloc[0]
+    assert planned["end_datetime"].iloc[-1] == gdf_norm["end_datetime"].iloc[0]
+    assert (
+        planned["start_datetime"].iloc[1:].values
+        == planned["end_datetime"].iloc[:-1].values
+    ).all()
+    assert str(planned["start_datetime"].dt.tz) == "UTC"
+
+    with patch("cdsodatacli.query.fetch_one_page", return_value={"@odata.count": 0}):
+        planned, _ = qr.plan_time_slices(gdf_norm, top=1000)
+    assert planned.empty
+
+
+def test_plan_time_slices_dense_slices_bisected():
+    """Test que les tranches planifiées encore saturées sont recoupées, et que les
+    requêtes $count en échec sont comptées."""
+    gdf = create_test_gdf(
+        start_datetime="2022-05-01 00:00:00",
+        end_datetime="2022-05-05 00:00:00",
+        collection="SENTINEL-1",
+    )
+    gdf_norm = qr.normalize_gdf(gdf, timedelta_slice=qr.COARSE_TIMEDELTA_SLICE)
+
+    def fake_fetch_one_url(url, cpt, index, cache_dir, headers=None, paginate=False):
+        start, stop = re.findall(r"Start [gl][te] (\S+)\.000Z", url)
+        duration = datetime.fromisoformat(stop) - datetime.fromisoformat(start)
+        # produits concentrés au début : la première tranche de 2 jours est saturée
+        nb = 2 if start.startswith("2022-05-01") and duration.days >= 2 else 1
+        return cpt, pd.DataFrame(
+            {"Name": [f"{start}_{i}" for i in range(nb)], "id_original_query": index}
+        )
+
+    with (
+        patch("cdsodatacli.query.fetch_one_page", return_value={"@odata.count": 2}),
+        patch("cdsodatacli.query.fetch_one_url", side_effect=fake_fetch_one_url),
+    ):
+        _, cpt = qr.fetch_normalized_gdf(gdf_norm, top=2, plan_with_count=True)
+    assert cpt["count_probes"] == 1
+    assert cpt["windows_bisected"] == 1
+
+    with patch("cdsodatacli.query.fetch_one_page", return_value=None):
+        planned, cpt = qr.plan_time_slices(gdf_norm, top=1000)
+    assert cpt["count_probes_failed"] == 1
+    assert len(planned) == 1
+
+
+@pytest.mark.parametrize("querymode", ["multi", "async"])
+def test_plan_time_slices_probes_use_querymode(querymode):
+    """Test que les requêtes $count passent par le fetcher du querymode."""
+    if querymode == "async":
+        pytest.importorskip("aiohttp")
+    gdf = create_test_gdf(
+        start_datetime="2022-05-01 00:00:00",
+        end_datetime="2022-05-05 00:00:00",
+        collection="SENTINEL-1",
+    )
+    gdf_norm = qr.normalize_gdf(gdf, timedelta_slice=qr.COARSE_TIMEDELTA_SLICE)
+    gdf_norm = pd.concat([gdf_norm, gdf_norm], ignore_index=True)
+    with (
+        patch(
+            "cdsodatacli.query.fetch_one_page", return_value={"@odata.count": 1500}
+        ) as mock_page,
+        patch(
+            "cdsodatacli.query.fetch_one_page_async",
+            new=AsyncMock(return_value={"@odata.count": 1500}),
+        ) as mock_page_async,
+    ):
+        planned, cpt = qr.plan_time_slices(
+            gdf_norm, top=1000, fill_ratio=1.0, querymode=querymode
+        )
+
+    probes = mock_page_async if querymode == "async" else mock_page
+    assert probes.call_count == 2
+    assert cpt["count_probes"] == 2
+    assert len(planned) == 4
+
+
+def test_fetch_data_from_urls_async():
+    """Test du mode asyncio: une réponse par URL, id_original_query conservé."""
+    pytest.importorskip("aiohttp")
+
+    urls = [
+        ("q1", "https://foo/Products?$filter=a&$top=1000"),
+        ("q2", "https://foo/Products?$filter=b&$top=1000"),
+    ]
+    answers = {
+        urls[0][1]: {"value": [create_mock_product("1", "S1A_1")]},
+        urls[1][1]: {"value": [create_mock_product("2", "S1A_2")]},
+    }
+
+    async def fake_fetch(session, url, headers, timeout, cpt=None):
+        return answers[url]
+
+    with patch(
+        "cdsodatacli.query._fetch_with_retry_async",
+        new=AsyncMock(side_effect=fake_fetch),
+    ):
+        result, cpt = qr.fetch_data_from_urls_async(
+            {"urls": urls, "headers": None}, max_concurrency=2
+        )
+
+    assert cpt["urls_OK"] == 2
+    assert sorted(result["Name"]) == ["S1A_1", "S1A_2"]
+    assert dict(zip(result["Name"], result["id_original_query"])) == {
+        "S1A_1": "q1",
+        "S1A_2": "q2",
+    }
+
+
+def test_fetch_data_from_urls_async_reports_failed_urls():
+    """Test qu'une erreur aiohttp est comptée en échec sans interrompre les autres."""
+    aiohttp = pytest.importorskip("aiohttp")
+
+    urls = [
+        ("q1", "https://foo/Products?$filter=a&$top=1000"),
+        ("q2", "https://foo/Products?$filter=b&$top=1000"),
+    ]
+
+    async def fake_fetch(session, url, headers, timeout, cpt=None):
+        if url == urls[1][1]:
+            raise aiohttp.ClientConnectionError("connection reset")
+        return {"value": [create_mock_product("1", "S1A_1")]}
+
+    with patch(
+        "cdsodatacli.query._fetch_with_retry_async",
+        new=AsyncMock(side_effect=fake_fetch),
+    ):
+        result, cpt = qr.fetch_data_from_urls_async({"urls": urls, "headers": None})
+
+    assert list(result["id_original_query"]) == ["q1"]
+    assert cpt["urls_KO"] == 1
+    assert qr.get_failed_urls(cpt) == [urls[1]]
+
+
+def test_fetch_data_from_urls_async_cache_off_loop(tmp_path):
+    """Mode asyncio : les lectures/écritures du cache ne bloquent pas la boucle."""
+    pytest.importorskip("aiohttp")
+
+    urls = [("q1", "https://foo/Products?$filter=a&$top=1000")]
+    threads = []
+    write_cache = qr.write_cache
+
+    def spy(*args, **kwargs):
+        threads.append(threading.get_ident())
+        return write_cache(*args, **kwargs)
+
+    async def fake_fetch(session, url, headers, timeout, cpt=None):
+        return {"value": [create_mock_product("1", "S1A_1")]}
+
+    with (
+        patch("cdsodatacli.query._fetch_with_retry_async", side_effect=fake_fetch),
+        patch("cdsodatacli.query.write_cache", side_effect=spy),
+    ):
+        result, cpt = qr.fetch_data_from_urls_async(
+            {"urls": urls, "headers": None}, cache_dir=str(tmp_path)
+        )
+    assert list(result["Name"]) == ["S1A_1"]
+    assert threads and threading.get_ident() not in threads
+    assert qr.get_query_cache(str(tmp_path)).get(urls[0][1]) is not None
+
+
+def test_fetch_one_url_uses_cache(mock_requests, tmp_path):
+    """Test que la deuxième requête identique est servie par le cache SQLite."""
+    url = (
+        "https://catalogue.dataspace.copernicus.eu/odata/v1/Products?$filter=x&$top=10"
+    )
+    mock_requests.return_value.json.return_value = {
+        "value": [create_mock_product("1", "S1A_1")]
+    }
+    cpt = qr.defaultdict(int)
+    cpt, first = qr.fetch_one_url(url, cpt, index="q1", cache_dir=str(tmp_path))
+    cpt, second = qr.fetch_one_url(url, cpt, index="q1", cache_dir=str(tmp_path))
+
+    assert mock_requests.call_count == 1
+    assert cpt["cache_used"] == 1
+    assert list(first["Name"]) == list(second["Name"]) == ["S1A_1"]
+
+
+def test_fetch_one_url_answered_from_containing_query(mock_requests, tmp_path):
+    """Test qu'une sous-fenêtre / une zone plus petite est servie par le cache sémantique."""
+    products = [
+        dict(
+            create_mock_product(str(day), f"S1A_{day}"),
+            ContentDate={"Start": f"2024-01-{day:02d}T12:00:00.000Z"},
+            Footprint="geography'SRID=4326;POLYGON((0 0, 1 0, 1 1, 0 1, 0 0))'",
+        )
+        for day in range(1, 11)
+    ]
+    mock_requests.return_value.json.return_value = {"value": products}
+    big = create_test_gdf(
+        "2024-01-01T00:00:00",
+        "2024-01-11T00:00:00",
+        geometry=shapely.wkt.loads(
+            "POLYGON((-10 -10, 10 -10, 10 10, -10 10, -10 -10))"
+        ),
+        collection="SENTINEL-1",
+    )
+    big["id_original_query"] = "q1"
+    url = qr.create_urls(big)["urls"][0][1]
+    cpt = qr.defaultdict(int)
+    cpt, first = qr.fetch_one_url(url, cpt, index="q1", cache_dir=str(tmp_path))
+    assert len(first) == 10
+
+    small = create_test_gdf(
+        "2024-01-03T00:00:00",
+        "2024-01-05T00:00:00",
+        geometry=shapely.wkt.loads("POLYGON((0 0, 2 0, 2 2, 0 2, 0 0))"),
+        collection="SENTINEL-1",
+    )
+    small["id_original_query"] = "q1"
+    url = qr.create_urls(small, top=50)["urls"][0][1]
+    cpt, second = qr.fetch_one_url(url, cpt, index="q1", cache_dir=str(tmp_path))
+    assert mock_requests.call_count == 1
+    assert cpt["query_cache_used"] == 1
+    assert list(second["Name"]) == ["S1A_3", "S1A_4"]
+
+    # zone disjointe de l'empreinte des produits : aucun produit, toujours sans requête
+    far = small.copy()
+    far["geometry"] = [shapely.wkt.loads("POINT (5 5)")]
+    url = qr.create_urls(far)["urls"][0][1]
+    cpt, third = qr.fetch_one_url(url, cpt, index="q1", cache_dir=str(tmp_path))
+    assert mock_requests.call_count == 1
+    assert third is None or len(third) == 0
+
+
+def test_fetch_data_incremental_sync(mock_requests, patch_normalize_gdf, tmp_path):
+    """Test que la synchronisation incrémentale ne demande que les produits modifiés."""
+    gdf = create_test_gdf(
+        start_datetime="2022-05-03 00:00:00",
+        end_datetime="2022-05-03 00:11:00",
+        collection="SENTINEL-1",
+        id_query="daily",
+    )
+    mock_requests.return_value.json.return_value = {
+        "value": [
+            create_mock_product("1", "S1A_1", "2022-05-03T00:00:00Z"),
+            create_mock_product("2", "S1A_2", "2022-05-03T00:00:01Z"),
+        ]
+    }
+    first = qr.fetch_data(gdf=gdf.copy(), top=1000, sync_dir=str(tmp_path))
+    assert len(first) == 2
+    assert "ModificationDate gt" not in mock_requests.call_args[0][0]
+
+    # S1A_2 retraité et S1A_3 publié depuis
+    mock_requests.return_value.json.return_value = {
+        "value": [
+            create_mock_product("4", "S1A_2", "2022-06-01T00:00:00Z"),
+            create_mock_product("3", "S1A_3", "2022-06-01T00:00:00Z"),
+        ]
+    }
+    second = qr.fetch_data(gdf=gdf.copy(), top=1000, sync_dir=str(tmp_path))
+    assert "ModificationDate gt 2022-05-03T00:00:01.000Z" in (
+        mock_requests.call_args[0][0]
+    )
+    assert sorted(second["Name"]) == ["S1A_1", "S1A_2", "S1A_3"]
+    assert second.set_index("Name").loc["S1A_2", "Id"] == "4"
+    _, watermark = qr.load_sync_state(str(tmp_path), "daily")
+    assert watermark == "2022-06-01T00:00:00.000Z"
+
+
+def test_fetch_data_incremental_sync_single_window(
+    mock_requests, patch_normalize_gdf, tmp_path
+):
+    """Test que le delta est demandé en une seule fenêtre, sans découpage temporel."""
+    gdf = create_test_gdf(
+        start_datetime="2022-01-01 00:00:00",
+        end_datetime="2022-07-01 00:00:00",
+        collection="SENTINEL-1",
+        id_query="season",
+    )
+    mock_requests.return_value.json.return_value = {
+        "value": [create_mock_product("1", "S1A_1", "2022-05-03T00:00:00Z")]
+    }
+    timedelta_slice = timedelta(days=14)
+    qr.fetch_data(
+        gdf=gdf.copy(),
+        top=1000,
+        timedelta_slice=timedelta_slice,
+        sync_dir=str(tmp_path),
+    )
+    assert mock_requests.call_count > 1
+
+    mock_requests.reset_mock()
+    qr.fetch_data(
+        gdf=gdf.copy(),
+        top=1000,
+        timedelta_slice=timedelta_slice,
+        sync_dir=str(tmp_path),
+    )
+    assert mock_requests.call_count == 1
+    assert "ModificationDate gt" in mock_requests.call_args[0][0]
+
+
+def test_fetch_data_incremental_sync_incomplete_delta(
+    mock_requests, patch_normalize_gdf, tmp_path
+):
+    """Test que le filigrane n'avance pas si une réponse du delta est incomplète."""
+    gdf = create_test_gdf(
+        start_datetime="2022-05-03 00:00:00",
+        end_datetime="2022-05-03 00:11:00",
+        collection="SENTINEL-1",
+        id_query="daily",
+    )
+    mock_requests.return_value.json.return_value = {
+        "value": [create_mock_product("1", "S1A_1", "2022-05-03T00:00:00Z")]
+    }
+    qr.fetch_data(gdf=gdf.copy(), top=1000, sync_dir=str(tmp_path))
+    _, watermark = qr.load_sync_state(str(tmp_path), "daily")
+
+    # delta tronqué à la limite $skip : pages triées par date de modification
+    mock_requests.return_value.json.return_value = {
+        "value": [
+            create_mock_product(str(ii), f"S1A_{ii}", "2022-06-01T00:00:00Z")
+            for ii in range(2)
+        ]
+    }
+    with patch.object(qr, "ODATA_MAX_SKIP", 2):
+        qr.fetch_data(gdf=gdf.copy(), top=2, sync_dir=str(tmp_path))
+    assert "$orderby=ModificationDate asc" in mock_requests.call_args[0][0]
+    assert "$skip=2" in mock_requests.call_args[0][0]
+    assert qr.load_sync_state(str(tmp_path), "daily")[1] == watermark
+
+    # delta en échec
+    mock_requests.return_value.raise_for_status.side_effect = requests.HTTPError(
+        "400 Bad Request", response=MagicMock(status_code=400)
+    )
+    qr.fetch_data(
+        gdf=gdf.copy(), top=1000, sync_dir=str(tmp_path), raise_on_failed_urls=False
+    )
+    assert qr.load_sync_state(str(tmp_path), "daily")[1] == watermark
+
+
+def test_fetch_data_single_work_pool(mock_requests, patch_normalize_gdf):
+    """Test que les URLs de toutes les id_query partagent un seul pool de requêtes."""
+    gdf = gpd.GeoDataFrame(
+        pd.concat(
+            [
+                create_test_gdf(
+                    "2022-05-03 00:00:00",
+                    "2022-05-03 00:02:00",
+                    collection="SENTINEL-1",
+                    id_query="buoy%s" % ii,
+                )
+                for ii in range(3)
+            ],
+            ignore_index=True,
+        ),
+        geometry="geometry",
+    )
+    mock_requests.return_value.json.return_value = {
+        "value": [
+            create_mock_product("1", "S1A_1", "2022-05-03T00:00:00Z"),
+            create_mock_product("2", "S1A_2", "2022-05-03T00:00:01Z"),
+        ]
+    }
+    with patch.object(
+        qr,
+        "fetch_data_from_urls_multithread",
+        wraps=qr.fetch_data_from_urls_multithread,
+    ) as pool:
+        result = qr.fetch_data(gdf=gdf, top=1000, querymode="multi")
+    assert pool.call_count == 1
+    assert len(pool.call_args.kwargs["urls_plus_headers"]["urls"]) == 3
+    # post-traitement par requête : chaque produit garde une ligne par id_query
+    assert result.groupby("id_original_query")["Name"].apply(sorted).to_dict() == {
+        "buoy%s" % ii: ["S1A_1", "S1A_2"] for ii in range(3)
+    }
+
+
+def test_fetch_data_reports_failed_urls(mock_requests, patch_normalize_gdf):
+    """Test qu'une URL en erreur HTTP n'interrompt pas les autres et est signalée."""
+    gdf = gpd.GeoDataFrame(
+        pd.concat(
+            [
+                create_test_gdf(
+                    "2022-05-03 00:00:00",
+                    "2022-05-03 00:02:00",
+                    collection="SENTINEL-%s" % (ii + 1),
+                    id_query="buoy%s" % ii,
+                )
+                for ii in range(2)
+            ],
+            ignore_index=True,
+        ),
+        geometry="geometry",
+    )
+    ok = MagicMock(status_code=200, headers={})
+    ok.json.return_value = {"value": [create_mock_product("1", "S1A_1")]}
+    not_found = MagicMock(status_code=404, headers={})
+    not_found.raise_for_status.side_effect = requests.HTTPError(
+        "404 Not Found", response=not_found
+    )
+    mock_requests.return_value = None
+    mock_requests.side_effect = lambda url, **kwargs: (
+        not_found if "SENTINEL-2" in url else ok
+    )
+    with pytest.raises(qr.IncompleteFetchError) as error:
+        qr.fetch_data(gdf=gdf, top=1000, querymode="multi", raise_on_failed_urls=True)
+    assert len(error.value.failed_urls) == 1
+    assert list(error.value.result["id_original_query"]) == ["buoy0"]
+
+    # par défaut : résultat partiel, URLs en échec seulement journalisées
+    result = qr.fetch_data(gdf=gdf, top=1000, querymode="seq")
+    assert list(result["id_original_query"]) == ["buoy0"]
+
+
+def test_query_client_writes_partial_listing(tmp_path):
+    """Test que la CLI écrit le listing partiel puis sort en erreur."""
+    listing = tmp_path / "listing.csv"
+    partial = pd.DataFrame(
+        {field: ["x"] for field in qr.LISTING_FIELDS}, index=[0]
+    ).assign(Name="S1A_1")
+    argv = [
+        "queryCDS",
+        "--startdate",
+        "20220503T00:00:00",
+        "--stopdate",
+        "20220504T00:00:00",
+        "--geometry",
+        "POINT (-5.02 48.4)",
+        "--output-safe-listing",
+        str(listing),
+    ]
+    with (
+        patch("sys.argv", argv),
+        patch.object(
+            qr,
+            "fetch_data",
+            side_effect=qr.IncompleteFetchError(
+                [("q", "https://foo/Products?$filter=a")], result=partial
+            ),
+        ),
+    ):
+        with pytest.raises(SystemExit) as exit_info:
+            qr.query_client()
+    assert exit_info.value.code == 1
+    assert list(pd.read_csv(listing)["Name"]) == ["S1A_1"]
+
+
+def test_fetch_one_url_circuit_open_is_reported():
+    """Test qu'une requête non envoyée (disjoncteur ouvert) est listée en échec."""
+    cpt = qr.defaultdict(int)
+    with patch(
+        "cdsodatacli.query._fetch_with_retry",
+        side_effect=qr.CircuitOpenError("20 consecutive failures"),
+    ):
+        cpt, result = qr.fetch_one_url(
+            "https://foo/Products?$filter=a", cpt, index="q1", cache_dir=None
+        )
+    assert result is None
+    assert cpt["urls_circuit_open"] == 1
+    assert qr.get_failed_urls(cpt) == [("q1", "https://foo/Products?$filter=a")]
+
+
+def test_pack_urls():
+    """Test que les URLs ne différant que par la zone sont combinées avec `or`."""
+    gdf = gpd.GeoDataFrame(
+        {
+            "start_datetime": [pd.Timestamp("2022-05-03")] * 5,
+            "end_datetime": [pd.Timestamp("2022-05-04")] * 4
+            + [pd.Timestamp("2022-05-05")],
+            "geometry": shapely.points(range(5), range(5)),
+            "collection": ["SENTINEL-1"] * 5,
+            "id_original_query": ["a", "b", "c", "d", "e"],
+        },
+        geometry="geometry",
+    )
+    urls = qr.create_urls(gdf, top=100)["urls"]
+    packs = qr.pack_urls(urls, max_pack_size=3)
+    assert [positions for _, positions in packs] == [[0, 1, 2], [3], [4]]
+    assert packs[0][0] == (
+        qr.ODATA_PRODUCTS_URL
+        + "(OData.CSC.Intersects(area=geography'SRID=4326;POINT(0%200)') or "
+        "OData.CSC.Intersects(area=geography'SRID=4326;POINT(1%201)') or "
+        "OData.CSC.Intersects(area=geography'SRID=4326;POINT(2%202)')) and "
+        "Collection/Name eq 'SENTINEL-1' and ContentDate/Start gt "
+        "2022-05-03T00:00:00.000Z and ContentDate/Start lt 2022-05-04T00:00:00.000Z"
+        "&$top=100&$expand=Attributes"
+    )
+    # une URL seule est laissée telle quelle
+    assert packs[2][0] == urls[4][1]
+    # la longueur maximale de l'URL borne aussi la taille des paquets
+    max_url_length = len(requests.utils.requote_uri(urls[0][1])) + 100
+    packs = qr.pack_urls(urls, max_pack_size=50, max_url_length=max_url_length)
+    assert [positions for _, positions in packs] == [[0, 1], [2, 3], [4]]
+
+
+def test_fetch_data_packed_areas(mock_requests, patch_normalize_gdf):
+    """Test que les produits d'une requête groupée reviennent aux bonnes zones."""
+    gdf = gpd.GeoDataFrame(
+        {
+            "start_datetime": [np.datetime64("2022-05-03 00:00:00")] * 3,
+            "end_datetime": [np.datetime64("2022-05-03 00:02:00")] * 3,
+            "geometry": [
+                shapely.Point(0.5, 0.5),
+                shapely.Point(10.5, 0.5),
+                shapely.Point(50, 50),
+            ],
+            "collection": ["SENTINEL-1"] * 3,
+            "id_query": ["buoy0", "buoy1", "buoy2"],
+        },
+        geometry="geometry",
+    )
+    far_away = create_mock_product("2", "S1A_2", "2022-05-03T00:00:01Z")
+    far_away["Footprint"] = "SRID=4326;POLYGON((10 0, 11 0, 11 1, 10 1, 10 0)))"
+    mock_requests.return_value.json.return_value = {
+        "value": [
+            create_mock_product("1", "S1A_1", "2022-05-03T00:00:00Z"),
+            far_away,
+        ]
+    }
+    result = qr.fetch_data(gdf=gdf, top=1000, max_pack_size=10)
+    assert mock_requests.call_count == 1
+    assert " or " in mock_requests.call_args[0][0]
+    assert sorted(zip(result["id_original_query"], result["Name"])) == [
+        ("buoy0", "S1A_1"),
+        ("buoy1", "S1A_2"),
+    ]
+
+    # paquet saturé : les zones sont interrogées une par une
+    mock_requests.reset_mock()
+    with patch.object(qr, "EXPECTED_PRODUCTS_PER_AREA_PER_DAY", 0):
+        result = qr.fetch_data(gdf=gdf, top=2, max_pack_size=10)
+    assert mock_requests.call_count == 4
+    assert len(result) == 6
+
+    # taille de réponse attendue : un produit par zone, au plus 1 par paquet (top=2)
+    mock_requests.reset_mock()
+    result = qr.fetch_data(gdf=gdf, top=2, max_pack_size=10)
+    assert mock_requests.call_count == 3
+    assert all(" or " not in call.args[0] for call in mock_requests.call_args_list)
+
+
+def test_unpack_answer_keeps_unmatched_products():
+    """Test qu'un produit renvoyé par le serveur mais ne touchant localement aucune
+    zone du paquet est donné à la zone la plus proche."""
+    answer = pd.DataFrame(
+        {
+            "Name": ["S1A_1", "S1A_2"],
+            "Footprint": [
+                "geography'SRID=4326;POLYGON((0 0, 1 0, 1 1, 0 1, 0 0))'",
+                # arête géodésique : touche la bouée côté serveur, pas en planaire
+                "geography'SRID=4326;POLYGON((10 1, 11 1, 11 2, 10 2, 10 1))'",
+            ],
+        }
+    )
+    cpt = qr.defaultdict(int)
+    unpacked = qr.unpack_answer(
+        answer,
+        tags=["buoy0", "buoy1"],
+        geometries=[shapely.Point(0.5, 0.5), shapely.Point(10.5, 0.99)],
+        cpt=cpt,
+    )
+    assert sorted(zip(unpacked["id_original_query"], unpacked["Name"])) == [
+        ("buoy0", "S1A_1"),
+        ("buoy1", "S1A_2"),
+    ]
+    assert cpt["products_unmatched_in_pack"] == 1
+
+
+def test_estimate_expected_rows_bounds_packs():
+    """Test que la taille de réponse attendue borne la taille des paquets."""
+    gdf = gpd.GeoDataFrame(
+        {
+            "start_datetime": [pd.Timestamp("2022-05-03", tz="UTC")] * 4,
+            "end_datetime": [pd.Timestamp("2022-05-17", tz="UTC")] * 4,
+            "geometry": shapely.points(range(4), range(4)),
+            "collection": ["SENTINEL-1"] * 4,
+            "id_original_query": ["a", "b", "c", "d"],
+        },
+        geometry="geometry",
+    )
+    expected = qr.estimate_expected_rows(gdf)
+    assert list(expected) == [14 * qr.EXPECTED_PRODUCTS_PER_AREA_PER_DAY] * 4
+    urls = qr.create_urls(gdf, top=100)["urls"]
+    packs = qr.pack_urls(
+        urls, max_pack_size=50, expected_rows=expected, max_pack_rows=2 * expected[0]
+    )
+    assert [positions for _, positions in packs] == [[0, 1], [2, 3]]
+
+
+def test_fetch_data_associations(mock_requests, patch_normalize_gdf):
+    """Test la table d'association produits/lignes des requêtes (jointure STRtree)."""
+    gdf = gpd.GeoDataFrame(
+        {
+            "start_datetime": [np.datetime64("2022-05-03 00:00:00")] * 3
+            + [np.datetime64("2022-05-04 00:00:00")],
+            "end_datetime": [np.datetime64("2022-05-03 00:02:00")] * 3
+            + [np.datetime64("2022-05-04 00:02:00")],
+            "geometry": [
+                shapely.Point(0.5, 0.5),
+                shapely.Point(0.7, 0.7),
+                shapely.Point(10.5, 0.5),
+                shapely.Point(0.5, 0.5),
+            ],
+            "collection": ["SENTINEL-1"] * 4,
+            "id_query": ["buoys", "buoys", "buoys", "other"],
+        },
+        index=[10, 11, 12, 13],
+        geometry="geometry",
+    )
+    products = [
+        create_mock_product("1", "S1A_1", "2022-05-03T00:00:00Z"),
+        create_mock_product("2", "S1A_2", "2022-05-03T00:00:01Z"),
+    ]
+    products[1]["Footprint"] = "SRID=4326;POLYGON((10 0, 11 0, 11 1, 10 1, 10 0)))"
+    for product in products:
+        product["ContentDate"] = {"Start": "2022-05-03T00:01:00.000Z"}
+    mock_requests.return_value.json.return_value = {"value": products}
+    result, associations = qr.fetch_data(gdf=gdf, top=1000, return_associations=True)
+    assert sorted(result["Name"]) == ["S1A_1", "S1A_2"]
+    assert "id_original_query" not in result
+    # S1A_1 couvre les deux premières bouées, la requête "other" est un autre jour
+    assert associations.values.tolist() == [
+        ["S1A_1", "buoys", 10],
+        ["S1A_1", "buoys", 11],
+        ["S1A_2", "buoys", 12],
+    ]
+
+
+def test_associations_share_products_between_queries(mock_requests):
+    """Test qu'un produit est associé aux lignes de mêmes filtres d'autres requêtes."""
+    gdf = gpd.GeoDataFrame(
+        {
+            "startdate": [np.datetime64("2022-05-03 00:00:00")] * 3,
+            "stopdate": [np.datetime64("2022-05-03 00:02:00")] * 3,
+            "geofeature": [
+                shapely.Point(0.5, 0.5),
+                shapely.Point(0.7, 0.7),
+                shapely.Point(0.5, 0.5),
+            ],
+            "collection": ["SENTINEL-1", "SENTINEL-1", "SENTINEL-2"],
+            "id_query": ["buoy_a", "buoy_b", "buoy_c"],
+        },
+        geometry="geofeature",
+    )
+    product = create_mock_product("1", "S1A_1", "2022-05-03T00:00:00Z")
+    product["ContentDate"] = {"Start": "2022-05-03T00:01:00.000Z"}
+    found = MagicMock(status_code=200, headers={})
+    found.json.return_value = {"value": [product]}
+    nothing = MagicMock(status_code=200, headers={})
+    nothing.json.return_value = {"value": []}
+    # seule la requête de buoy_a renvoie S1A_1
+    mock_requests.side_effect = lambda url, **kwargs: (
+        found if "SENTINEL-1" in url and mock_requests.call_count == 1 else nothing
+    )
+    result, associations = qr.fetch_data(gdf=gdf, top=1000, return_associations=True)
+    assert list(result["Name"]) == ["S1A_1"]
+    # même collection -> buoy_b aussi ; SENTINEL-2 -> pas buoy_c
+    assert associations.values.tolist() == [
+        ["S1A_1", "buoy_a", 0],
+        ["S1A_1", "buoy_b", 1],
+    ]
+
+
+def test_prepare_query_geometries():
+    """Test la décomposition des MultiPolygon et la simplification des polygones."""
+    coastline = shapely.Point(5, 45).buffer(2, quad_segs=500)
+    gdf = gpd.GeoDataFrame(
+        {
+            "geometry": [
+                shapely.Point(0, 0),
+                shapely.MultiPolygon(
+                    [shapely.box(0, 0, 1, 1), shapely.box(2, 2, 3, 3)]
+                ),
+                coastline,
+                shapely.MultiPoint([(x, 0) for x in range(30)]),
+                shapely.LineString([(0, 0), (1, 2)]),
+                None,
+            ],
+            "id_original_query": ["a", "b", "c", "d", "e", "f"],
+        },
+        geometry="geometry",
+    )
+    prepared, approximated = qr.prepare_query_geometries(gdf, max_wkt_length=2000)
+    assert approximated
+    assert prepared["id_original_query"].tolist() == ["a", "b", "b", "c", "d", "e", "f"]
+    assert prepared.geometry.iloc[2].equals(shapely.box(2, 2, 3, 3))
+    simplified = prepared.geometry.iloc[3]
+    assert simplified.covers(coastline)
+    assert len(simplified.wkt) < 2000 < len(coastline.wkt)
+    # trop de parties -> enveloppe convexe, ligne -> boîte englobante
+    assert prepared.geometry.iloc[4].geom_type == "Polygon"
+    assert prepared.geometry.iloc[4].covers(gdf.geometry.iloc[3])
+    assert prepared.geometry.iloc[5].equals(shapely.box(0, 0, 1, 2))
+    assert prepared.geometry.iloc[6] is None
+    # géométries simples et courtes : rien à faire
+    prepared, approximated = qr.prepare_query_geometries(gdf.iloc[[0, 5]])
+    assert not approximated
+    assert prepared is not None and len(prepared) == 2
+
+
+def test_fetch_data_exact_geometry_filter(mock_requests):
+    """Test que les produits hors de la géométrie exacte sont retirés."""
+    coastline = shapely.Point(0, 0).buffer(2, quad_segs=500)
+    gdf = create_test_gdf(
+        "2022-05-03 00:00:00",
+        "2022-05-03 00:02:00",
+        geometry=coastline,
+        collection="SENTINEL-1",
+    )
+    inside = create_mock_product("1", "S1A_1", "2022-05-03T00:00:00Z")
+    outside = create_mock_product("2", "S1A_2", "2022-05-03T00:00:00Z")
+    outside["Footprint"] = "SRID=4326;POLYGON((1.5 1.5, 3 1.5, 3 3, 1.5 3, 1.5 1.5)))"
+    mock_requests.return_value.json.return_value = {"value": [inside, outside]}
+    result = qr.fetch_data(gdf=gdf, top=1000, max_url_length=3500)
+    assert len(mock_requests.call_args[0][0]) < 3500
+    assert result["Name"].tolist() == ["S1A_1"]
+
+
+def test_create_urls_column_wise():
+    """Test que les URLs construites colonne par colonne ont le format attendu."""
+    gdf = create_test_gdf(
+        "2022-05-03T00:00:00",
+        "2022-05-03T01:00:00",
+        geometry=shapely.wkt.loads("POINT (-5.123456789 48.4)"),
+        collection="SENTINEL-1",
+        sensormode="IW",
+    )
+    gdf = gpd.GeoDataFrame(
+        pd.concat([gdf, gdf], ignore_index=True), geometry="geometry"
+    )
+    gdf.loc[1, "geometry"] = shapely.wkt.loads(
+        "POLYGON ((-12 35, 15 35, 15 58, -12 58, -12 35))"
+    )
+    gdf.loc[1, "sensormode"] = None
+    gdf.loc[1, "name"] = "S1A"
+    gdf.loc[1, "Attributes"] = "cloudCover, 20"
+    gdf["id_original_query"] = ["a", "b"]
+    urls = qr.create_urls(gdf, top=100)["urls"]
+    base = "https://catalogue.dataspace.copernicus.eu/odata/v1/Products?$filter="
+    assert urls[0] == (
+        "a",
+        base
+        + "OData.CSC.Intersects(area=geography'SRID=4326;POINT(-5.123456789%2048.4)') "
+        "and Collection/Name eq 'SENTINEL-1' and Attributes/OData.CSC.StringAttribute/"
+        "any(att:att/Name eq 'operationalMode' and att/OData.CSC.StringAttribute/Value "
+        "eq 'IW') and ContentDate/Start gt 2022-05-03T00:00:00.000Z and "
+        "ContentDate/Start lt 2022-05-03T01:00:00.000Z&$top=100&$expand=Attributes",
+    )
+    assert urls[1] == (
+        "b",
+        base
+        + "OData.CSC.Intersects(area=geography'SRID=4326;POLYGON((-12 35, 15 35, 15 58, "
+        "-12 58, -12 35))') and Collection/Name eq 'SENTINEL-1' and contains(Name,'S1A') "
+        "and ContentDate/Start gt 2022-05-03T00:00:00.000Z and ContentDate/Start lt "
+        "2022-05-03T01:00:00.000Z and Attributes/OData.CSC.DoubleAttribute/any(att:att/"
+        "Name eq 'cloudCover' and att/OData.CSC.DoubleAttribute/Value le 20)"
+        "&$top=100&$expand=Attributes",
+    )
+
+
+def test_create_urls_fields():
+    """Test que `fields` donne un $select et n'étend les Attributes que sur demande."""
+    gdf = create_test_gdf(
+        "2022-05-03T00:00:00", "2022-05-03T01:00:00", collection="SENTINEL-1"
+    )
+    gdf["id_original_query"] = "a"
+    _, url = qr.create_urls(gdf, top=100, fields=["Id", "S3Path", "geometry"])["urls"][
+        0
+    ]
+    assert url.endswith(
+        "&$top=100&$select=Id,Name,ModificationDate,ContentDate,Footprint,S3Path"
+    )
+    _, url = qr.create_urls(gdf, top=100, fields=["S3Path", "Attributes"])["urls"][0]
+    assert url.endswith(
+        "&$select=Id,Name,ModificationDate,ContentDate,Footprint,S3Path"
+        "&$expand=Attributes"
+    )
+
+
+def test_hydrate_attributes(mock_requests):
+    """Test que les Attributes sont demandés par lots d'Id puis joints."""
+    products = pd.DataFrame(
+        {"Id": ["id1", "id2", "id3"], "Name": ["S1A_1", "S1A_2", "S1A_3"]},
+        index=[5, 6, 7],
+    )
+
+    def answer(url, **kwargs):
+        response = MagicMock()
+        response.status_code = 200
+        ids = [i for i in ("id1", "id2") if f"'{i}'" in url]
+        response.json.return_value = {
+            "value": [
+                {"Id": i, "Name": i, "Attributes": [{"Name": "cloudCover", "Value": i}]}
+                for i in ids
+            ]
+        }
+        return response
+
+    mock_requests.side_effect = answer
+    result = qr.hydrate_attributes(products, batch_size=2)
+    assert mock_requests.call_count == 2
+    assert "$filter=Id in ('id1','id2')&$top=2&$select=Id,Name&$expand=Attributes" in (
+        mock_requests.call_args_list[0][0][0]
+    )
+    assert result.index.tolist() == [5, 6, 7]
+    assert result["Attributes"].tolist() == [
+        [{"Name": "cloudCover", "Value": "id1"}],
+        [{"Name": "cloudCover", "Value": "id2"}],
+        None,
+    ]
+
+
+def test_hydrate_attributes_failed_batch(mock_requests, caplog):
+    """Test que les Id des lots en échec sont signalés, ou levés sur demande."""
+    products = pd.DataFrame({"Id": ["id1", "id2", "id3"], "Name": ["a", "b", "c"]})
+
+    def answer(url, **kwargs):
+        response = MagicMock()
+        response.status_code = 200
+        if "'id3'" in url:
+            response.status_code = 400
+            response.raise_for_status.side_effect = requests.HTTPError(
+                "400 Bad Request", response=response
+            )
+        response.json.return_value = {
+            "value": [{"Id": "id1", "Name": "a", "Attributes": []}]
+        }
+        return response
+
+    mock_requests.side_effect = answer
+    with caplog.at_level("ERROR"):
+        result = qr.hydrate_attributes(products, batch_size=2)
+    assert result["Attributes"].tolist() == [[], None, None]
+    assert "Attributes of 1 products (1 batches) could not be fetched" in caplog.text
+    assert "id3" in caplog.text
+
+    with pytest.raises(qr.IncompleteFetchError) as error:
+        qr.hydrate_attributes(products, batch_size=2, raise_on_failed_urls=True)
+    assert "'id3'" in error.value.failed_urls[0][1]
+    assert error.value.result["Attributes"].tolist() == [[], None, None]
+
+
+def test_apply_slicing_time_to_gdf():
+    """Test le découpage des fenêtres longues et de celles à cheval sur deux tranches."""
+    gdf = gpd.GeoDataFrame(
+        {
+            "start_datetime": pd.to_datetime(
+                ["2022-01-01", "2022-01-06", "2022-01-02"]
+            ).tz_localize("UTC"),
+            "end_datetime": pd.to_datetime(
+                ["2022-01-20", "2022-01-09", "2022-01-03"]
+            ).tz_localize("UTC"),
+            "geometry": [None, None, None],
+        }
+    )
+    sliced = qr.apply_slicing_time_to_gdf(gdf, timedelta(days=7))
+    assert list(sliced.index) == [2, 0, 1, 0, 1, 0]
+    assert list(sliced["start_datetime"].dt.strftime("%m-%d")) == [
+        "01-02",
+        "01-01",
+        "01-06",
+        "01-08",
+        "01-08",
+        "01-15",
+    ]
+    assert list(sliced["end_datetime"].dt.strftime("%m-%d")) == [
+        "01-03",
+        "01-08",
+        "01-08",
+        "01-15",
+        "01-09",
+        "01-20",
+    ]
+    assert str(sliced["start_datetime"].dt.tz) == "UTC"
+
+
+def test_apply_slicing_time_to_gdf_boundary_rows():
+    """Test les lignes à cheval sur une limite de tranche ou qui la touchent."""
+    gdf = gpd.GeoDataFrame(
+        {
+            # fenêtre courte à cheval sur la limite du 01-08 : l'ancienne boucle
+            # l'ignorait, elle est coupée en deux
+            # fenêtre longue finissant pile sur la limite du 01-15 : pas de
+            # fenêtre vide dans la tranche suivante
+            "start_datetime": pd.to_datetime(["2022-01-07", "2022-01-01"]),
+            "end_datetime": pd.to_datetime(["2022-01-09", "2022-01-15"]),
+            "geometry": [None, None],
+        }
+    )
+    sliced = qr.apply_slicing_time_to_gdf(gdf, timedelta(days=7))
+    assert list(sliced.index) == [0, 1, 0, 1]
+    assert list(sliced["start_datetime"].dt.strftime("%m-%d")) == [
+        "01-07",
+        "01-01",
+        "01-08",
+        "01-08",
+    ]
+    assert list(sliced["end_datetime"].dt.strftime("%m-%d")) == [
+        "01-08",
+        "01-08",
+        "01-09",
+        "01-15",
+    ]
+    # un produit pile sur la limite est demandé par la tranche qui commence
+    assert list(sliced["start_inclusive"]) == [False, False, True, True]
+    urls = [
+        url for _, url in qr.create_urls(sliced.assign(id_original_query=0))["urls"]
+    ]
+    assert "Start ge 2022-01-08T00:00:00.000Z" in urls[2]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
+
+
+def test_fetch_data_cache_freshness_per_call(mock_requests, tmp_path):
+    """La politique de fraîcheur ne s'applique qu'à l'appel qui la donne."""
+    gdf = create_test_gdf("2020-01-01T00:00:00", "2020-01-02T00:00:00")
+    policy = qr.CacheFreshnessPolicy(recent_ttl_hours=0)
+    seen = []
+    fetch_one_url = qr.fetch_one_url
+
+    def spy(*args, **kwargs):
+        seen.append(qr.get_query_cache(str(tmp_path)).freshness)
+        return fetch_one_url(*args, **kwargs)
+
+    with patch("cdsodatacli.query.fetch_one_url", side_effect=spy):
+        qr.fetch_data(gdf, cache_dir=str(tmp_path), cache_freshness=policy)
+        qr.fetch_data(gdf, cache_dir=str(tmp_path))
+    assert seen == [policy, None]
+    assert qr.get_query_cache(str(tmp_path)).freshness is None
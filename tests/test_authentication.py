@@ -1,4 +1,7 @@
-from cdsodatacli.fetch_access_token import get_access_token
+import time
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from cdsodatacli.fetch_access_token import get_access_token, TokenManager
 from cdsodatacli.utils import get_conf
 from dotenv import load_dotenv
 import os
@@ -40,7 +43,7 @@ def test_get_access_token_raises_on_401(monkeypatch):
         def raise_for_status(self):
             raise requests.exceptions.HTTPError("401 Client Error: Unauthorized")
 
-    monkeypatch.setattr("requests.post", lambda *a, **k: DummyResp())
+    monkeypatch.setattr("requests.Session.post", lambda *a, **k: DummyResp())
 
     with pytest.raises(requests.exceptions.HTTPError):
         get_access_token("baduser@example.com", "badpassword")
@@ -55,9 +58,132 @@ def test_get_access_token_success(monkeypatch):
         def json(self):
             return {"access_token": "TESTTOKEN1234567890"}
 
-    monkeypatch.setattr("requests.post", lambda *a, **k: DummyRespOK())
+    monkeypatch.setattr("requests.Session.post", lambda *a, **k: DummyRespOK())
 
     headers = get_access_token("user", "pass")
     assert "Authorization" in headers
     assert headers["Authorization"].startswith("Bearer TESTTOKEN")
     assert headers["Accept"] == "application/json"
+
+
+def test_token_manager_single_request_per_login(monkeypatch):
+    posted = []
+
+    class SlowResp:
+        def raise_for_status(self):
+            return None
+
+        def json(self):
+            return {"access_token": "TESTTOKEN1234567890", "expires_in": 600}
+
+    def slow_post(*args, **kwargs):
+        posted.append(kwargs["data"]["username"])
+        time.sleep(0.1)
+        return SlowResp()
+
+    monkeypatch.setattr("requests.Session.post", slow_post)
+    manager = TokenManager(proactive_refresh=False)
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        tokens = list(
+            executor.map(
+                lambda i: manager.get_token(f"user{i % 2}", "pass")[0], range(16)
+            )
+        )
+    assert set(tokens) == {"TESTTOKEN1234567890"}
+    assert sorted(posted) == ["user0", "user1"]
+
+
+def test_token_manager_refresh_grant(monkeypatch):
+    grants = []
+    timers = []
+
+    class RespOK:
+        def __init__(self, grant):
+            self.grant = grant
+
+        def raise_for_status(self):
+            return None
+
+        def json(self):
+            return {
+                "access_token": f"TOKEN-{self.grant}-{len(grants)}",
+                "expires_in": 600,
+                "refresh_token": "REFRESH",
+                "refresh_expires_in": 3600,
+            }
+
+    class FakeTimer:
+        """records the background renewals instead of waiting for them"""
+
+        def __init__(self, interval, function, args):
+            timers.append((interval, function, args))
+
+        def start(self):
+            return None
+
+    def post(*args, **kwargs):
+        grants.append(kwargs["data"]["grant_type"])
+        return RespOK(kwargs["data"]["grant_type"])
+
+    monkeypatch.setattr("requests.Session.post", post)
+    monkeypatch.setattr("cdsodatacli.fetch_access_token.threading.Timer", FakeTimer)
+    manager = TokenManager(refresh_margin=60)
+    token, created = manager.get_token("refresh_user", "pass")
+    interval, renew, args = timers.pop()
+    assert interval == 540
+    # token used since its creation: renewed with the refresh_token grant
+    args[1]["access-token-creation-date"] = created - datetime.timedelta(seconds=1)
+    assert manager.get_token("refresh_user", "pass")[0] == token  # cached
+    renew(*args)
+    assert grants == ["password", "refresh_token"]
+    # token unused since its creation: not renewed
+    _, renew, args = timers.pop()
+    renew(*args)
+    assert grants == ["password", "refresh_token"]
+    assert manager.get_token("refresh_user", "pass")[0] == "TOKEN-refresh_token-2"
+    manager.clear()
+
+
+def test_token_manager_key_includes_password(monkeypatch):
+    posted = []
+
+    class DummyRespOK:
+        def raise_for_status(self):
+            return None
+
+        def json(self):
+            return {"access_token": f"TOKEN-{len(posted)}"}
+
+    def post(*args, **kwargs):
+        posted.append(kwargs["data"]["password"])
+        return DummyRespOK()
+
+    monkeypatch.setattr("requests.Session.post", post)
+    manager = TokenManager(proactive_refresh=False)
+    assert manager.get_token("user", "good")[0] == "TOKEN-1"
+    # a wrong password does not get the cached token
+    assert manager.get_token("user", "wrong")[0] == "TOKEN-2"
+    assert manager.get_token("user", "good")[0] == "TOKEN-1"
+    assert posted == ["good", "wrong"]
+    assert all("good" not in str(key) for key in manager.tokens)
+
+
+def test_get_access_token_reuses_token(monkeypatch):
+    posted = []
+
+    class DummyRespOK:
+        def raise_for_status(self):
+            return None
+
+        def json(self):
+            return {"access_token": "TESTTOKEN1234567890"}
+
+    def post(*args, **kwargs):
+        posted.append(1)
+        return DummyRespOK()
+
+    monkeypatch.setattr("requests.Session.post", post)
+    for _ in range(3):
+        headers = get_access_token("loop_user", "pass")
+    assert headers["Authorization"] == "Bearer TESTTOKEN1234567890"
+    assert len(posted) == 1
@@ -0,0 +1,256 @@
+import json
+import time
+import pytest
+from cdsodatacli.cache import (
+    QueryCache,
+    CacheFreshnessPolicy,
+    get_query_cache,
+    url_hash,
+    encode_payload,
+    url_time_window,
+    normalize_query_url,
+    odata_date_to_epoch,
+    filter_products,
+)
+
+URL1 = "https://catalogue.dataspace.copernicus.eu/odata/v1/Products?$filter=a&$top=1000"
+URL2 = "https://catalogue.dataspace.copernicus.eu/odata/v1/Products?$filter=b&$top=1000"
+URL3 = "https://catalogue.dataspace.copernicus.eu/odata/v1/Products?$filter=c&$top=1000"
+ANSWER = {"value": [{"Id": "1", "Name": "S1A_IW_GRDH_1SDV_20220503T000000"}]}
+
+
+def test_put_get_and_stats(tmp_path):
+    cache = QueryCache(str(tmp_path), compression="none")
+    assert cache.get(URL1) is None
+    cache.put(URL1, ANSWER)
+    assert cache.get(URL1) == ANSWER
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["bytes"] == len(encode_payload(ANSWER, compression="none"))
+    cache.close()
+
+
+def test_hits_are_written_on_close(tmp_path):
+    cache = QueryCache(str(tmp_path))
+    cache.put(URL1, ANSWER)
+    cache.get(URL1)
+    cache.get(URL2)
+    cache.close()
+    cache = QueryCache(str(tmp_path))
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    cache.close()
+
+
+def test_lru_eviction_on_max_entries(tmp_path):
+    cache = QueryCache(str(tmp_path), max_entries=2)
+    cache.put(URL1, ANSWER)
+    time.sleep(0.01)
+    cache.put(URL2, ANSWER)
+    time.sleep(0.01)
+    cache.get(URL1)  # URL2 becomes the least recently used
+    time.sleep(0.01)
+    cache.put(URL3, ANSWER)
+    assert cache.get(URL2) is None
+    assert cache.get(URL1) == ANSWER
+    assert cache.get(URL3) == ANSWER
+    cache.close()
+
+
+def test_prune_max_bytes_and_vacuum(tmp_path):
+    cache = QueryCache(str(tmp_path), compression="none")
+    for url in (URL1, URL2, URL3):
+        cache.put(url, ANSWER)
+        time.sleep(0.01)
+    nb_removed = cache.prune(max_bytes=len(encode_payload(ANSWER, compression="none")))
+    assert nb_removed == 2
+    assert cache.stats()["entries"] == 1
+    assert cache.get(URL3) == ANSWER
+    cache.vacuum()
+    cache.close()
+
+
+def test_import_legacy_json_files(tmp_path):
+    with open(tmp_path / (url_hash(URL1) + ".json"), "w") as f:
+        json.dump(ANSWER, f)
+    cache = get_query_cache(str(tmp_path))
+    assert cache.import_json_files(remove=True) == 1
+    assert cache.get(URL1) == ANSWER
+    assert not (tmp_path / (url_hash(URL1) + ".json")).exists()
+    cache.close()
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+def test_compressed_payloads(tmp_path, compression):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    answer = {"value": [dict(ANSWER["value"][0], Id=str(i)) for i in range(100)]}
+    cache = QueryCache(str(tmp_path), compression=compression)
+    cache.put(URL1, answer)
+    assert cache.get(URL1) == answer
+    assert cache.stats()["bytes"] < len(json.dumps(answer)) / 5
+    # an entry written with another codec stays readable
+    cache.compression = "none"
+    cache.put(URL2, ANSWER)
+    assert cache.get(URL1) == answer
+    assert cache.get(URL2) == ANSWER
+    cache.close()
+
+
+URL_OLD = (
+    "https://catalogue.dataspace.copernicus.eu/odata/v1/Products?$filter="
+    "ContentDate/Start gt 2020-01-01T00:00:00.000Z and "
+    "ContentDate/Start lt 2020-01-15T00:00:00.000Z&$top=1000"
+)
+
+
+def test_url_time_window():
+    start, end = url_time_window(URL_OLD)
+    assert end - start == 14 * 86400
+    assert url_time_window(URL_OLD.replace(" ", "%20")) == (start, end)
+    assert url_time_window(URL1) == (None, None)
+
+
+def test_freshness_policy(tmp_path):
+    policy = CacheFreshnessPolicy(immutable_after_days=30, recent_ttl_hours=1)
+    now = time.time()
+    # window already old when fetched -> immutable
+    assert policy.is_fresh(window_end=now - 40 * 86400, fetched_at=now - 5 * 3600)
+    # recent or unknown window -> expires after the TTL
+    assert policy.is_fresh(window_end=now - 86400, fetched_at=now - 60)
+    assert not policy.is_fresh(window_end=now - 86400, fetched_at=now - 7200)
+    assert not policy.is_fresh(window_end=None, fetched_at=now - 7200)
+
+    cache = QueryCache(str(tmp_path), freshness=policy)
+    cache.put(URL_OLD, ANSWER, fetched_at=now - 7200)
+    cache.put(URL1, ANSWER, fetched_at=now - 7200)
+    cache.put(URL2, ANSWER)
+    assert cache.get(URL_OLD) == ANSWER
+    assert cache.get(URL1) is None
+    assert cache.get(URL2) == ANSWER
+    assert cache.prune(expired=True) == 1
+    assert cache.stats()["expired"] == 1
+    cache.close()
+
+
+def test_normalize_query_url():
+    query = normalize_query_url(URL_OLD)
+    assert query["top"] == 1000
+    assert query["end"] - query["start"] == 14 * 86400
+    # clause order, $top and $orderby do not change the normalised query
+    clauses = URL_OLD.split("$filter=")[1].split("&")[0].split(" and ")
+    other = (
+        URL_OLD.split("$filter=")[0]
+        + "$filter="
+        + " and ".join(reversed(clauses))
+        + "&$top=10&$orderby=ContentDate/Start asc"
+    )
+    assert normalize_query_url(other)["signature"] == query["signature"]
+    assert normalize_query_url(URL_OLD + "&$skip=1000") is None
+    assert normalize_query_url(URL1) is None  # unknown filter
+    # a projection ($select) is part of the signature
+    projected = normalize_query_url(URL_OLD + "&$select=Id,Name,Footprint")
+    assert projected["signature"] != query["signature"]
+
+
+def day_url(day, nb_days=1):
+    start = f"2020-02-{day:02d}T00:00:00.000Z"
+    end = f"2020-02-{day + nb_days:02d}T00:00:00.000Z"
+    return (
+        "https://catalogue.dataspace.copernicus.eu/odata/v1/Products?$filter="
+        f"ContentDate/Start gt {start} and ContentDate/Start lt {end}&$top=1000"
+    )
+
+
+def test_find_query_among_many_windows(tmp_path):
+    cache = QueryCache(str(tmp_path))
+    # balayage : une réponse complète par jour, toutes avec la même signature
+    for day in range(1, 28):
+        product = {
+            "Name": f"S1A_{day}",
+            "ContentDate": {"Start": f"2020-02-{day:02d}T12:00:00.000Z"},
+        }
+        cache.put_query(normalize_query_url(day_url(day)), [product])
+    query = normalize_query_url(day_url(10))
+    assert [p["Name"] for p in cache.find_query(query)] == ["S1A_10"]
+    # fenêtre à cheval sur deux réponses : aucune ne la contient
+    assert cache.find_query(normalize_query_url(day_url(10, nb_days=2))) is None
+    # fenêtre ouverte : seule une réponse sans borne pourrait y répondre
+    unbounded = dict(query, start=None)
+    assert cache.find_query(unbounded) is None
+    cache.close()
+
+
+def test_odata_date_to_epoch_iso_forms():
+    expected = 1651536000.5
+    for date in (
+        "2022-05-03T00:00:00.500Z",
+        "2022-05-03T00:00:00.5Z",
+        "2022-05-03T00:00:00.500000Z",
+        "2022-05-03T00:00:00.500+00:00",
+        "2022-05-03T02:00:00.500+02:00",
+        "2022-05-03T00:00:00.500",
+    ):
+        assert odata_date_to_epoch(date) == expected
+    assert odata_date_to_epoch("2022-05-03T00:00:00Z") == 1651536000
+    with pytest.raises(ValueError):
+        odata_date_to_epoch("03/05/2022")
+
+
+def test_filter_products_is_exact():
+    query = normalize_query_url(day_url(10))
+    inside = {"Name": "in", "ContentDate": {"Start": "2020-02-10T12:00:00Z"}}
+    outside = {"Name": "out", "ContentDate": {"Start": "2020-02-11T12:00:00.000Z"}}
+    undated = {"Name": "undated"}
+    assert [p["Name"] for p in filter_products([inside, outside, undated], query)] == [
+        "in"
+    ]
+    # une date illisible : la réponse ne peut pas être dérivée du cache
+    unreadable = {"Name": "?", "ContentDate": {"Start": "10/02/2020"}}
+    assert filter_products([inside, unreadable], query) is None
+
+
+def test_inclusive_start_bound(tmp_path):
+    inclusive_url = day_url(10).replace("Start gt", "Start ge")
+    query = normalize_query_url(inclusive_url)
+    at_start = {"Name": "at", "ContentDate": {"Start": "2020-02-10T00:00:00Z"}}
+    before = {"Name": "before", "ContentDate": {"Start": "2020-02-09T23:59:59.999999Z"}}
+    assert [p["Name"] for p in filter_products([at_start, before], query)] == ["at"]
+    assert filter_products([at_start], normalize_query_url(day_url(10))) == []
+    assert url_time_window(inclusive_url)[0] == query["start"]
+    # une fenêtre dont le début est exclu ne contient pas la fenêtre qui l'inclut
+    cache = QueryCache(str(tmp_path))
+    cache.put_query(normalize_query_url(day_url(10)), [])
+    assert cache.find_query(query) is None
+    cache.put_query(query, [at_start])
+    assert cache.find_query(normalize_query_url(day_url(10))) == []
+    cache.close()
+
+
+def test_find_query_unreadable_date_is_a_miss(tmp_path):
+    cache = QueryCache(str(tmp_path))
+    product = {"Name": "?", "ContentDate": {"Start": "10/02/2020"}}
+    cache.put_query(normalize_query_url(day_url(9, nb_days=3)), [product])
+    assert cache.find_query(normalize_query_url(day_url(10))) is None
+    assert cache.stats()["query_hits"] == 0
+    cache.close()
+
+
+def test_query_answers_are_evicted_with_entries(tmp_path):
+    cache = QueryCache(str(tmp_path), max_entries=3)
+    for day in range(1, 4):
+        cache.put_query(normalize_query_url(day_url(day)), [])
+        time.sleep(0.01)
+    cache.find_query(normalize_query_url(day_url(1)))  # jour 2 : le moins récent
+    cache.put(URL1, ANSWER)
+    stats = cache.stats()
+    assert stats["entries"] + stats["queries"] == 3
+    assert cache.find_query(normalize_query_url(day_url(2))) is None
+    assert cache.find_query(normalize_query_url(day_url(1))) == []
+    # la taille des réponses par requête compte dans max_bytes
+    assert cache.prune(max_bytes=0) == 3
+    assert cache.stats()["bytes"] == 0
+    cache.close()
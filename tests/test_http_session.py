@@ -0,0 +1,24 @@
+from cdsodatacli.http_session import (
+    configure_http_session,
+    get_http_session,
+    close_http_session,
+)
+
+
+def test_get_http_session_is_shared():
+    session = get_http_session()
+    assert get_http_session() is session
+    adapter = session.get_adapter("https://catalogue.dataspace.copernicus.eu")
+    assert adapter._pool_block is True
+
+
+def test_configure_http_session_resets_pool():
+    session = get_http_session()
+    configure_http_session(pool_connections=2, pool_maxsize=4, pool_block=False)
+    new_session = get_http_session()
+    assert new_session is not session
+    adapter = new_session.get_adapter("https://identity.dataspace.copernicus.eu")
+    assert adapter._pool_maxsize == 4
+    assert adapter._pool_block is False
+    configure_http_session()
+    close_http_session()
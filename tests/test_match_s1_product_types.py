@@ -81,7 +81,7 @@ def test_closest_in_time():
 
 
 # Tests pour find_product_for_safe (avec les nouveaux attributs)
-@patch("requests.get")
+@patch("requests.Session.get")
 @patch("cdsodatacli.scripts.match_s1_product_types.ExplodeSAFE")
 def test_find_product_success_exact(
     mock_explode_class, mock_get, real_safe_id, logger, mock_explode_safe
@@ -122,7 +122,7 @@ def test_find_product_success_exact(
     assert "2SDV" in filter_str, f"Expected '2SDV' in filter, got: {filter_str}"
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 @patch("cdsodatacli.scripts.match_s1_product_types.ExplodeSAFE")
 def test_find_product_success_exact_grds(
     mock_explode_class, mock_get, real_safe_id, logger, mock_explode_safe
@@ -162,7 +162,7 @@ def test_find_product_success_exact_grds(
     assert "1SDV" in filter_str, f"Expected '1SDV' in filter, got: {filter_str}"
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 @patch("cdsodatacli.scripts.match_s1_product_types.ExplodeSAFE")
 def test_find_product_success_closest(
     mock_explode_class, mock_get, real_safe_id, logger, mock_explode_safe
@@ -208,7 +208,7 @@ def test_find_product_success_closest(
     assert delta_dist[3] == 1
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 @patch("cdsodatacli.scripts.match_s1_product_types.ExplodeSAFE")
 def test_find_product_not_found(
     mock_explode_class, mock_get, real_safe_id, logger, mock_explode_safe
@@ -223,7 +223,7 @@ def test_find_product_not_found(
     assert "No OCN_ product found" in res["note"]
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 @patch("cdsodatacli.scripts.match_s1_product_types.ExplodeSAFE")
 def test_find_product_delta_exceeds_threshold(
     mock_explode_class, mock_get, real_safe_id, logger, mock_explode_safe
@@ -252,7 +252,7 @@ def test_find_product_delta_exceeds_threshold(
     assert "20s away" in res["note"]
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 @patch("cdsodatacli.scripts.match_s1_product_types.ExplodeSAFE")
 def test_find_product_for_slc(
     mock_explode_class, mock_get, real_safe_id, logger, mock_explode_safe
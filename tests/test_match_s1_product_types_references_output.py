@@ -107,7 +107,7 @@ def logger():
 
 
 @pytest.mark.parametrize("source_id, expected_target", PAIRS)
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_slc_to_grdh_match(mock_get, source_id, expected_target, logger):
     with patch("cdsodatacli.scripts.match_s1_product_types.MAX_DELTA_SECONDS", 3600):
         # Extraire les infos du source pour vérifier le filtre
@@ -0,0 +1,165 @@
+import time
+import asyncio
+import threading
+import email.utils
+import multiprocessing
+import requests
+from unittest.mock import patch, MagicMock
+import cdsodatacli.query as qr
+from cdsodatacli.rate_limiter import (
+    RateLimiter,
+    AdaptiveRateLimiter,
+    SharedRateLimiter,
+    parse_retry_after,
+    shared_rate_limiter_key,
+)
+
+
+def test_additive_increase_multiplicative_decrease():
+    limiter = AdaptiveRateLimiter(
+        max_requests_per_second=10, min_requests_per_second=2, decrease_cooldown=0
+    )
+    for _ in range(10):
+        limiter.on_success()
+    # 10 answers at 10 req/s = 1 s without refusal -> +1 req/s
+    assert abs(limiter.current_rate - 11) < 0.1
+    limiter.on_throttle()
+    assert abs(limiter.current_rate - 5.5) < 0.1
+    for _ in range(5):
+        limiter.on_throttle()
+    assert limiter.current_rate == 2
+    assert limiter.nb_throttled == 6
+
+
+def test_throttle_burst_decreases_once():
+    limiter = AdaptiveRateLimiter(max_requests_per_second=40, decrease_cooldown=10)
+    for _ in range(20):  # same refusal received by every request in flight
+        limiter.on_throttle()
+    assert limiter.current_rate == 20
+
+
+def test_retry_after_blocks_requests():
+    limiter = AdaptiveRateLimiter(max_requests_per_second=1000)
+    limiter.on_throttle(retry_after=0.3)
+    t0 = time.time()
+    limiter.wait_if_needed()
+    assert time.time() - t0 >= 0.25
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    in_a_minute = email.utils.formatdate(time.time() + 60, usegmt=True)
+    assert 55 < parse_retry_after(in_a_minute) <= 60
+
+
+def test_fetch_with_retry_reports_throttling():
+    limiter = AdaptiveRateLimiter(max_requests_per_second=30, max_burst=40)
+    throttled = MagicMock(status_code=429, headers={"Retry-After": "0"})
+    throttled.raise_for_status.side_effect = requests.HTTPError(
+        "429 Too Many Requests", response=throttled
+    )
+    ok = MagicMock(status_code=200, headers={})
+    ok.json.return_value = {"value": []}
+    with (
+        patch.object(qr, "_GLOBAL_RATE_LIMITER", limiter),
+        patch("requests.Session.get", side_effect=[throttled, ok]),
+        patch("cdsodatacli.retry.time.sleep"),
+    ):
+        assert qr._fetch_with_retry("https://example.org", None, 30) == {"value": []}
+    assert limiter.nb_throttled == 1
+    assert 15 <= limiter.current_rate < 16
+
+
+def _consume_shared_tokens(state_dir, nb_requests):
+    limiter = SharedRateLimiter(
+        state_dir, "catalogue|anonymous", max_requests_per_second=50, max_burst=1
+    )
+    for _ in range(nb_requests):
+        limiter.wait_if_needed()
+
+
+def test_shared_rate_limiter_splits_budget_between_processes(tmp_path):
+    t0 = time.time()
+    processes = [
+        multiprocessing.get_context("fork").Process(
+            target=_consume_shared_tokens, args=(str(tmp_path), 5)
+        )
+        for _ in range(3)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(10)
+    # 15 requests at 50 req/s with a single token in the bucket: at least 14 / 50 s
+    assert time.time() - t0 >= 0.25
+    assert all(process.exitcode == 0 for process in processes)
+
+
+def test_shared_rate_limiter_keys(tmp_path):
+    key = shared_rate_limiter_key(qr.ODATA_PRODUCTS_URL, "user@foo.fr")
+    assert key == "catalogue.dataspace.copernicus.eu|user@foo.fr"
+    job1 = SharedRateLimiter(str(tmp_path), key, max_requests_per_second=40)
+    job2 = SharedRateLimiter(str(tmp_path), key, max_requests_per_second=40)
+    other_account = SharedRateLimiter(
+        str(tmp_path),
+        shared_rate_limiter_key(qr.ODATA_PRODUCTS_URL),
+        max_requests_per_second=40,
+    )
+    job1.on_throttle(retry_after=0)
+    # le 429 reçu par un job ralentit les autres jobs du même compte
+    assert job2.current_rate == 20
+    assert other_account.current_rate == 40
+
+
+def test_shared_rate_limiter_batches_successes(tmp_path):
+    limiter = SharedRateLimiter(
+        str(tmp_path), "catalogue|anonymous", success_batch_size=4
+    )
+    limiter.reserve()
+    with patch.object(limiter, "_shared_state") as shared_state:
+        for _ in range(3):
+            limiter.on_success()
+        # les réponses correctes ne prennent pas le verrou du fichier d'état
+        shared_state.assert_not_called()
+        limiter.on_success()
+        shared_state.assert_called_once()
+    limiter.on_success()
+    assert limiter.pending_successes == 1
+    # appliquée par la réservation suivante, qui relit et réécrit l'état partagé
+    limiter.reserve()
+    assert limiter.pending_successes == 0
+
+
+def test_waiting_does_not_hold_the_lock():
+    limiter = RateLimiter(max_requests_per_second=2, max_burst=1)
+    limiter.reserve()
+    sleeper = threading.Thread(target=limiter.wait_if_needed)  # attend ~0.5 s
+    sleeper.start()
+    time.sleep(0.05)
+    t0 = time.time()
+    # la réservation suivante est calculée sans attendre la fin du sommeil
+    assert 0.8 < limiter.reserve() <= 1.0
+    assert time.time() - t0 < 0.1
+    sleeper.join()
+
+
+def test_wait_if_needed_async_does_not_block_the_loop():
+    limiter = RateLimiter(max_requests_per_second=5, max_burst=1)
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.time())
+            await asyncio.sleep(0.02)
+
+    async def run():
+        await asyncio.gather(
+            limiter.wait_if_needed_async(), limiter.wait_if_needed_async(), ticker()
+        )
+
+    t0 = time.time()
+    asyncio.run(run())
+    assert time.time() - t0 >= 0.15
+    assert ticks[1] - t0 < 0.1
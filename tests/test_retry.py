@@ -0,0 +1,118 @@
+import asyncio
+from collections import defaultdict
+from unittest.mock import patch, MagicMock
+import pytest
+import requests
+from cdsodatacli.retry import (
+    RetryPolicy,
+    CircuitOpenError,
+    is_retryable_error,
+    retry_with_backoff,
+)
+
+
+def http_error(status_code):
+    return requests.HTTPError(
+        f"{status_code} error", response=MagicMock(status_code=status_code)
+    )
+
+
+def test_is_retryable_error():
+    assert is_retryable_error(http_error(429))
+    assert is_retryable_error(http_error(503))
+    assert is_retryable_error(requests.exceptions.ReadTimeout())
+    assert is_retryable_error(requests.exceptions.ConnectionError())
+    assert is_retryable_error(TimeoutError())
+    assert not is_retryable_error(http_error(400))
+    assert not is_retryable_error(http_error(404))
+    assert not is_retryable_error(ValueError("not json"))
+
+
+def test_client_errors_fail_fast():
+    cpt = defaultdict(int)
+    calls = []
+
+    @retry_with_backoff(policy=RetryPolicy(max_retries=5))
+    def fetch(cpt=None):
+        calls.append(1)
+        raise http_error(400)
+
+    with patch("cdsodatacli.retry.time.sleep") as sleep:
+        with pytest.raises(requests.HTTPError):
+            fetch(cpt=cpt)
+    assert len(calls) == 1
+    assert not sleep.called
+    assert cpt["urls_failed_fast"] == 1
+
+
+def test_transient_errors_retried_with_full_jitter():
+    cpt = defaultdict(int)
+    answers = [http_error(503), requests.exceptions.ReadTimeout(), "ok"]
+
+    @retry_with_backoff(policy=RetryPolicy(base_delay=1, max_delay=3))
+    def fetch(cpt=None):
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    with patch("cdsodatacli.retry.time.sleep") as sleep:
+        assert fetch(cpt=cpt) == "ok"
+    assert cpt["urls_retried"] == 2
+    delays = [call.args[0] for call in sleep.call_args_list]
+    assert 0 <= delays[0] <= 1 and 0 <= delays[1] <= 2
+
+
+def test_retry_budget():
+    policy = RetryPolicy(max_retries=5, retry_budget_ratio=0, min_retries_budget=3)
+    cpt = defaultdict(int)
+
+    @retry_with_backoff(policy=policy)
+    def fetch(cpt=None):
+        raise http_error(500)
+
+    with patch("cdsodatacli.retry.time.sleep"):
+        for _ in range(2):
+            with pytest.raises(requests.HTTPError):
+                fetch(cpt=cpt)
+    # 3 nouvelles tentatives au total pour les deux appels, pas 10
+    assert cpt["urls_retried"] == 3
+    assert cpt["retry_budget_exhausted"] == 2
+
+
+def test_circuit_breaker():
+    policy = RetryPolicy(max_retries=0, failure_threshold=3, reset_timeout=60)
+    answers = []
+
+    @retry_with_backoff(policy=policy)
+    def fetch():
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    answers.extend([http_error(502)] * 3)
+    for _ in range(3):
+        with pytest.raises(requests.HTTPError):
+            fetch()
+    # disjoncteur ouvert : la requête n'est pas envoyée
+    with pytest.raises(CircuitOpenError):
+        fetch()
+    # après reset_timeout, une requête d'essai réussie le referme
+    policy.opened_at -= 61
+    answers.extend(["ok", "ok"])
+    assert fetch() == "ok"
+    assert fetch() == "ok"
+
+
+def test_async_retry():
+    answers = [http_error(429), "ok"]
+
+    @retry_with_backoff(policy=RetryPolicy(base_delay=0.01))
+    async def fetch():
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    assert asyncio.run(fetch()) == "ok"